@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Recommendation Benchmark
+Generates a synthetic PUC-scale dataset in a local SQLite or Postgres database and measures
+the recommendation pipeline: throughput, p50/p95 latency, query counts and peak memory.
+Results are saved as JSON so runs can be compared.
+
+Usage (from backend/):
+    python -m benchmarks.recommendation_benchmark --students 5000 --vagas 800
+    python -m benchmarks.recommendation_benchmark --database-url postgresql://localhost/linkepuc_bench --reset
+
+The benchmark drops and recreates every table of the database it runs on, so it refuses to
+use a database that already has users unless --reset is given. Never point it at a real database.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, date, timedelta
+from typing import Callable, Dict, List
+from sqlalchemy import event, insert, func
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the recommendation pipeline on a synthetic dataset")
+    parser.add_argument("--database-url", default="sqlite:///benchmark.db", help="Database to load the dataset into")
+    parser.add_argument("--reset", action="store_true", help="Drop the existing tables of a non-empty database")
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--professors", type=int, default=100)
+    parser.add_argument("--vagas", type=int, default=400)
+    parser.add_argument("--interests", type=int, default=150)
+    parser.add_argument("--user-interests", type=int, default=6, help="Average interests per student")
+    parser.add_argument("--vaga-interests", type=int, default=4, help="Average interests per vaga")
+    parser.add_argument("--candidaturas", type=int, default=3, help="Average candidaturas per student")
+    parser.add_argument("--closed-ratio", type=float, default=0.2, help="Share of vagas that are closed")
+    parser.add_argument("--sample-users", type=int, default=100, help="Students timed individually")
+    parser.add_argument("--layout", default=None, help="Recommendation layout (per_strategy, compact)")
+    parser.add_argument("--storage-mode", default=None, help="Recommendation storage mode (upsert, replace)")
+    parser.add_argument("--top-k", type=int, default=None, help="Recommendations kept per user")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Report the peak Python allocations of each phase with tracemalloc (slows the timed code down)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="JSON file for the results (default: benchmark_results/<timestamp>.json)")
+    return parser.parse_args()
+
+def import_models():
+    """
+    Import ALL models to ensure SQLAlchemy relationships work properly
+    Only called once DATABASE_URL points at the benchmark database, since models.base reads it on import.
+    """
+    from models.user import User
+    from models.recomendacao import Recomendacao
+    from models.recomendacao_compacta import RecomendacaoCompacta
+    from models.interesse import Interesses
+    from models.interesse_usuario import InteresseUsuario
+    from models.interesse_vaga import InteresseVaga
+    from models.vaga import Vagas
+    from models.candidato_vaga import CandidatoVaga
+    from models.departamento import Departamento
+    from models.tipo_vaga import Tipo
+    from models.localizacao import Location
+    from models.historico import Historico
+    from models.mensagem import Mensagem
+    from models.disciplinas import Disciplina
+    from models.publicacao import Publicacao
+    from models.recomendacao_evento import RecomendacaoEvento
+    from models.vaga_popularidade import VagaPopularidade
+    from models.recomendacao_job import RecomendacaoJob
+    from models.recomendacao_estrategia_stats import RecomendacaoEstrategiaStats
+    from models.vaga_termo import VagaTermo, TermoDocumento
+    from models.vaga_vizinho import VagaVizinho
+    from models.vaga_similar import VagaSimilar
+    from models.recomendacao_stats import RecomendacaoStats, RecomendacaoUsuarioStats
+    from models.recomendacao_inicial import RecomendacaoInicial
+    from models.catalogo_versao import CatalogoVersao
+    from models.backfill_concluido import BackfillConcluido
+    from models.recomendacao_versao import RecomendacaoVersao
+
+# Rows inserted per executemany while loading the dataset
+INSERT_CHUNK_SIZE = 5000
+
+
+class QueryCounter:
+    """Count the statements sent to the database"""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def latency_stats(durations: List[float]) -> Dict:
+    total = sum(durations)
+    return {
+        "calls": len(durations),
+        "total_s": round(total, 4),
+        "throughput_per_s": round(len(durations) / total, 2) if total else None,
+        "p50_ms": round(percentile(durations, 50) * 1000, 3),
+        "p95_ms": round(percentile(durations, 95) * 1000, 3),
+        "max_ms": round(max(durations) * 1000, 3) if durations else 0.0,
+    }
+
+@contextlib.contextmanager
+def memory_tracker(trace_memory: bool):
+    """
+    Track the peak memory of a phase, in MB
+    With --trace-memory: peak Python allocations of the phase (tracemalloc).
+    Otherwise: peak resident memory of the process so far (not available on Windows).
+    """
+    peak = {"peak_memory_mb": None}
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        yield peak
+    finally:
+        if trace_memory:
+            peak["peak_memory_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+            tracemalloc.stop()
+        elif resource is not None:
+            # ru_maxrss is in KB on Linux and in bytes on macOS
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            peak["peak_memory_mb"] = round(max_rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 2)
+
+def measure(counter: QueryCounter, func: Callable, trace_memory: bool = False):
+    """Run func once, returning (result, seconds, queries, peak memory in MB)"""
+    with memory_tracker(trace_memory) as memory:
+        queries_before = counter.count
+        started_at = time.perf_counter()
+        # The service logs every user with print; keep the benchmark output readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = func()
+        elapsed = time.perf_counter() - started_at
+    return result, elapsed, counter.count - queries_before, memory["peak_memory_mb"]
+
+def measure_calls(counter: QueryCounter, func: Callable, items: List, trace_memory: bool = False) -> Dict:
+    """Time func(item) for every item, with latency percentiles and queries per call"""
+    durations = []
+    queries_before = counter.count
+    with memory_tracker(trace_memory) as memory:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for item in items:
+                started_at = time.perf_counter()
+                func(item)
+                durations.append(time.perf_counter() - started_at)
+
+    stats = latency_stats(durations)
+    stats["queries_per_call"] = round((counter.count - queries_before) / len(items), 2) if items else 0
+    stats["peak_memory_mb"] = memory["peak_memory_mb"]
+    return stats
+
+
+def bulk_insert(db, model, rows: List[Dict]):
+    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+        db.execute(insert(model), rows[start:start + INSERT_CHUNK_SIZE])
+
+def prepare_database(args: argparse.Namespace):
+    from models.base import SessionLocal, Base, engine
+    from models.user import User
+
+    db = SessionLocal()
+    try:
+        Base.metadata.create_all(bind=engine)
+        has_users = db.query(User.id).first() is not None
+    finally:
+        db.close()
+
+    if has_users and not args.reset:
+        sys.exit(f"{args.database_url} already has data; use --reset to drop its tables (benchmark databases only)")
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+def generate_dataset(args: argparse.Namespace) -> Dict[str, int]:
+    """Load the synthetic dataset, returning the number of rows per table"""
+    from models.base import SessionLocal
+    from models.user import User
+    from models.interesse import Interesses
+    from models.interesse_usuario import InteresseUsuario
+    from models.interesse_vaga import InteresseVaga
+    from models.vaga import Vagas
+    from models.candidato_vaga import CandidatoVaga
+    from models.departamento import Departamento
+    from models.tipo_vaga import Tipo
+    from models.localizacao import Location
+
+    rng = random.Random(args.seed)
+    now = datetime.now()
+    db = SessionLocal()
+    try:
+        bulk_insert(db, Tipo, [{"id": 1, "nome": "Monitoria"}, {"id": 2, "nome": "Estágio"}, {"id": 3, "nome": "Iniciação Científica"}])
+        bulk_insert(db, Location, [{"id": 1, "name": "Campus Gávea"}, {"id": 2, "name": "Remoto"}])
+        bulk_insert(db, Departamento, [
+            {"id": i, "name": f"Departamento {i}", "sigla": f"DEP{i}"} for i in range(1, 21)
+        ])
+        bulk_insert(db, Interesses, [
+            {"id": i, "nome": f"Interesse {i}", "categoria": f"Categoria {i % 10}", "criado_em": now}
+            for i in range(1, args.interests + 1)
+        ])
+
+        professor_ids = list(range(1, args.professors + 1))
+        student_ids = list(range(args.professors + 1, args.professors + args.students + 1))
+        bulk_insert(db, User, [
+            {
+                "id": user_id, "email": f"user{user_id}@puc-rio.br", "usuario": f"user{user_id}", "password": "x",
+                "ehaluno": user_id > args.professors,
+                "email_verified": True, "criado_em": now
+            }
+            for user_id in professor_ids + student_ids
+        ])
+
+        vaga_ids = list(range(1, args.vagas + 1))
+        bulk_insert(db, Vagas, [
+            {
+                "id": vaga_id, "titulo": f"Vaga {vaga_id}", "descricao": f"Descrição da vaga {vaga_id}",
+                "prazo": date.today() + timedelta(days=rng.randint(-30, 120)),
+                "autor_id": rng.choice(professor_ids), "tipo_id": rng.randint(1, 3), "location_id": rng.randint(1, 2),
+                "department_id": rng.randint(1, 20), "remuneracao": rng.choice([0, 800, 1500]),
+                "horas_complementares": rng.choice([0, 20, 40]), "desconto": 0, "criado_em": now,
+                "status": "encerrada" if rng.random() < args.closed_ratio else "em_andamento"
+            }
+            for vaga_id in vaga_ids
+        ])
+
+        # Skewed interest popularity, as in real data a few interests are very common
+        interest_ids = list(range(1, args.interests + 1))
+        interest_weights = [1 / rank for rank in range(1, args.interests + 1)]
+
+        def sample_interests(average: int) -> set:
+            count = min(args.interests, max(0, int(rng.gauss(average, average / 2))))
+            return set(rng.choices(interest_ids, weights=interest_weights, k=count))
+
+        user_interest_rows = [
+            {"usuario_id": user_id, "interesse_id": interest_id, "criado_em": now}
+            for user_id in student_ids for interest_id in sample_interests(args.user_interests)
+        ]
+        vaga_interest_rows = [
+            {"vaga_id": vaga_id, "interesse_id": interest_id, "criado_em": now}
+            for vaga_id in vaga_ids for interest_id in sample_interests(args.vaga_interests)
+        ]
+        bulk_insert(db, InteresseUsuario, user_interest_rows)
+        bulk_insert(db, InteresseVaga, vaga_interest_rows)
+
+        candidatura_rows = []
+        for user_id in student_ids:
+            count = min(len(vaga_ids), max(0, int(rng.gauss(args.candidaturas, args.candidaturas / 2))))
+            for vaga_id in rng.sample(vaga_ids, count):
+                candidatura_rows.append({"candidato_id": user_id, "vaga_id": vaga_id, "criado_em": now})
+        bulk_insert(db, CandidatoVaga, candidatura_rows)
+
+        db.commit()
+        return {
+            "students": len(student_ids),
+            "professors": len(professor_ids),
+            "vagas": len(vaga_ids),
+            "active_vagas": db.query(func.count(Vagas.id)).filter(Vagas.status == "em_andamento").scalar(),
+            "interests": args.interests,
+            "user_interests": len(user_interest_rows),
+            "vaga_interests": len(vaga_interest_rows),
+            "candidaturas": len(candidatura_rows),
+        }
+    finally:
+        db.close()
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict:
+    from models.base import SessionLocal, engine
+    from services.recommendation_service import RecommendationService
+
+    counter = QueryCounter(engine)
+    prepare_database(args)
+    dataset, generate_seconds, _, _ = measure(counter, lambda: generate_dataset(args), args.trace_memory)
+
+    service = RecommendationService(storage_mode=args.storage_mode, layout=args.layout, top_k=args.top_k)
+    db = SessionLocal()
+    try:
+        student_ids = service.get_student_ids(db)
+        sample = random.Random(args.seed).sample(student_ids, min(args.sample_users, len(student_ids)))
+        results = {}
+
+        # Bulk refresh: first run writes everything, second run measures the steady state
+        for phase in ("cold", "warm"):
+            stats, seconds, queries, peak_mb = measure(
+                counter, lambda: service.calculate_recommendations_for_all_users(db), args.trace_memory
+            )
+            results[f"calculate_recommendations_for_all_users_{phase}"] = {
+                "users": len(student_ids),
+                "failed": stats["failed"],
+                "total_s": round(seconds, 4),
+                "throughput_users_per_s": round(len(student_ids) / seconds, 2) if seconds else None,
+                "queries": queries,
+                "peak_memory_mb": peak_mb,
+            }
+
+        results["stored_recommendations"] = service.store.count_active(db)[0]
+
+        results["calculate_and_store_recommendations"] = measure_calls(
+            counter, lambda user_id: service.calculate_and_store_recommendations(db, user_id), sample, args.trace_memory
+        )
+
+        # Reads: first pass with an empty read cache, second pass served from it
+        service.read_cache.cache_clear()
+        results["get_user_recommendations_cold"] = measure_calls(
+            counter, lambda user_id: service.get_user_recommendations(db, user_id, 10), sample, args.trace_memory
+        )
+        results["get_user_recommendations_warm"] = measure_calls(
+            counter, lambda user_id: service.get_user_recommendations(db, user_id, 10), sample, args.trace_memory
+        )
+    finally:
+        db.close()
+
+    return {
+        "config": {
+            "layout": service.store.get_layout(),
+            "storage_mode": service.store.storage_mode,
+            "top_k": service.top_k,
+            "sample_users": len(sample),
+            "trace_memory": args.trace_memory,
+            "seed": args.seed,
+        },
+        "dataset": dataset,
+        "generate_dataset_s": round(generate_seconds, 4),
+        "results": results,
+    }
+
+def main():
+    args = parse_args()
+    # models.base reads DATABASE_URL on import, so nothing imports it before this point
+    os.environ["DATABASE_URL"] = args.database_url
+    import_models()
+    from models.base import engine
+
+    started_at = datetime.now()
+    report = run_benchmark(args)
+
+    output = {
+        "started_at": started_at.isoformat(),
+        "database": engine.dialect.name,
+        "python": platform.python_version(),
+        **report,
+    }
+
+    output_path = args.output or os.path.join("benchmark_results", f"recommendations_{started_at:%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w") as f:
+        json.dump(output, f, indent=2)
+
+    print(json.dumps(output, indent=2))
+    print(f"📊 Results saved to {output_path}")
+
+if __name__ == "__main__":
+    main()
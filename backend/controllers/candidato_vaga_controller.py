@@ -12,7 +12,6 @@ from repositories.candidato_vaga_repository import (
 )
 from models.vaga import Vagas
 from schemas.candidato_schema import CandidaturaCreate, CandidaturaResponse, CandidaturaDetalhada
-from services.recommendation_service import RecommendationService
 from typing import List
 
 from dependecies import get_current_user
@@ -92,14 +91,8 @@ def cancelar_candidatura(
     if not candidatura:
         raise HTTPException(status_code=404, detail="Application not found")
     
-    # Trigger recommendation refresh for popular_opportunities strategy after cancelling
-    print(f"User {current_user.id} cancelled application to vaga {vaga_id}, refreshing popular strategy")
-    recommendation_service = RecommendationService()
-    success = recommendation_service.calculate_strategy_recommendations(db, current_user.id, "popular")
-    if success:
-        print(f"Successfully updated popular recommendations for user {current_user.id}")
-    else:
-        print(f"Failed to update popular recommendations for user {current_user.id}")
+    # Recommendations are refreshed by the worker from the recorded change event
+    print(f"User {current_user.id} cancelled application to vaga {vaga_id}")
     
     return {"message": "Successfully cancelled application"} 
 
@@ -1,10 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List, Dict, Optional
 from pydantic import BaseModel
 from models.base import SessionLocal
 from dependecies import get_current_user
 from services.recommendation_service import RecommendationService
+from repositories.recomendacao_job_repository import (
+    enqueue_recommendation_jobs,
+    get_latest_job,
+    get_queue_position,
+    JOB_PENDING,
+    FIRST_TIME,
+    MANUAL_REFRESH,
+    SWEEP,
+)
+from datetime import datetime, timedelta
 
 recommendation_router = APIRouter()
 
@@ -21,10 +31,22 @@ class RecommendationExplanationResponse(BaseModel):
     total_score: float
     strategies: List[Dict]
 
+class RecommendationJobStatusResponse(BaseModel):
+    status: Optional[str]
+    motivo: Optional[str]
+    posicao_fila: Optional[int]
+    criado_em: Optional[str]
+    concluido_em: Optional[str]
+    erro: Optional[str]
+
 class RecommendationStatsResponse(BaseModel):
     total_active_recommendations: int
     users_with_recommendations: int
     average_recommendations_per_user: float
+    strategies: List[Dict] = []
+    strategy_coverage: List[Dict] = []
+    age_distribution: Dict[str, int] = {}
+    last_full_refresh: Optional[Dict] = None
 
 def get_db():
     db = SessionLocal()
@@ -57,14 +79,17 @@ async def get_user_recommendations(
             db, current_user.id, limit
         )
         
-        # If no recommendations exist, generate them in background (first-time user)
+        # If no recommendations exist, queue their calculation (first-time user)
         if not recommendations:
-            # Check if user should get fresh recommendations
-            if recommendation_service.should_refresh_recommendations(db, current_user.id, max_age_hours=24):
-                # Generate recommendations for first-time users (but don't wait for it)
-                recommendation_service.calculate_and_store_recommendations(db, current_user.id)
-                # Return empty for now, they'll get recommendations on next request
-                return []
+            # Don't queue again while a job is pending/running or one finished in the last 24h
+            latest_job = get_latest_job(db, current_user.id)
+            if latest_job is None or (
+                latest_job.concluido_em is not None
+                and latest_job.concluido_em < datetime.now() - timedelta(hours=24)
+            ):
+                enqueue_recommendation_jobs(db, [current_user.id], FIRST_TIME)
+            # Answer from the precomputed per-interest lists until the worker stores the personalized ones
+            return recommendation_service.get_cold_start_recommendations(db, current_user.id, limit)
         
         return recommendations
         
@@ -111,7 +136,6 @@ async def get_recommendation_explanation(
 
 @recommendation_router.post("/refresh")
 async def refresh_user_recommendations(
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
@@ -124,9 +148,8 @@ async def refresh_user_recommendations(
         )
     
     try:
-        # Run recommendation calculation in background
-        print(f"current_user.id: {current_user.id}")
-        recommendation_service.calculate_and_store_recommendations(db, current_user.id)
+        # Queue the calculation, the recommendation worker runs it
+        enqueue_recommendation_jobs(db, [current_user.id], MANUAL_REFRESH)
         
         return {"message": "Recomendações estão sendo atualizadas em segundo plano"}
         
@@ -136,6 +159,35 @@ async def refresh_user_recommendations(
             detail=f"Erro ao atualizar recomendações: {str(e)}"
         )
 
+@recommendation_router.get("/status", response_model=RecommendationJobStatusResponse)
+async def get_recommendation_job_status(
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """Get the status of the current user's latest recommendation job"""
+    
+    try:
+        job = get_latest_job(db, current_user.id)
+        if not job:
+            return RecommendationJobStatusResponse(
+                status=None, motivo=None, posicao_fila=None, criado_em=None, concluido_em=None, erro=None
+            )
+        
+        return RecommendationJobStatusResponse(
+            status=job.status,
+            motivo=job.motivo,
+            posicao_fila=get_queue_position(db, job) if job.status == JOB_PENDING else None,
+            criado_em=job.criado_em.isoformat() if job.criado_em else None,
+            concluido_em=job.concluido_em.isoformat() if job.concluido_em else None,
+            erro=job.erro
+        )
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao buscar status das recomendações: {str(e)}"
+        )
+
 @recommendation_router.get("/stats", response_model=RecommendationStatsResponse)
 async def get_recommendation_stats(
     db: Session = Depends(get_db),
@@ -162,7 +214,6 @@ async def get_recommendation_stats(
 
 @recommendation_router.post("/calculate-all")
 async def calculate_recommendations_for_all_users(
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
@@ -176,11 +227,8 @@ async def calculate_recommendations_for_all_users(
         )
     
     try:
-        # Run bulk calculation in background
-        background_tasks.add_task(
-            recommendation_service.calculate_recommendations_for_all_users,
-            db
-        )
+        # Queue every student behind first-time users and manual refreshes
+        enqueue_recommendation_jobs(db, recommendation_service.get_student_ids(db), SWEEP)
         
         return {"message": "Cálculo de recomendações para todos os usuários iniciado em segundo plano"}
         
@@ -8,6 +8,7 @@ from repositories.user_repository import (
     get_users,
     get_user_with_interests,
     update_user,
+    update_user_avatar,
     delete_user,
     verify_password,
     get_user_by_verification_token,
@@ -345,9 +346,7 @@ async def upload_avatar(id: int, file: UploadFile = File(...), db: Session = Dep
         raise HTTPException(status_code=500, detail=f"Failed to upload avatar: {str(e)}")
 
     # Update the user's avatar URL in the database
-    user.avatar = avatar_url
-    db.commit()
-    db.refresh(user)
+    update_user_avatar(db, id, avatar_url)
 
     return {"message": "Avatar uploaded successfully", "avatar_url": avatar_url}
 
@@ -358,9 +357,7 @@ async def delete_avatar(id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="User not found")
 
     # Remove the avatar URL from the database
-    user.avatar = None
-    db.commit()
-    db.refresh(user)
+    update_user_avatar(db, id, None)
 
     return {"message": "Avatar deleted successfully"}
 
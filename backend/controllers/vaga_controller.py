@@ -9,15 +9,16 @@ from repositories.vaga_repository import (
     delete_vaga,
     get_tipos_vaga,
     get_vagas_by_professor,
-    get_vagas_cached,
 )
 from services.cache_service import static_cache
 from models.base import SessionLocal
 from pydantic import BaseModel
-from schemas.vaga_schema import VagaResponse
+from schemas.vaga_schema import VagaResponse, SimilarVagaResponse
+from repositories.vaga_similar_repository import get_similar_vagas
 from typing import List, Optional
 from dependecies import get_current_user
 from models.user import User
+from models.vaga import Vagas
 
 
 vaga_router = APIRouter()
@@ -65,7 +66,9 @@ async def read_vagas_endpoint(
     tipos: Optional[str] = Query(None, description="Comma-separated list of tipo IDs"),
     departamento: Optional[str] = Query(None, description="Department name"),
     beneficios: Optional[str] = Query(None, description="Comma-separated list of benefits"),
-    busca: Optional[str] = Query(None, description="Search query for title/description")
+    busca: Optional[str] = Query(None, description="Search query for title/description"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    incluir_total: bool = Query(True, description="Include the (estimated) total count")
 ):
     # Parse filter parameters
     tipo_ids = []
@@ -91,20 +94,26 @@ async def read_vagas_endpoint(
     
     
     # Pass filters to repository
-    result = get_vagas(
-        db, 
-        skip=skip, 
-        limit=limit, 
-        user_id=current_user.id,
-        tipo_ids=tipo_ids,
-        departamento=departamento,
-        beneficios=benefit_list,
-        busca=busca
-    )
+    try:
+        result = get_vagas(
+            db, 
+            skip=skip, 
+            limit=limit, 
+            user_id=current_user.id,
+            tipo_ids=tipo_ids,
+            departamento=departamento,
+            beneficios=benefit_list,
+            busca=busca,
+            cursor=cursor,
+            include_total=incluir_total
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     return {
         "vagas": result["vagas"],
         "total": result["total"],
         "recommended_count": result["recommended_count"],
+        "next_cursor": result["next_cursor"],
         "skip": skip,
         "limit": limit
     }
@@ -137,6 +146,21 @@ async def read_vaga_endpoint(id: int, db: Session = Depends(get_db), user_id: in
         raise HTTPException(status_code=404, detail="Vaga not found")
     return vaga
 
+@vaga_router.get("/{id}/similares", response_model=List[SimilarVagaResponse])
+async def read_similar_vagas_endpoint(
+    id: int,
+    limit: int = Query(10, ge=1, le=20),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Most similar active vagas, read from the lists precomputed by the recommendation worker"""
+    if not db.query(Vagas.id).filter(Vagas.id == id).first():
+        raise HTTPException(status_code=404, detail="Vaga not found")
+    return [
+        {"vaga": vaga, "similaridade": similaridade}
+        for vaga, similaridade in get_similar_vagas(db, id, limit)
+    ]
+
 @vaga_router.put("/{id}")
 async def update_vaga_endpoint(id: int, vaga: VagaUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     # Check if the vaga exists and belongs to the current user
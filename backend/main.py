@@ -9,11 +9,13 @@ from controllers.department_controller import departamento_router
 from controllers.historico_controller import historico_router
 from controllers.mensagem_controller import mensagem_router
 from models.base import Base, engine
+from services.vaga_search import ensure_search_index
 from controllers.candidato_vaga_controller import candidato_vaga_router
 from controllers.recommendation_controller import recommendation_router
 
 # Initialize database
 Base.metadata.create_all(bind=engine)
+ensure_search_index(engine)
 
 # Initialize FastAPI app
 app = FastAPI()
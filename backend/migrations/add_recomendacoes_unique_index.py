@@ -0,0 +1,37 @@
+from sqlalchemy import create_engine, text
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Get DATABASE_URL
+database_url = os.getenv("DATABASE_URL")
+if not database_url:
+    raise ValueError("DATABASE_URL environment variable is not set")
+
+# Create engine
+engine = create_engine(database_url)
+
+# Create a connection
+with engine.connect() as connection:
+    # Keep only the most recent row of each (usuario_id, vaga_id, estrategia)
+    connection.execute(text("""
+        DELETE FROM recomendacoes r
+        USING recomendacoes newer
+        WHERE r.usuario_id = newer.usuario_id
+          AND r.vaga_id = newer.vaga_id
+          AND r.estrategia = newer.estrategia
+          AND r.id < newer.id
+    """))
+    
+    # Unique index used by the diff-based upserts
+    connection.execute(text("""
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_recomendacoes_usuario_vaga_estrategia
+        ON recomendacoes (usuario_id, vaga_id, estrategia)
+    """))
+    
+    # Commit the transaction
+    connection.commit()
+
+print("Migration completed successfully!")
@@ -0,0 +1,44 @@
+from sqlalchemy import create_engine, text
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Get DATABASE_URL
+database_url = os.getenv("DATABASE_URL")
+if not database_url:
+    raise ValueError("DATABASE_URL environment variable is not set")
+
+# Create engine
+engine = create_engine(database_url)
+
+# Create a connection
+with engine.connect() as connection:
+    # Course code of monitoria vagas, parsed from the title
+    connection.execute(text("""
+        ALTER TABLE vagas ADD COLUMN IF NOT EXISTS codigo_disciplina VARCHAR
+    """))
+    
+    # Backfill the existing monitorias ("Monitoria em INF1010 - ...", same rule as utils.text_utils.parse_course_code)
+    connection.execute(text("""
+        UPDATE vagas
+        SET codigo_disciplina = upper(regexp_replace(
+            substring(titulo from '(?i)^\\s*monitoria\\s+em\\s+([a-z]{3}\\s?[0-9]{4})\\y'),
+            '\\s', '', 'g'
+        ))
+        WHERE codigo_disciplina IS NULL
+    """))
+    
+    # Indexed join between monitorias and historicos
+    connection.execute(text("""
+        CREATE INDEX IF NOT EXISTS ix_vagas_codigo_disciplina ON vagas (codigo_disciplina)
+    """))
+    connection.execute(text("""
+        CREATE INDEX IF NOT EXISTS ix_historicos_codigo_disciplina_grau ON historicos (codigo_disciplina, grau)
+    """))
+    
+    # Commit the transaction
+    connection.commit()
+
+print("Migration completed successfully!")
@@ -0,0 +1,33 @@
+from sqlalchemy import create_engine, text
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Get DATABASE_URL
+database_url = os.getenv("DATABASE_URL")
+if not database_url:
+    raise ValueError("DATABASE_URL environment variable is not set")
+
+# Create engine
+engine = create_engine(database_url)
+
+# Create a connection
+with engine.connect() as connection:
+    # Full-text search of the vagas (services/vaga_search.py), title weighted above the description.
+    # Adding the generated column rewrites the vagas table, so run it outside peak hours.
+    connection.execute(text("""
+        ALTER TABLE vagas ADD COLUMN IF NOT EXISTS busca_vetor tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('portuguese', coalesce(titulo, '')), 'A') ||
+            setweight(to_tsvector('portuguese', coalesce(descricao, '')), 'B')
+        ) STORED
+    """))
+    connection.execute(text("""
+        CREATE INDEX IF NOT EXISTS ix_vagas_busca_vetor ON vagas USING GIN (busca_vetor)
+    """))
+    
+    # Commit the transaction
+    connection.commit()
+
+print("Migration completed successfully!")
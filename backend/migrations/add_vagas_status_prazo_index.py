@@ -0,0 +1,26 @@
+from sqlalchemy import create_engine, text
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Get DATABASE_URL
+database_url = os.getenv("DATABASE_URL")
+if not database_url:
+    raise ValueError("DATABASE_URL environment variable is not set")
+
+# Create engine
+engine = create_engine(database_url)
+
+# Create a connection
+with engine.connect() as connection:
+    # Expiry sweep of the active vagas past their deadline
+    connection.execute(text("""
+        CREATE INDEX IF NOT EXISTS ix_vagas_status_prazo ON vagas (status, prazo)
+    """))
+    
+    # Commit the transaction
+    connection.commit()
+
+print("Migration completed successfully!")
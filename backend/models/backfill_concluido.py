@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, TIMESTAMP
+from datetime import datetime
+from .base import Base
+
+class BackfillConcluido(Base):
+    """
+    Derived tables whose full backfill has finished
+    Incremental writes may create rows before the backfill ran, so "the table has rows" does not mean complete
+    """
+    __tablename__ = "backfills_concluidos"
+    
+    nome = Column(String, primary_key=True)
+    concluido_em = Column(TIMESTAMP, default=datetime.now, onupdate=datetime.now)
+    
+    def __repr__(self):
+        return f"<BackfillConcluido(nome={self.nome})>"
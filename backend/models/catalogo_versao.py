@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, TIMESTAMP
+from datetime import datetime
+from .base import Base
+
+# The catalog has a single version row
+CATALOG_ROW_ID = 1
+
+class CatalogoVersao(Base):
+    """Version of the vagas catalog, bumped on every vaga write (listing cache invalidation)"""
+    __tablename__ = "catalogo_versao"
+    
+    id = Column(Integer, primary_key=True)
+    versao = Column(Integer, nullable=False, default=0)
+    atualizado_em = Column(TIMESTAMP, default=datetime.now, onupdate=datetime.now)
+    
+    def __repr__(self):
+        return f"<CatalogoVersao(versao={self.versao})>"
@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Numeric
+from sqlalchemy import Column, Integer, String, ForeignKey, Numeric, Index
 from sqlalchemy.orm import relationship
 from .base import Base
 
 class Historico(Base):
     __tablename__ = "historicos"
+    __table_args__ = (
+        # Monitoria matching: students who took a course with at least a given grade
+        Index("ix_historicos_codigo_disciplina_grau", "codigo_disciplina", "grau"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("usuarios.id"), nullable=False)  # Associate with User
@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey, TIMESTAMP, Boolean
+from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey, TIMESTAMP, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .base import Base
 
 class Recomendacao(Base):
     __tablename__ = "recomendacoes"
+    __table_args__ = (
+        # One row per (user, vaga, strategy): target of the ON CONFLICT upserts
+        Index("uq_recomendacoes_usuario_vaga_estrategia", "usuario_id", "vaga_id", "estrategia", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     usuario_id = Column(Integer, ForeignKey("usuarios.id"), nullable=False)
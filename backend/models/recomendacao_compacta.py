@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey, TIMESTAMP, Boolean, JSON, Index
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from .base import Base
+
+class RecomendacaoCompacta(Base):
+    """Compact recommendation layout: a single row per (user, vaga) instead of one per strategy"""
+    __tablename__ = "recomendacoes_compactas"
+    __table_args__ = (
+        Index("uq_recomendacoes_compactas_usuario_vaga", "usuario_id", "vaga_id", unique=True),
+        # Range scan for "best active recommendations of a user"
+        Index("ix_recomendacoes_compactas_usuario_ativa_score", "usuario_id", "ativa", "score"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    usuario_id = Column(Integer, ForeignKey("usuarios.id"), nullable=False)
+    vaga_id = Column(Integer, ForeignKey("vagas.id"), nullable=False)
+    score = Column(Float, nullable=False)  # Combined (weighted) score
+    scores = Column(JSON, nullable=False)  # {estrategia: score}
+    detalhes = Column(JSON, nullable=False)  # {estrategia: explanation inputs, e.g. interest ids, candidate count}
+    ativa = Column(Boolean, default=True)
+    criado_em = Column(TIMESTAMP, default=datetime.now)
+    atualizado_em = Column(TIMESTAMP, default=datetime.now, onupdate=datetime.now)
+
+    usuario = relationship("User")
+    vaga = relationship("Vagas")
+
+    def __repr__(self):
+        return f"<RecomendacaoCompacta(usuario_id={self.usuario_id}, vaga_id={self.vaga_id}, score={self.score})>"
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Float, TIMESTAMP
+from datetime import datetime
+from .base import Base
+
+class RecomendacaoEstrategiaStats(Base):
+    """Cumulative run statistics and circuit breaker state of each recommendation strategy"""
+    __tablename__ = "recomendacao_estrategia_stats"
+    
+    estrategia = Column(String, primary_key=True)
+    execucoes = Column(Integer, nullable=False, default=0)
+    erros = Column(Integer, nullable=False, default=0)
+    timeouts = Column(Integer, nullable=False, default=0)
+    ignoradas = Column(Integer, nullable=False, default=0)  # Skipped while the circuit breaker was open
+    tempo_total = Column(Float, nullable=False, default=0.0)  # Seconds
+    tempo_maximo = Column(Float, nullable=False, default=0.0)
+    consultas = Column(Integer, nullable=False, default=0)
+    estado = Column(String, nullable=False, default="fechado")  # 'fechado', 'aberto'
+    aberto_ate = Column(TIMESTAMP, nullable=True)
+    ultimo_erro = Column(String, nullable=True)
+    atualizado_em = Column(TIMESTAMP, default=datetime.now, onupdate=datetime.now)
+    
+    def __repr__(self):
+        return f"<RecomendacaoEstrategiaStats(estrategia={self.estrategia}, execucoes={self.execucoes}, estado={self.estado})>"
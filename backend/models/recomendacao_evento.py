@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, TIMESTAMP, Boolean
+from datetime import datetime
+from .base import Base
+
+class RecomendacaoEvento(Base):
+    """Change log of writes that affect recommendations, consumed by the recommendation worker"""
+    __tablename__ = "recomendacao_eventos"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    tipo = Column(String, nullable=False)  # 'interesses_usuario', 'candidatura_criada', 'vaga_criada', etc.
+    # No foreign keys: events must not block deleting the user or the vaga they refer to
+    usuario_id = Column(Integer, nullable=True)
+    vaga_id = Column(Integer, nullable=True)
+    processado = Column(Boolean, default=False, index=True)
+    criado_em = Column(TIMESTAMP, default=datetime.now)
+    processado_em = Column(TIMESTAMP, nullable=True)
+    
+    def __repr__(self):
+        return f"<RecomendacaoEvento(tipo={self.tipo}, usuario_id={self.usuario_id}, vaga_id={self.vaga_id})>"
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, Float, Index
+from .base import Base
+
+# interesse_id of the global fallback list
+GLOBAL_LIST = 0
+
+class RecomendacaoInicial(Base):
+    """Precomputed ranked vagas per interest (and a global list), served to students without stored recommendations"""
+    __tablename__ = "recomendacoes_iniciais"
+    __table_args__ = (
+        Index("ix_recomendacoes_iniciais_interesse_score", "interesse_id", "score"),
+    )
+    
+    # No foreign keys: must not block deleting a vaga or an interest, the lists are rebuilt by the worker
+    interesse_id = Column(Integer, primary_key=True)  # GLOBAL_LIST for the global fallback list
+    vaga_id = Column(Integer, primary_key=True)
+    score = Column(Float, nullable=False)  # Normalized popularity
+    candidatos = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<RecomendacaoInicial(interesse_id={self.interesse_id}, vaga_id={self.vaga_id}, score={self.score})>"
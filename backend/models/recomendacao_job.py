@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, TIMESTAMP, Index, text
+from datetime import datetime
+from .base import Base
+
+class RecomendacaoJob(Base):
+    """Durable queue of per-user recommendation calculations, drained by the recommendation worker"""
+    __tablename__ = "recomendacao_jobs"
+    __table_args__ = (
+        # At most one pending job per user: enqueueing again only raises the priority
+        Index(
+            "uq_recomendacao_jobs_usuario_pendente", "usuario_id", unique=True,
+            postgresql_where=text("status = 'pendente'"), sqlite_where=text("status = 'pendente'")
+        ),
+        # Claim order: highest priority first, then oldest
+        Index("ix_recomendacao_jobs_status_prioridade", "status", "prioridade", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    usuario_id = Column(Integer, nullable=False)  # No foreign key: must not block deleting the user
+    prioridade = Column(Integer, nullable=False, default=0)
+    motivo = Column(String, nullable=False)  # 'primeiro_acesso', 'atualizacao_manual', 'varredura'
+    status = Column(String, nullable=False, default="pendente")  # 'pendente', 'processando', 'concluido', 'falhou'
+    erro = Column(String, nullable=True)
+    criado_em = Column(TIMESTAMP, default=datetime.now)
+    iniciado_em = Column(TIMESTAMP, nullable=True)
+    concluido_em = Column(TIMESTAMP, nullable=True)
+    
+    def __repr__(self):
+        return f"<RecomendacaoJob(usuario_id={self.usuario_id}, status={self.status}, prioridade={self.prioridade})>"
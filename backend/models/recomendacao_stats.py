@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, Float, TIMESTAMP, JSON
+from datetime import datetime
+from .base import Base
+
+class RecomendacaoStats(Base):
+    """
+    Global recommendation counters, adjusted by delta whenever recommendations are written or invalidated
+    chave: 'ativas', 'usuarios', 'estrategia:<name>', 'dia:<YYYY-MM-DD>' (active recommendations last
+    written that day) and 'atualizacao_completa_segundos' (last full refresh, finished at atualizado_em)
+    """
+    __tablename__ = "recomendacao_stats"
+    
+    chave = Column(String, primary_key=True)
+    valor = Column(Float, nullable=False, default=0)
+    atualizado_em = Column(TIMESTAMP, default=datetime.now, onupdate=datetime.now)
+    
+    def __repr__(self):
+        return f"<RecomendacaoStats(chave={self.chave}, valor={self.valor})>"
+
+class RecomendacaoUsuarioStats(Base):
+    """Last counted active recommendations of each user, the base for the deltas of the global counters"""
+    __tablename__ = "recomendacao_usuario_stats"
+    
+    usuario_id = Column(Integer, primary_key=True)  # No foreign key: must not block deleting the user
+    ativas = Column(Integer, nullable=False, default=0)
+    estrategias = Column(JSON, nullable=False)  # {estrategia: active recommendations it contributed to}
+    dias = Column(JSON, nullable=False)  # {'YYYY-MM-DD': active recommendations last written that day}
+    
+    def __repr__(self):
+        return f"<RecomendacaoUsuarioStats(usuario_id={self.usuario_id}, ativas={self.ativas})>"
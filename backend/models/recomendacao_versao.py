@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, TIMESTAMP
+from datetime import datetime
+from .base import Base
+
+class RecomendacaoVersao(Base):
+    """Version of each user's stored recommendations, bumped on every rewrite (read cache invalidation)"""
+    __tablename__ = "recomendacao_versoes"
+    
+    usuario_id = Column(Integer, primary_key=True)  # No foreign key: must not block deleting the user
+    versao = Column(Integer, nullable=False, default=0)
+    atualizado_em = Column(TIMESTAMP, default=datetime.now, onupdate=datetime.now)
+    
+    def __repr__(self):
+        return f"<RecomendacaoVersao(usuario_id={self.usuario_id}, versao={self.versao})>"
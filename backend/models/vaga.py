@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, TIMESTAMP, Text, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, TIMESTAMP, Text, Date, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .base import Base
@@ -8,6 +8,12 @@ from .localizacao import Location  # Make sure this import is present
 
 class Vagas(Base):
     __tablename__ = "vagas"
+    __table_args__ = (
+        # Expiry sweep: active vagas past their deadline
+        Index("ix_vagas_status_prazo", "status", "prazo"),
+        # Listing pages: keyset over (criado_em, id) of the active vagas
+        Index("ix_vagas_status_criado_em_id", "status", "criado_em", "id"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     titulo = Column(String, nullable=False)
     descricao = Column(Text, nullable=False)
@@ -23,6 +29,7 @@ class Vagas(Base):
     professor = Column(Text, nullable=True)  # Changed to nullable
     link_vaga = Column(Text, nullable=True)  # Changed to nullable
     status = Column(String, nullable=False, default="em_andamento")  # Status of the vaga itself
+    codigo_disciplina = Column(String, nullable=True, index=True)  # Course code parsed from monitoria titles
 
     autor = relationship("User")
     tipo = relationship("Tipo")  # Relationship with Tipo table
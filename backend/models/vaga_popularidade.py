@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, TIMESTAMP
+from datetime import datetime
+from .base import Base
+
+class VagaPopularidade(Base):
+    """Number of candidates per vaga, maintained incrementally on every candidatura write"""
+    __tablename__ = "vaga_popularidade"
+    
+    vaga_id = Column(Integer, primary_key=True)  # No foreign key: must not block deleting the vaga
+    candidatos = Column(Integer, nullable=False, default=0)
+    atualizado_em = Column(TIMESTAMP, default=datetime.now, onupdate=datetime.now)
+    
+    def __repr__(self):
+        return f"<VagaPopularidade(vaga_id={self.vaga_id}, candidatos={self.candidatos})>"
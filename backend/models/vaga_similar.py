@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, Float, Index
+from .base import Base
+
+class VagaSimilar(Base):
+    """Precomputed top-N most similar active vagas of each vaga (text + interests), served by /vagas/{id}/similares"""
+    __tablename__ = "vaga_similares"
+    __table_args__ = (
+        # Most similar first for a vaga
+        Index("ix_vaga_similares_vaga_similaridade", "vaga_id", "similaridade"),
+        # Lists that contain a given vaga, updated when it changes
+        Index("ix_vaga_similares_similar", "similar_id"),
+    )
+    
+    # No foreign keys: must not block deleting a vaga, the lists are refreshed by the worker
+    vaga_id = Column(Integer, primary_key=True)
+    similar_id = Column(Integer, primary_key=True)
+    similaridade = Column(Float, nullable=False)
+    
+    def __repr__(self):
+        return f"<VagaSimilar(vaga_id={self.vaga_id}, similar_id={self.similar_id}, similaridade={self.similaridade})>"
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String
+from .base import Base
+
+class VagaTermo(Base):
+    """Term counts of each vaga's titulo + descricao (content similarity index), maintained on every vaga write"""
+    __tablename__ = "vaga_termos"
+    
+    vaga_id = Column(Integer, primary_key=True)  # No foreign key: must not block deleting the vaga
+    termo = Column(String, primary_key=True)
+    frequencia = Column(Integer, nullable=False)
+    
+    def __repr__(self):
+        return f"<VagaTermo(vaga_id={self.vaga_id}, termo={self.termo}, frequencia={self.frequencia})>"
+
+class TermoDocumento(Base):
+    """Number of vagas containing each term (document frequency for the IDF)"""
+    __tablename__ = "termo_documentos"
+    
+    termo = Column(String, primary_key=True)
+    documentos = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<TermoDocumento(termo={self.termo}, documentos={self.documentos})>"
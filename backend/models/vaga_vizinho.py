@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, Float
+from .base import Base
+
+class VagaVizinho(Base):
+    """Precomputed top-N co-application neighbors of each vaga ("students who applied to X also applied to Y")"""
+    __tablename__ = "vaga_vizinhos"
+    
+    # No foreign keys: must not block deleting a vaga, the list is rebuilt periodically
+    vaga_id = Column(Integer, primary_key=True)
+    vizinho_id = Column(Integer, primary_key=True)
+    similaridade = Column(Float, nullable=False)  # Cosine similarity of the candidate sets
+    coaplicacoes = Column(Integer, nullable=False)  # Students who applied to both
+    
+    def __repr__(self):
+        return f"<VagaVizinho(vaga_id={self.vaga_id}, vizinho_id={self.vizinho_id}, similaridade={self.similaridade})>"
@@ -8,8 +8,8 @@ No Redis, no Docker complexity - just works with your existing setup
 import time
 import logging
 from datetime import datetime, timedelta
-from typing import List
-import threading
+from typing import List, Dict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # Setup logging
 logging.basicConfig(
@@ -24,11 +24,26 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from models.base import SessionLocal, Base, engine
-from services.recommendation_service import RecommendationService
+from services.recommendation_service import RecommendationService, BATCH_SIZE
+from services.recommendation_events import RecommendationChangeConsumer
+from repositories.recomendacao_evento_repository import delete_processed_events
+from repositories.vaga_popularidade_repository import rebuild_vaga_popularity
+from repositories.vaga_termo_repository import has_vaga_terms, rebuild_vaga_terms
+from repositories.vaga_vizinho_repository import rebuild_vaga_neighbors
+from services.similar_vagas import rebuild_similar_vagas
+from repositories.vaga_repository import close_expired_vagas
+from repositories.recomendacao_inicial_repository import rebuild_cold_start_lists
+from repositories.recomendacao_job_repository import (
+    claim_pending_jobs,
+    finish_jobs,
+    requeue_stale_jobs,
+    delete_finished_jobs,
+)
 
 # Import ALL models to ensure SQLAlchemy relationships work properly
 from models.user import User
 from models.recomendacao import Recomendacao
+from models.recomendacao_compacta import RecomendacaoCompacta
 from models.interesse import Interesses
 from models.interesse_usuario import InteresseUsuario
 from models.interesse_vaga import InteresseVaga
@@ -41,14 +56,71 @@ from models.historico import Historico
 from models.mensagem import Mensagem
 from models.disciplinas import Disciplina
 from models.publicacao import Publicacao
+from models.recomendacao_evento import RecomendacaoEvento
+from models.vaga_popularidade import VagaPopularidade
+from models.recomendacao_job import RecomendacaoJob
+from models.recomendacao_estrategia_stats import RecomendacaoEstrategiaStats
+from models.vaga_termo import VagaTermo, TermoDocumento
+from models.vaga_vizinho import VagaVizinho
+from models.vaga_similar import VagaSimilar
+from models.recomendacao_stats import RecomendacaoStats, RecomendacaoUsuarioStats
+from models.recomendacao_inicial import RecomendacaoInicial
+from models.catalogo_versao import CatalogoVersao
+from models.backfill_concluido import BackfillConcluido
 
 # Initialize database tables
 Base.metadata.create_all(bind=engine)
 
+# Full refresh interval, change-log polling interval, job queue polling interval and expiry sweep interval
+FULL_REFRESH_SECONDS = 2 * 60 * 60
+EVENT_POLL_SECONDS = 30
+JOB_POLL_SECONDS = 2
+EXPIRY_SWEEP_SECONDS = 15 * 60
+
+# Running jobs older than this are considered lost (worker died) and queued again
+JOB_TIMEOUT_SECONDS = 30 * 60
+
+# Full refresh concurrency: processes used by this instance (RECOMMENDATION_WORKER_PROCESSES), and
+# this instance's slice when several worker instances share the students (RECOMMENDATION_WORKER_INSTANCE
+# of RECOMMENDATION_WORKER_INSTANCES). Students are sharded by user_id % (instances × processes).
+WORKER_PROCESSES = int(os.getenv("RECOMMENDATION_WORKER_PROCESSES", os.cpu_count() or 1))
+WORKER_INSTANCE = int(os.getenv("RECOMMENDATION_WORKER_INSTANCE", 0))
+WORKER_INSTANCES = int(os.getenv("RECOMMENDATION_WORKER_INSTANCES", 1))
+
+def _init_shard_process():
+    """Drop the connections inherited from the parent process, each process opens its own"""
+    engine.dispose(close=False)
+
+def refresh_shard(shard: int, num_shards: int) -> Dict[str, int]:
+    """Full refresh of the students with user_id % num_shards == shard (runs in a pool process)"""
+    db = SessionLocal()
+    try:
+        service = RecommendationService()
+        started_at = time.time()
+        
+        def report_progress(done: int, total: int):
+            logger.info(f"[shard {shard}/{num_shards}] Progress: {done}/{total} users")
+        
+        stats = service.calculate_recommendations_for_all_users(
+            db, verified_only=True, progress_callback=report_progress, shard=shard, num_shards=num_shards
+        )
+        logger.info(f"[shard {shard}/{num_shards}] Done in {time.time() - started_at:.1f}s")
+        return stats
+    finally:
+        db.close()
+
 class SimpleRecommendationWorker:
-    def __init__(self):
+    def __init__(self, processes: int = WORKER_PROCESSES, instance: int = WORKER_INSTANCE, instances: int = WORKER_INSTANCES):
         self.service = RecommendationService()
+        self.consumer = RecommendationChangeConsumer(self.service)
+        self.processes = max(1, processes)
+        self.instance = instance
+        self.instances = max(1, instances)
         self.running = False
+        self.last_full_refresh = 0.0
+        self.last_event_poll = 0.0
+        self.last_expiry_sweep = 0.0
+        self.last_cleanup_date = None
         logger.info("🚀 Simple Recommendation Worker initialized")
     
     def update_user_recommendations(self, user_id: int) -> bool:
@@ -70,25 +142,53 @@ class SimpleRecommendationWorker:
         finally:
             db.close()
     
+    @property
+    def is_coordinator(self) -> bool:
+        """Instance 0 handles the work that must run once: popularity recount, change events, expiry sweep, cleanup"""
+        return self.instance == 0
+    
     def update_all_users(self):
-        """Update recommendations for all active users"""
+        """Update recommendations for this instance's students, sharded across the process pool"""
         db = SessionLocal()
         try:
-            # Get all verified student users
-            users = db.query(User).filter(
-                User.ehaluno == True,
-                User.email_verified == True
-            ).all()
+            started_at = time.time()
             
-            logger.info(f"Found {len(users)} users to update")
+            # Recount popularity and recompute the co-application neighbors once per full refresh
+            if self.is_coordinator:
+                rebuild_vaga_popularity(db)
+                rebuild_vaga_neighbors(db)
+                rebuild_cold_start_lists(db)
+                # Backfill the content index before the shards and the similar-vagas lists use it
+                if not has_vaga_terms(db):
+                    rebuild_vaga_terms(db)
+                rebuild_similar_vagas(db)
+                # Counters are maintained by every write; backfill them once
+                self.service.ensure_recommendation_stats(db)
             
-            success_count = 0
-            for user in users:
-                if self.update_user_recommendations(user.id):
-                    success_count += 1
-                time.sleep(2)  # Small delay to avoid overwhelming the database
+            # This instance owns shards instance, instance + instances, ... of instances × processes
+            num_shards = self.instances * self.processes
+            shards = [self.instance + self.instances * i for i in range(self.processes)]
             
-            logger.info(f"🎉 Updated recommendations for {success_count}/{len(users)} users")
+            stats = {"success": 0, "failed": 0}
+            if num_shards == 1:
+                stats = refresh_shard(0, 1)
+            else:
+                with ProcessPoolExecutor(max_workers=self.processes, initializer=_init_shard_process) as pool:
+                    futures = {pool.submit(refresh_shard, shard, num_shards): shard for shard in shards}
+                    for future in as_completed(futures):
+                        try:
+                            shard_stats = future.result()
+                        except Exception as e:
+                            logger.error(f"[shard {futures[future]}/{num_shards}] Failed: {e}")
+                            continue
+                        stats["success"] += shard_stats["success"]
+                        stats["failed"] += shard_stats["failed"]
+            
+            total = stats["success"] + stats["failed"]
+            duration = time.time() - started_at
+            logger.info(f"🎉 Updated recommendations for {stats['success']}/{total} users in {duration:.1f}s")
+            if self.is_coordinator:
+                self.service.record_full_refresh(db, duration)
             
         except Exception as e:
             logger.error(f"Error in batch update: {e}")
@@ -101,40 +201,126 @@ class SimpleRecommendationWorker:
         try:
             cutoff_date = datetime.now() - timedelta(days=30)
             
-            deleted_count = db.query(Recomendacao).filter(
-                Recomendacao.ativa == False,
-                Recomendacao.atualizado_em < cutoff_date
-            ).delete()
+            deleted_count = self.service.store.delete_inactive(db, cutoff_date)
             
             db.commit()
             logger.info(f"🧹 Cleaned up {deleted_count} old recommendations")
             
+            deleted_events = delete_processed_events(db, cutoff_date)
+            logger.info(f"🧹 Cleaned up {deleted_events} processed change events")
+            
+            deleted_jobs = delete_finished_jobs(db, cutoff_date)
+            logger.info(f"🧹 Cleaned up {deleted_jobs} finished recommendation jobs")
+            
         except Exception as e:
             logger.error(f"Error cleaning up recommendations: {e}")
             db.rollback()
         finally:
             db.close()
     
+    def process_jobs(self):
+        """Drain the job queue, highest priority first, one batch of users at a time"""
+        db = SessionLocal()
+        try:
+            while self.running:
+                jobs = claim_pending_jobs(db, BATCH_SIZE)
+                if not jobs:
+                    break
+                
+                job_ids = [job.id for job in jobs]
+                success = self.service.calculate_and_store_recommendations_batch(db, [job.usuario_id for job in jobs])
+                finish_jobs(db, job_ids, success, None if success else "Erro ao calcular recomendações")
+                logger.info(f"📥 Processed {len(jobs)} recommendation jobs ({'ok' if success else 'failed'})")
+        except Exception as e:
+            logger.error(f"Error processing recommendation jobs: {e}")
+            db.rollback()
+        finally:
+            db.close()
+    
+    def requeue_stale_jobs(self):
+        """Queue again the jobs of workers that died while running them"""
+        db = SessionLocal()
+        try:
+            requeued = requeue_stale_jobs(db, datetime.now() - timedelta(seconds=JOB_TIMEOUT_SECONDS))
+            if requeued:
+                logger.warning(f"♻️ Requeued {requeued} stale recommendation jobs")
+        except Exception as e:
+            logger.error(f"Error requeueing stale jobs: {e}")
+            db.rollback()
+        finally:
+            db.close()
+    
+    def ensure_recommendation_stats(self):
+        """Recount the statistics once, if they were never counted in full"""
+        db = SessionLocal()
+        try:
+            self.service.ensure_recommendation_stats(db)
+        except Exception as e:
+            logger.error(f"Error counting recommendation statistics: {e}")
+            db.rollback()
+        finally:
+            db.close()
+    
+    def close_expired_vagas(self):
+        """Close the vagas whose deadline has passed, so they stop being listed and scored"""
+        db = SessionLocal()
+        try:
+            closed_ids = close_expired_vagas(db)
+            if closed_ids:
+                logger.info(f"⏰ Closed {len(closed_ids)} expired vagas")
+                rebuild_cold_start_lists(db)
+        except Exception as e:
+            logger.error(f"Error closing expired vagas: {e}")
+            db.rollback()
+        finally:
+            db.close()
+    
+    def process_changes(self):
+        """Apply pending change events incrementally"""
+        db = SessionLocal()
+        try:
+            stats = self.consumer.process_pending(db)
+            if stats["events"]:
+                logger.info(f"⚡ Processed {stats['events']} change events ({stats['users']} users, {stats['vagas']} vagas)")
+                # Vagas or candidaturas (popularity) changed: re-rank the cold-start lists
+                rebuild_cold_start_lists(db)
+        except Exception as e:
+            logger.error(f"Error processing change events: {e}")
+        finally:
+            db.close()
+    
     def start(self):
         """Start the background worker"""
-        logger.info("🏃‍♂️ Starting Simple Recommendation Worker...")
+        logger.info(f"🏃‍♂️ Starting Simple Recommendation Worker (instance {self.instance + 1}/{self.instances}, {self.processes} processes)...")
         self.running = True
         
-        # Run initial update
-        self.update_all_users()
+        # Writes only adjust the statistics once they were recounted in full, so count before the first job
+        if self.is_coordinator:
+            self.ensure_recommendation_stats()
         
-        # Main loop - update every 2 hours
+        # Main loop - drain queued jobs first, apply change events continuously, full update every 2 hours
         while self.running:
             try:
-                logger.info("💤 Sleeping for 2 hours...")
-                time.sleep(2 * 60 * 60)  # 2 hours
+                self.process_jobs()
                 
-                if self.running:
+                if time.time() - self.last_full_refresh >= FULL_REFRESH_SECONDS:
                     self.update_all_users()
-                    
-                # Cleanup once a day (every 12 cycles)
-                if datetime.now().hour == 3:  # 3 AM
+                    self.last_full_refresh = time.time()
+                elif self.is_coordinator and time.time() - self.last_event_poll >= EVENT_POLL_SECONDS:
+                    self.requeue_stale_jobs()
+                    self.process_changes()
+                    self.last_event_poll = time.time()
+                
+                if self.is_coordinator and time.time() - self.last_expiry_sweep >= EXPIRY_SWEEP_SECONDS:
+                    self.close_expired_vagas()
+                    self.last_expiry_sweep = time.time()
+                
+                # Cleanup once a day, at 3 AM
+                if self.is_coordinator and datetime.now().hour == 3 and self.last_cleanup_date != datetime.now().date():
                     self.cleanup_old_recommendations()
+                    self.last_cleanup_date = datetime.now().date()
+                
+                time.sleep(JOB_POLL_SECONDS)
                     
             except KeyboardInterrupt:
                 logger.info("🛑 Worker stopped by user")
@@ -0,0 +1,17 @@
+from sqlalchemy.orm import Session
+from models.backfill_concluido import BackfillConcluido
+from utils.db_utils import dialect_insert
+from datetime import datetime
+
+def mark_backfill_done(db: Session, nome: str):
+    """
+    Record that the full backfill of a derived table finished.
+    Only added to the transaction, so it is committed together with the backfill.
+    """
+    now = datetime.now()
+    stmt = dialect_insert(db, BackfillConcluido).values(nome=nome, concluido_em=now)
+    stmt = stmt.on_conflict_do_update(index_elements=[BackfillConcluido.nome], set_={"concluido_em": now})
+    db.execute(stmt)
+
+def is_backfill_done(db: Session, nome: str) -> bool:
+    return db.query(BackfillConcluido.nome).filter(BackfillConcluido.nome == nome).first() is not None
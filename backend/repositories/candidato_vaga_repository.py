@@ -2,6 +2,12 @@ from sqlalchemy.orm import Session, joinedload
 from models.candidato_vaga import CandidatoVaga
 from models.user import User
 from sqlalchemy import func
+from repositories.recomendacao_evento_repository import (
+    record_recommendation_change,
+    CANDIDATURA_CREATED,
+    CANDIDATURA_DELETED,
+)
+from repositories.vaga_popularidade_repository import increment_vaga_popularity
 
 def create_candidatura(db: Session, candidato_id: int, vaga_id: int, carta_motivacao: str = None):
     # Check if candidatura already exists
@@ -20,6 +26,8 @@ def create_candidatura(db: Session, candidato_id: int, vaga_id: int, carta_motiv
         carta_motivacao=carta_motivacao
     )
     db.add(candidatura)
+    increment_vaga_popularity(db, vaga_id, 1)
+    record_recommendation_change(db, CANDIDATURA_CREATED, usuario_id=candidato_id, vaga_id=vaga_id)
     db.commit()
     db.refresh(candidatura)
     return candidatura
@@ -41,6 +49,8 @@ def delete_candidatura(db: Session, candidato_id: int, vaga_id: int):
     
     if candidatura:
         db.delete(candidatura)
+        increment_vaga_popularity(db, vaga_id, -1)
+        record_recommendation_change(db, CANDIDATURA_DELETED, usuario_id=candidato_id, vaga_id=vaga_id)
         db.commit()
     return candidatura 
 
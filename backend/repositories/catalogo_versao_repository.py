@@ -0,0 +1,21 @@
+from sqlalchemy.orm import Session
+from models.catalogo_versao import CatalogoVersao, CATALOG_ROW_ID
+from utils.db_utils import dialect_insert
+from datetime import datetime
+
+def bump_catalog_version(db: Session):
+    """
+    Mark the vagas catalog as changed.
+    Only added to the transaction, so it is committed together with the vaga write.
+    """
+    now = datetime.now()
+    stmt = dialect_insert(db, CatalogoVersao).values(id=CATALOG_ROW_ID, versao=1, atualizado_em=now)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CatalogoVersao.id],
+        set_={"versao": CatalogoVersao.versao + 1, "atualizado_em": now}
+    )
+    db.execute(stmt)
+
+def get_catalog_version(db: Session) -> int:
+    versao = db.query(CatalogoVersao.versao).filter(CatalogoVersao.id == CATALOG_ROW_ID).scalar()
+    return versao or 0
@@ -1,6 +1,10 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import func, exists, and_
 from models.historico import Historico
+from models.vaga import Vagas
+from models.candidato_vaga import CandidatoVaga
 from decimal import Decimal  # use Python's built-in Decimal
+from repositories.recomendacao_evento_repository import record_recommendation_change, USER_PROFILE_UPDATED
 
 def create_historico(db: Session, user_id: int, historico_data: list[dict]):
     """
@@ -22,6 +26,7 @@ def create_historico(db: Session, user_id: int, historico_data: list[dict]):
             n_creditos=int(entry[6]),
         )
         db.add(historico)
+    record_recommendation_change(db, USER_PROFILE_UPDATED, usuario_id=user_id)
     db.commit()
 
 def get_historico_by_user(db: Session, user_id: int):
@@ -44,5 +49,35 @@ def delete_historico_by_user(db: Session, user_id: int):
     historico_entries = db.query(Historico).filter(Historico.user_id == user_id).all()
     for entry in historico_entries:
         db.delete(entry)
+    record_recommendation_change(db, USER_PROFILE_UPDATED, usuario_id=user_id)
     db.commit()
-    return historico_entries
\ No newline at end of file
+    return historico_entries
+
+
+def get_monitoria_matches(db: Session, min_grade: float, user_ids: list[int] = None, vaga_ids: list[int] = None):
+    """
+    (user_id, vaga_id, codigo_disciplina, grau) for every active monitoria whose course the student
+    took with at least min_grade (best grade if taken more than once), skipping vagas already applied to.
+    One indexed join on (codigo_disciplina, grau) for all students, or only for user_ids when given.
+    """
+    already_applied = exists().where(and_(
+        CandidatoVaga.candidato_id == Historico.user_id,
+        CandidatoVaga.vaga_id == Vagas.id
+    ))
+    query = db.query(
+        Historico.user_id,
+        Vagas.id.label("vaga_id"),
+        Vagas.codigo_disciplina,
+        func.max(Historico.grau).label("grau")
+    ).join(
+        Vagas, Vagas.codigo_disciplina == Historico.codigo_disciplina
+    ).filter(
+        Vagas.status == "em_andamento",
+        Historico.grau >= min_grade,
+        ~already_applied
+    )
+    if user_ids is not None:
+        query = query.filter(Historico.user_id.in_(user_ids))
+    if vaga_ids is not None:
+        query = query.filter(Vagas.id.in_(vaga_ids))
+    return query.group_by(Historico.user_id, Vagas.id, Vagas.codigo_disciplina).all()
@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 from models.interesse_usuario import InteresseUsuario
 from models.interesse import Interesses
 from models.user import User
+from repositories.recomendacao_evento_repository import record_recommendation_change, USER_INTERESTS_UPDATED
 
 def create_interesse(db: Session, nome: str):
     # Check if interest with this name already exists
@@ -64,6 +65,7 @@ def add_user_interests(db: Session, usuario_id: int, interesses: list[str]):
             )
             db.add(user_interest)
     
+    record_recommendation_change(db, USER_INTERESTS_UPDATED, usuario_id=usuario_id)
     db.commit()
 
 def update_user_interests(db: Session, usuario_id: int, interesses: list[str]):
@@ -89,4 +91,5 @@ def update_user_interests(db: Session, usuario_id: int, interesses: list[str]):
         )
         db.add(user_interest)
     
+    record_recommendation_change(db, USER_INTERESTS_UPDATED, usuario_id=usuario_id)
     db.commit()
@@ -0,0 +1,41 @@
+from sqlalchemy import case
+from sqlalchemy.orm import Session
+from models.recomendacao_estrategia_stats import RecomendacaoEstrategiaStats
+from utils.db_utils import dialect_insert
+from datetime import datetime
+
+def add_strategy_stats(db: Session, deltas: list[dict]):
+    """
+    Add run counters to the cumulative statistics of each strategy and store its breaker state.
+    deltas: [{'estrategia', 'execucoes', 'erros', 'timeouts', 'ignoradas', 'tempo_total', 'tempo_maximo',
+              'consultas', 'estado', 'aberto_ate', 'ultimo_erro'}]
+    Only added to the transaction, the caller commits.
+    """
+    if not deltas:
+        return
+    now = datetime.now()
+    table = RecomendacaoEstrategiaStats
+    stmt = dialect_insert(db, table)
+    excluded = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.estrategia],
+        set_={
+            "execucoes": table.execucoes + excluded.execucoes,
+            "erros": table.erros + excluded.erros,
+            "timeouts": table.timeouts + excluded.timeouts,
+            "ignoradas": table.ignoradas + excluded.ignoradas,
+            "tempo_total": table.tempo_total + excluded.tempo_total,
+            "tempo_maximo": case(
+                (excluded.tempo_maximo > table.tempo_maximo, excluded.tempo_maximo), else_=table.tempo_maximo
+            ),
+            "consultas": table.consultas + excluded.consultas,
+            "estado": excluded.estado,
+            "aberto_ate": excluded.aberto_ate,
+            "ultimo_erro": case((excluded.ultimo_erro.is_(None), table.ultimo_erro), else_=excluded.ultimo_erro),
+            "atualizado_em": now,
+        }
+    )
+    db.execute(stmt, [{**delta, "atualizado_em": now} for delta in deltas])
+
+def get_strategy_stats(db: Session) -> list[RecomendacaoEstrategiaStats]:
+    return db.query(RecomendacaoEstrategiaStats).order_by(RecomendacaoEstrategiaStats.estrategia).all()
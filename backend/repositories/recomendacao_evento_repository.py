@@ -0,0 +1,43 @@
+from sqlalchemy.orm import Session
+from models.recomendacao_evento import RecomendacaoEvento
+from datetime import datetime
+
+# Event types
+USER_INTERESTS_UPDATED = "interesses_usuario"
+USER_PROFILE_UPDATED = "perfil_usuario"  # sobre or historico, used by the content similarity strategy
+CANDIDATURA_CREATED = "candidatura_criada"
+CANDIDATURA_DELETED = "candidatura_removida"
+VAGA_CREATED = "vaga_criada"
+VAGA_UPDATED = "vaga_atualizada"
+VAGA_STATUS_UPDATED = "vaga_status"
+
+USER_EVENTS = (USER_INTERESTS_UPDATED, USER_PROFILE_UPDATED, CANDIDATURA_CREATED, CANDIDATURA_DELETED)
+VAGA_EVENTS = (VAGA_CREATED, VAGA_UPDATED, VAGA_STATUS_UPDATED)
+
+def record_recommendation_change(db: Session, tipo: str, usuario_id: int = None, vaga_id: int = None):
+    """
+    Record a recommendation-relevant change.
+    The event is only added to the session, so it is committed together with the write that caused it.
+    """
+    db.add(RecomendacaoEvento(tipo=tipo, usuario_id=usuario_id, vaga_id=vaga_id))
+
+def get_pending_events(db: Session, limit: int = 1000):
+    return db.query(RecomendacaoEvento).filter(
+        RecomendacaoEvento.processado == False
+    ).order_by(RecomendacaoEvento.id).limit(limit).all()
+
+def mark_events_processed(db: Session, event_ids: list[int]):
+    if not event_ids:
+        return
+    db.query(RecomendacaoEvento).filter(RecomendacaoEvento.id.in_(event_ids)).update(
+        {"processado": True, "processado_em": datetime.now()}, synchronize_session=False
+    )
+    db.commit()
+
+def delete_processed_events(db: Session, older_than: datetime):
+    deleted_count = db.query(RecomendacaoEvento).filter(
+        RecomendacaoEvento.processado == True,
+        RecomendacaoEvento.processado_em < older_than
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted_count
@@ -0,0 +1,56 @@
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import insert
+from models.recomendacao_inicial import RecomendacaoInicial, GLOBAL_LIST
+from models.interesse_vaga import InteresseVaga
+from models.vaga import Vagas
+from repositories.vaga_popularidade_repository import get_active_vaga_popularity
+
+# Vagas kept per list
+COLD_START_LIST_SIZE = 50
+
+def rebuild_cold_start_lists(db: Session, list_size: int = COLD_START_LIST_SIZE):
+    """
+    Rank the active vagas of every interest, and of the whole catalog, by popularity (newest first on ties)
+    Cheap enough to run whenever vagas or candidaturas change: three queries over the active catalog.
+    """
+    popularity = get_active_vaga_popularity(db)
+    max_candidates = max(popularity.values(), default=0)
+    active_ids = [row.id for row in db.query(Vagas.id).filter(Vagas.status == "em_andamento").all()]
+    
+    lists = {GLOBAL_LIST: active_ids}
+    for row in db.query(InteresseVaga.interesse_id, InteresseVaga.vaga_id).join(
+        Vagas, Vagas.id == InteresseVaga.vaga_id
+    ).filter(Vagas.status == "em_andamento").distinct().all():
+        lists.setdefault(row.interesse_id, []).append(row.vaga_id)
+    
+    rows = []
+    for interesse_id, vaga_ids in lists.items():
+        ranked = sorted(vaga_ids, key=lambda vaga_id: (-popularity.get(vaga_id, 0), -vaga_id))[:list_size]
+        rows.extend(
+            {
+                "interesse_id": interesse_id,
+                "vaga_id": vaga_id,
+                "score": popularity.get(vaga_id, 0) / max_candidates if max_candidates else 0.0,
+                "candidatos": popularity.get(vaga_id, 0),
+            }
+            for vaga_id in ranked
+        )
+    
+    db.query(RecomendacaoInicial).delete(synchronize_session=False)
+    if rows:
+        db.execute(insert(RecomendacaoInicial), rows)
+    db.commit()
+
+def get_cold_start_entries(db: Session, interesse_ids: list[int]) -> list:
+    """(RecomendacaoInicial, Vagas) of the lists of these interests plus the global list, active vagas only"""
+    return db.query(RecomendacaoInicial, Vagas).join(
+        Vagas, Vagas.id == RecomendacaoInicial.vaga_id
+    ).options(
+        joinedload(Vagas.autor),
+        joinedload(Vagas.tipo),
+        joinedload(Vagas.department),
+        joinedload(Vagas.location)
+    ).filter(
+        RecomendacaoInicial.interesse_id.in_([GLOBAL_LIST, *interesse_ids]),
+        Vagas.status == "em_andamento"
+    ).all()
@@ -0,0 +1,117 @@
+from sqlalchemy import case, func, text
+from sqlalchemy.orm import Session
+from models.recomendacao_job import RecomendacaoJob
+from utils.db_utils import dialect_insert
+from datetime import datetime
+from typing import Optional
+
+# Job status
+JOB_PENDING = "pendente"
+JOB_RUNNING = "processando"
+JOB_DONE = "concluido"
+JOB_FAILED = "falhou"
+
+# Reasons and their priorities: first-time users and explicit refreshes go ahead of sweeps
+FIRST_TIME = "primeiro_acesso"
+MANUAL_REFRESH = "atualizacao_manual"
+SWEEP = "varredura"
+
+JOB_PRIORITIES = {
+    FIRST_TIME: 20,
+    MANUAL_REFRESH: 10,
+    SWEEP: 0,
+}
+
+def enqueue_recommendation_jobs(db: Session, usuario_ids: list[int], motivo: str):
+    """
+    Enqueue a recommendation calculation for each user.
+    A user with a pending job keeps it; its priority is only raised if the new one is higher.
+    """
+    if not usuario_ids:
+        return
+    prioridade = JOB_PRIORITIES[motivo]
+    usuario_ids = list(dict.fromkeys(usuario_ids))  # A single statement must not touch the same row twice
+    now = datetime.now()
+    stmt = dialect_insert(db, RecomendacaoJob)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[RecomendacaoJob.usuario_id],
+        index_where=text(f"status = '{JOB_PENDING}'"),  # Same predicate as the partial unique index
+        set_={
+            "prioridade": case(
+                (stmt.excluded.prioridade > RecomendacaoJob.prioridade, stmt.excluded.prioridade),
+                else_=RecomendacaoJob.prioridade
+            ),
+            "motivo": case(
+                (stmt.excluded.prioridade > RecomendacaoJob.prioridade, stmt.excluded.motivo),
+                else_=RecomendacaoJob.motivo
+            ),
+        }
+    )
+    db.execute(stmt, [
+        {"usuario_id": usuario_id, "prioridade": prioridade, "motivo": motivo, "status": JOB_PENDING, "criado_em": now}
+        for usuario_id in usuario_ids
+    ])
+    db.commit()
+
+def get_latest_job(db: Session, usuario_id: int) -> Optional[RecomendacaoJob]:
+    return db.query(RecomendacaoJob).filter(
+        RecomendacaoJob.usuario_id == usuario_id
+    ).order_by(RecomendacaoJob.id.desc()).first()
+
+def get_queue_position(db: Session, job: RecomendacaoJob) -> int:
+    """1-based position of a pending job in the claim order"""
+    ahead = db.query(func.count(RecomendacaoJob.id)).filter(
+        RecomendacaoJob.status == JOB_PENDING,
+        (RecomendacaoJob.prioridade > job.prioridade)
+        | ((RecomendacaoJob.prioridade == job.prioridade) & (RecomendacaoJob.id < job.id))
+    ).scalar()
+    return ahead + 1
+
+def claim_pending_jobs(db: Session, limit: int) -> list[RecomendacaoJob]:
+    """
+    Mark the next pending jobs (highest priority first) as running and return them.
+    On PostgreSQL, rows locked by another worker are skipped, so several workers can drain the queue.
+    """
+    jobs = db.query(RecomendacaoJob).filter(
+        RecomendacaoJob.status == JOB_PENDING
+    ).order_by(
+        RecomendacaoJob.prioridade.desc(), RecomendacaoJob.id
+    ).limit(limit).with_for_update(skip_locked=True).all()
+    
+    now = datetime.now()
+    for job in jobs:
+        job.status = JOB_RUNNING
+        job.iniciado_em = now
+    db.commit()
+    return jobs
+
+def finish_jobs(db: Session, job_ids: list[int], success: bool, erro: str = None):
+    if not job_ids:
+        return
+    db.query(RecomendacaoJob).filter(RecomendacaoJob.id.in_(job_ids)).update(
+        {"status": JOB_DONE if success else JOB_FAILED, "erro": erro, "concluido_em": datetime.now()},
+        synchronize_session=False
+    )
+    db.commit()
+
+def requeue_stale_jobs(db: Session, started_before: datetime) -> int:
+    """Jobs left running by a worker that died are marked failed and their users enqueued again"""
+    stale = db.query(RecomendacaoJob).filter(
+        RecomendacaoJob.status == JOB_RUNNING,
+        RecomendacaoJob.iniciado_em < started_before
+    ).all()
+    if not stale:
+        return 0
+    
+    finish_jobs(db, [job.id for job in stale], success=False, erro="Tempo de processamento esgotado")
+    for motivo in {job.motivo for job in stale}:
+        enqueue_recommendation_jobs(db, [job.usuario_id for job in stale if job.motivo == motivo], motivo)
+    return len(stale)
+
+def delete_finished_jobs(db: Session, older_than: datetime):
+    deleted_count = db.query(RecomendacaoJob).filter(
+        RecomendacaoJob.status.in_([JOB_DONE, JOB_FAILED]),
+        RecomendacaoJob.concluido_em < older_than
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted_count
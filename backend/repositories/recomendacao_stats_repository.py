@@ -0,0 +1,93 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import insert
+from collections import Counter
+from models.recomendacao_stats import RecomendacaoStats, RecomendacaoUsuarioStats
+from repositories.backfill_concluido_repository import mark_backfill_done, is_backfill_done
+from utils.db_utils import dialect_insert
+from datetime import datetime
+
+ACTIVE = "ativas"
+USERS = "usuarios"
+STRATEGY_PREFIX = "estrategia:"
+DAY_PREFIX = "dia:"
+FULL_REFRESH_SECONDS = "atualizacao_completa_segundos"
+
+# Marker of the full recount: counters created by deltas alone only cover the users written since deploy
+STATS_BACKFILL = "recomendacao_stats"
+
+def apply_user_stats(db: Session, counts: dict[int, dict]):
+    """
+    Store the new counts of these users and add the difference to the global counters.
+    counts: {usuario_id: {'ativas': n, 'estrategias': {name: n}, 'dias': {'YYYY-MM-DD': n}}}
+    Only added to the transaction, so it is committed together with the recommendation write.
+    Nothing is applied before the first full recount, which counts these users anyway.
+    """
+    if not counts or not is_backfill_done(db, STATS_BACKFILL):
+        return
+    previous = {
+        row.usuario_id: row
+        for row in db.query(RecomendacaoUsuarioStats).filter(RecomendacaoUsuarioStats.usuario_id.in_(list(counts))).all()
+    }
+    
+    deltas = Counter()
+    for usuario_id, new in counts.items():
+        old = previous.get(usuario_id)
+        old_active = old.ativas if old else 0
+        deltas[ACTIVE] += new["ativas"] - old_active
+        deltas[USERS] += (new["ativas"] > 0) - (old_active > 0)
+        for prefix, field in ((STRATEGY_PREFIX, "estrategias"), (DAY_PREFIX, "dias")):
+            for key, value in new[field].items():
+                deltas[prefix + key] += value
+            for key, value in (getattr(old, field) if old else {}).items():
+                deltas[prefix + key] -= value
+    
+    db.query(RecomendacaoUsuarioStats).filter(
+        RecomendacaoUsuarioStats.usuario_id.in_(list(counts))
+    ).delete(synchronize_session=False)
+    rows = [{"usuario_id": usuario_id, **new} for usuario_id, new in counts.items() if new["ativas"]]
+    if rows:
+        db.execute(insert(RecomendacaoUsuarioStats), rows)
+    
+    _add_to_counters(db, {key: delta for key, delta in deltas.items() if delta})
+
+def _add_to_counters(db: Session, deltas: dict[str, float]):
+    if not deltas:
+        return
+    now = datetime.now()
+    stmt = dialect_insert(db, RecomendacaoStats)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[RecomendacaoStats.chave],
+        set_={"valor": RecomendacaoStats.valor + stmt.excluded.valor, "atualizado_em": now}
+    )
+    db.execute(stmt, [{"chave": key, "valor": delta, "atualizado_em": now} for key, delta in sorted(deltas.items())])
+    # Days without active recommendations left are not worth keeping
+    db.query(RecomendacaoStats).filter(
+        RecomendacaoStats.chave.startswith(DAY_PREFIX),
+        RecomendacaoStats.valor <= 0
+    ).delete(synchronize_session=False)
+
+def set_recommendation_stat(db: Session, chave: str, valor: float):
+    """Overwrite a single counter (e.g. the last full refresh duration); the caller commits"""
+    now = datetime.now()
+    stmt = dialect_insert(db, RecomendacaoStats).values(chave=chave, valor=valor, atualizado_em=now)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[RecomendacaoStats.chave],
+        set_={"valor": valor, "atualizado_em": now}
+    )
+    db.execute(stmt)
+
+def get_recommendation_counters(db: Session) -> list[RecomendacaoStats]:
+    return db.query(RecomendacaoStats).all()
+
+def has_recommendation_stats(db: Session) -> bool:
+    """Whether the counters were recounted in full at least once (counters created by deltas do not count)"""
+    return is_backfill_done(db, STATS_BACKFILL)
+
+def mark_recommendation_stats_complete(db: Session):
+    """Only added to the transaction, so it is committed together with the recount"""
+    mark_backfill_done(db, STATS_BACKFILL)
+
+def clear_recommendation_stats(db: Session):
+    """Drop the counters (not the full refresh duration) before a recount"""
+    db.query(RecomendacaoUsuarioStats).delete(synchronize_session=False)
+    db.query(RecomendacaoStats).filter(RecomendacaoStats.chave != FULL_REFRESH_SECONDS).delete(synchronize_session=False)
@@ -0,0 +1,24 @@
+from sqlalchemy.orm import Session
+from models.recomendacao_versao import RecomendacaoVersao
+from utils.db_utils import dialect_insert
+from datetime import datetime
+
+def bump_recommendation_versions(db: Session, usuario_ids):
+    """
+    Mark the stored recommendations of these users as rewritten.
+    Only added to the transaction, so it is committed together with the rewrite.
+    """
+    usuario_ids = sorted(set(usuario_ids))
+    if not usuario_ids:
+        return
+    now = datetime.now()
+    stmt = dialect_insert(db, RecomendacaoVersao)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[RecomendacaoVersao.usuario_id],
+        set_={"versao": RecomendacaoVersao.versao + 1, "atualizado_em": now}
+    )
+    db.execute(stmt, [{"usuario_id": usuario_id, "versao": 1, "atualizado_em": now} for usuario_id in usuario_ids])
+
+def get_recommendation_version(db: Session, usuario_id: int) -> int:
+    versao = db.query(RecomendacaoVersao.versao).filter(RecomendacaoVersao.usuario_id == usuario_id).scalar()
+    return versao or 0
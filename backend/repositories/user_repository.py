@@ -1,8 +1,11 @@
 from sqlalchemy.orm import Session, joinedload
 from models.user import User
 from models.interesse_usuario import InteresseUsuario
+from models.vaga import Vagas
 from passlib.context import CryptContext
 from datetime import datetime
+from repositories.recomendacao_evento_repository import record_recommendation_change, USER_PROFILE_UPDATED
+from repositories.catalogo_versao_repository import bump_catalog_version
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -57,14 +60,32 @@ def get_users(db: Session, skip: int = 0, limit: int = 100):
 def update_user(db: Session, user_id: int, usuario: str, ehaluno: bool, sobre: str = None):
     db_user = get_user(db, user_id)
     if db_user:
+        if db_user.usuario != usuario:
+            _bump_catalog_if_author(db, user_id)
         db_user.usuario = usuario
         db_user.ehaluno = ehaluno
         if sobre is not None:
             db_user.sobre = sobre
+            record_recommendation_change(db, USER_PROFILE_UPDATED, usuario_id=user_id)
         db.commit()
         db.refresh(db_user)
     return db_user
 
+def update_user_avatar(db: Session, user_id: int, avatar: str = None):
+    db_user = get_user(db, user_id)
+    if db_user:
+        if db_user.avatar != avatar:
+            _bump_catalog_if_author(db, user_id)
+        db_user.avatar = avatar
+        db.commit()
+        db.refresh(db_user)
+    return db_user
+
+def _bump_catalog_if_author(db: Session, user_id: int):
+    """The cached vaga cards carry the author's usuario and avatar, so changing them changes the catalog"""
+    if db.query(Vagas.id).filter(Vagas.autor_id == user_id).first() is not None:
+        bump_catalog_version(db)
+
 def delete_user(db: Session, user_id: int):
     db_user = get_user(db, user_id)
     if db_user:
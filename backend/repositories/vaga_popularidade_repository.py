@@ -0,0 +1,62 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, insert, select, literal
+from models.vaga_popularidade import VagaPopularidade
+from models.candidato_vaga import CandidatoVaga
+from models.vaga import Vagas
+from repositories.backfill_concluido_repository import mark_backfill_done, is_backfill_done
+from utils.db_utils import dialect_insert
+from datetime import datetime
+
+# Marker of the full recount: the increments alone only cover vagas applied to since deploy
+POPULARITY_BACKFILL = "vaga_popularidade"
+
+def increment_vaga_popularity(db: Session, vaga_id: int, delta: int):
+    """
+    Atomically add delta to the candidate count of a vaga.
+    Must be called after the candidatura change was added to the session; it is committed with it.
+    """
+    now = datetime.now()
+    updated = db.query(VagaPopularidade).filter(VagaPopularidade.vaga_id == vaga_id).update(
+        {"candidatos": VagaPopularidade.candidatos + delta, "atualizado_em": now},
+        synchronize_session=False
+    )
+    if updated:
+        return
+    
+    # First change seen for this vaga: start from the real count
+    db.flush()
+    count = db.query(func.count(CandidatoVaga.id)).filter(CandidatoVaga.vaga_id == vaga_id).scalar()
+    stmt = dialect_insert(db, VagaPopularidade).values(vaga_id=vaga_id, candidatos=count, atualizado_em=now)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[VagaPopularidade.vaga_id],
+        set_={"candidatos": count, "atualizado_em": now}
+    )
+    db.execute(stmt)
+
+def get_active_vaga_popularity(db: Session) -> dict[int, int]:
+    """Snapshot of {vaga_id: candidate count} for the active vagas with at least one candidate"""
+    rows = db.query(VagaPopularidade.vaga_id, VagaPopularidade.candidatos).join(
+        Vagas, Vagas.id == VagaPopularidade.vaga_id
+    ).filter(
+        Vagas.status == "em_andamento",
+        VagaPopularidade.candidatos > 0
+    ).all()
+    return {row.vaga_id: row.candidatos for row in rows}
+
+def has_vaga_popularity(db: Session) -> bool:
+    """Whether every vaga was counted at least once (rows created by increments alone do not count)"""
+    return is_backfill_done(db, POPULARITY_BACKFILL)
+
+def rebuild_vaga_popularity(db: Session):
+    """Recount every vaga from candidato_vaga (backfill and drift correction)"""
+    now = datetime.now()
+    db.query(VagaPopularidade).delete(synchronize_session=False)
+    db.execute(
+        insert(VagaPopularidade).from_select(
+            ["vaga_id", "candidatos", "atualizado_em"],
+            select(CandidatoVaga.vaga_id, func.count(CandidatoVaga.id), literal(now, VagaPopularidade.atualizado_em.type))
+            .group_by(CandidatoVaga.vaga_id)
+        )
+    )
+    mark_backfill_done(db, POPULARITY_BACKFILL)
+    db.commit()
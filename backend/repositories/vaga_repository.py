@@ -2,11 +2,28 @@ from sqlalchemy.orm import Session
 from models.vaga import Vagas
 from sqlalchemy.orm import joinedload
 from models.interesse_vaga import InteresseVaga
-from sqlalchemy import func
+from models.interesse import Interesses
+from models.user import User
+from models.tipo_vaga import Tipo
+from models.departamento import Departamento
+from models.localizacao import Location
+from sqlalchemy import func, update, tuple_, literal
+from datetime import date
 from models.candidato_vaga import CandidatoVaga
-from models.recomendacao import Recomendacao
-from functools import lru_cache
-from models.base import SessionLocal
+from services.recommendation_service import get_recommendation_service
+from repositories.recomendacao_evento_repository import (
+    record_recommendation_change,
+    VAGA_CREATED,
+    VAGA_UPDATED,
+    VAGA_STATUS_UPDATED,
+)
+from repositories.vaga_termo_repository import index_vaga_terms, remove_vaga_terms
+from repositories.vaga_similar_repository import remove_similar_vaga
+from repositories.catalogo_versao_repository import bump_catalog_version, get_catalog_version
+from utils.text_utils import parse_course_code
+from services.vaga_search import apply_search
+from services.cache_service import VersionedCache
+from utils.pagination import encode_cursor, decode_cursor
 
 
 
@@ -16,7 +33,7 @@ def create_vaga(db: Session, titulo: str, descricao: str, prazo: str, autor_id:
     if has_already:
         print(f"Vaga with title '{titulo}' already exists for author ID {autor_id}.")
         return has_already
-    vaga = Vagas(titulo=titulo, descricao=descricao, prazo=prazo, autor_id=autor_id, location_id=location_id, department_id=department_id, remuneracao=remuneracao, horas_complementares=horas_complementares, desconto=desconto, tipo_id=tipo_id, link_vaga=link_vaga, professor=professor)
+    vaga = Vagas(titulo=titulo, descricao=descricao, prazo=prazo, autor_id=autor_id, location_id=location_id, department_id=department_id, remuneracao=remuneracao, horas_complementares=horas_complementares, desconto=desconto, tipo_id=tipo_id, link_vaga=link_vaga, professor=professor, codigo_disciplina=parse_course_code(titulo))
     db.add(vaga)
     db.commit()
     db.refresh(vaga)
@@ -25,6 +42,9 @@ def create_vaga(db: Session, titulo: str, descricao: str, prazo: str, autor_id:
     for interesse_id in interesses:
         interesse_vaga = InteresseVaga(interesse_id=interesse_id, vaga_id=vaga.id)
         db.add(interesse_vaga)
+    index_vaga_terms(db, vaga.id, vaga.titulo, vaga.descricao)
+    record_recommendation_change(db, VAGA_CREATED, vaga_id=vaga.id)
+    bump_catalog_version(db)
     db.commit()
 
     return vaga
@@ -38,29 +58,154 @@ def get_vaga(db: Session, vaga_id: int):
         joinedload(Vagas.interesses).joinedload(InteresseVaga.interesse)
     ).filter(Vagas.id == vaga_id).first()
 
-@lru_cache(maxsize=128)
-def get_vagas_cached(skip: int = 0, limit: int = 20):
-    db = SessionLocal()
-    print("Skip: ", skip)
-    print("Limit: ", limit)
-    try:
-        # First get total count for pagination info
-        total = db.query(Vagas).count()
-        
-        # Then get paginated results with all needed relationships
-        result = db.query(Vagas).options(
-            joinedload(Vagas.autor),
-            joinedload(Vagas.tipo),
-            joinedload(Vagas.department),
-            joinedload(Vagas.interesses).joinedload(InteresseVaga.interesse)
-        ).order_by(Vagas.criado_em.desc()).offset(skip).limit(limit).all()
-        
-        return result
-    finally:
-        db.close()
+# Characters of descricao shown on the listing cards
+DESCRIPTION_SNIPPET_LENGTH = 200
+
+# Listing cache: totals, shared pages and cards, each valid for the catalog version it was stored with.
+# Every vaga write bumps the version, so the entries of every process are invalidated together.
+_listing_cache = VersionedCache(maxsize=2048)
+
+def _cached(key, version: int, compute):
+    value = _listing_cache.get(key, version)
+    if value is None:
+        value = compute()
+        _listing_cache.set(key, version, value)
+    return value
+
+def _keyset_page(query, sort_keys: list, cursor_values: list = None, skip: int = 0, limit: int = 20):
+    """
+    Up to limit (id, sort key values) rows in descending sort_keys order, and whether more rows follow
+    The cursor condition is a row-value comparison, served by the (status, criado_em, id) index
+    """
+    query = query.add_columns(*sort_keys).order_by(*[key.desc() for key in sort_keys])
+    if cursor_values is not None:
+        if cursor_values and len(cursor_values) != len(sort_keys):
+            raise ValueError("Invalid cursor")
+        if cursor_values:
+            query = query.filter(tuple_(*sort_keys) < tuple_(*[literal(value) for value in cursor_values]))
+    elif skip:
+        query = query.offset(skip)
+    
+    rows = query.limit(max(limit, 0) + 1).all()
+    page = [(row[0], tuple(row[1:])) for row in rows[:max(limit, 0)]]
+    return page, len(rows) > len(page)
+
+def _description_snippet(descricao: str) -> str:
+    """Description cut at a word boundary for the listing cards"""
+    if not descricao or len(descricao) <= DESCRIPTION_SNIPPET_LENGTH:
+        return descricao
+    snippet = descricao[:DESCRIPTION_SNIPPET_LENGTH]
+    if " " in snippet:
+        snippet = snippet[:snippet.rindex(" ")]
+    return snippet.rstrip(" ,.;:") + "..."
+
+def _get_vaga_cards(db: Session, vaga_ids: list, version: int) -> dict:
+    """{vaga_id: card dict}, loading only the cards not cached for this catalog version"""
+    cards = {}
+    for vaga_id in vaga_ids:
+        card = _listing_cache.get(("card", vaga_id), version)
+        if card is not None:
+            cards[vaga_id] = card
+    
+    missing = [vaga_id for vaga_id in vaga_ids if vaga_id not in cards]
+    for vaga_id, card in _load_vaga_cards(db, missing).items():
+        _listing_cache.set(("card", vaga_id), version, card)
+        cards[vaga_id] = card
+    return cards
+
+def _load_vaga_cards(db: Session, vaga_ids: list) -> dict:
+    """
+    {vaga_id: card dict} with only the fields the listing shows and a description snippet
+    One flat query over the many-to-one relations plus one batched query for the interesses,
+    instead of eager loading full records (the full vaga is served by get_vaga)
+    """
+    if not vaga_ids:
+        return {}
+    
+    rows = db.query(
+        Vagas.id,
+        Vagas.titulo,
+        func.substr(Vagas.descricao, 1, DESCRIPTION_SNIPPET_LENGTH + 1).label("descricao"),
+        Vagas.prazo,
+        Vagas.status,
+        Vagas.criado_em,
+        Vagas.remuneracao,
+        Vagas.horas_complementares,
+        Vagas.desconto,
+        Vagas.link_vaga,
+        Vagas.professor,
+        User.id.label("autor_id"),
+        User.usuario.label("autor_usuario"),
+        User.email.label("autor_email"),
+        User.avatar.label("autor_avatar"),
+        Tipo.id.label("tipo_id"),
+        Tipo.nome.label("tipo_nome"),
+        Departamento.id.label("department_id"),
+        Departamento.name.label("department_name"),
+        Departamento.sigla.label("department_sigla"),
+        Location.id.label("location_id"),
+        Location.name.label("location_name"),
+    ).outerjoin(User, User.id == Vagas.autor_id
+    ).outerjoin(Tipo, Tipo.id == Vagas.tipo_id
+    ).outerjoin(Departamento, Departamento.id == Vagas.department_id
+    ).outerjoin(Location, Location.id == Vagas.location_id
+    ).filter(Vagas.id.in_(vaga_ids)).all()
+    
+    interesses = {}
+    for row in db.query(InteresseVaga.vaga_id, Interesses.id, Interesses.nome).join(
+        Interesses, Interesses.id == InteresseVaga.interesse_id
+    ).filter(InteresseVaga.vaga_id.in_(vaga_ids)).all():
+        interesses.setdefault(row.vaga_id, []).append({"interesse": {"id": row.id, "nome": row.nome}})
+    
+    return {
+        row.id: {
+            "id": row.id,
+            "titulo": row.titulo,
+            "descricao": _description_snippet(row.descricao),
+            "prazo": row.prazo.isoformat() if row.prazo else None,
+            "status": row.status,
+            "criado_em": row.criado_em.isoformat() if row.criado_em else None,
+            "remuneracao": row.remuneracao,
+            "horas_complementares": row.horas_complementares,
+            "desconto": row.desconto,
+            "link_vaga": row.link_vaga,
+            "professor": row.professor,
+            "autor": {
+                "id": row.autor_id,
+                "nome": row.autor_usuario,  # Use usuario field
+                "usuario": row.autor_usuario,
+                "email": row.autor_email,
+                "avatar": row.autor_avatar
+            } if row.autor_id else None,
+            "tipo": {
+                "id": row.tipo_id,
+                "nome": row.tipo_nome
+            } if row.tipo_id else None,
+            "department": {
+                "id": row.department_id,
+                "name": row.department_name,
+                "sigla": row.department_sigla
+            } if row.department_id else None,
+            "location": {
+                "id": row.location_id,
+                "name": row.location_name
+            } if row.location_id else None,
+            "interesses": interesses.get(row.id, []),
+        }
+        for row in rows
+    }
 
 def get_vagas(db: Session, skip: int = 0, limit: int = 20, user_id: int = None, 
-              tipo_ids: list = None, departamento: str = None, beneficios: list = None, busca: str = None):
+              tipo_ids: list = None, departamento: str = None, beneficios: list = None, busca: str = None,
+              cursor: str = None, include_total: bool = True):
+    """
+    Listing page ordered by creation date (or by relevance when searching)
+    Pages are read by keyset: the opaque next_cursor of a page continues right after its last row, so
+    deep pages cost the same as the first one; skip is kept for older clients and ignored with a cursor.
+    Pages are cached per catalog version and shared by all users, with each user's recommended vagas
+    merged on top. Raises ValueError for a malformed cursor.
+    """
+    cursor_values = decode_cursor(cursor) if cursor else None
     
     # Build base query with filters
     base_query = db.query(Vagas).filter(Vagas.status == "em_andamento")
@@ -70,15 +215,12 @@ def get_vagas(db: Session, skip: int = 0, limit: int = 20, user_id: int = None,
         base_query = base_query.filter(Vagas.tipo_id.in_(tipo_ids))
     
     if departamento and departamento != "Todos os Departamentos":
-        from models.departamento import Departamento
         base_query = base_query.join(Departamento).filter(Departamento.name == departamento)
     
+    relevance = None
     if busca:
-        search_term = f"%{busca.lower()}%"
-        base_query = base_query.filter(
-            (Vagas.titulo.ilike(search_term)) | 
-            (Vagas.descricao.ilike(search_term))
-        )
+        # Full-text search index, ranked by relevance
+        base_query, relevance = apply_search(db, base_query, busca)
     
     if beneficios:
         # Filter by benefits - this is more complex as benefits are stored as separate columns
@@ -90,182 +232,93 @@ def get_vagas(db: Session, skip: int = 0, limit: int = 20, user_id: int = None,
             elif beneficio == "horas_complementares":
                 base_query = base_query.filter(Vagas.horas_complementares > 0)
     
-    # Get total count with filters applied
-    total = base_query.count()
+    # Totals, pages and cards are shared by every user until the catalog changes
+    version = get_catalog_version(db)
+    filters_key = (tuple(tipo_ids or ()), departamento, tuple(beneficios or ()), busca)
+    total = _cached(("total", filters_key), version, base_query.count) if include_total else None
     
-    recommended_vagas = []
-    regular_vagas = []
+    service = get_recommendation_service()
+    recommended_ids = []
     recommendations_data = {}
     
     # When filters are applied, skip recommendations and get filtered results directly
-    if tipo_ids or departamento or beneficios or busca:
-        # Apply filters directly - no recommendations when filtering
-        filtered_query = base_query.options(
-            joinedload(Vagas.autor),
-            joinedload(Vagas.tipo),
-            joinedload(Vagas.department),
-            joinedload(Vagas.location),
-            joinedload(Vagas.interesses).joinedload(InteresseVaga.interesse)
-        )
+    cached_ids = []
+    if user_id and not (tipo_ids or departamento or beneficios or busca):
+        # Get PRE-COMPUTED recommendations from database (FAST!), whatever the storage layout;
+        # every strategy explanation of the page comes with this single read
+        cached_recommendations = service.store.get_user_recommendations(db, user_id, 5)
         
-        regular_vagas = filtered_query.order_by(Vagas.criado_em.desc()).offset(skip).limit(limit).all()
+        # Get vaga IDs from cached recommendations
+        cached_ids = [rec['vaga_id'] for rec in cached_recommendations]
         
-    else:
-        # No filters applied - use recommendations
-        if user_id:
-            from models.recomendacao import Recomendacao
-            
-            # Get PRE-COMPUTED recommendations from database (FAST!)
-            cached_recommendations = db.query(Recomendacao).filter(
-                Recomendacao.usuario_id == user_id,
-                Recomendacao.estrategia == "combined",  # Get combined recommendations
-                Recomendacao.ativa == True
-            ).order_by(Recomendacao.score.desc()).limit(5).all()
-            
-            if cached_recommendations:
-                # Get vaga IDs from cached recommendations
-                recommended_vaga_ids = [rec.vaga_id for rec in cached_recommendations]
-                
-                # Store cached recommendation data
-                for rec in cached_recommendations:
-                    recommendations_data[rec.vaga_id] = {
-                        'score': rec.score,
-                        'explanation': rec.explicacao
-                    }
-                
-                # Fetch the actual recommended vagas
-                recommended_vagas = db.query(Vagas).options(
-                    joinedload(Vagas.autor),
-                    joinedload(Vagas.tipo),
-                    joinedload(Vagas.department),
-                    joinedload(Vagas.location),
-                    joinedload(Vagas.interesses).joinedload(InteresseVaga.interesse)
-                ).filter(
-                    Vagas.id.in_(recommended_vaga_ids),
-                    Vagas.status == "em_andamento"
-                ).all()
-                
-                # Sort by recommendation score (from cache)
-                recommended_vagas.sort(
-                    key=lambda v: recommendations_data.get(v.id, {}).get('score', 0),
-                    reverse=True
-                )
-                
-                # Get remaining regular vagas
-                remaining_limit = limit - len(recommended_vagas)
-                if remaining_limit > 0:
-                    regular_vagas = db.query(Vagas).options(
-                        joinedload(Vagas.autor),
-                        joinedload(Vagas.tipo),
-                        joinedload(Vagas.department),
-                        joinedload(Vagas.location),
-                        joinedload(Vagas.interesses).joinedload(InteresseVaga.interesse)
-                    ).filter(
-                        Vagas.status == "em_andamento",
-                        ~Vagas.id.in_(recommended_vaga_ids)
-                    ).order_by(Vagas.criado_em.desc()).offset(skip).limit(remaining_limit).all()
+        # Store cached recommendation data
+        for rec in cached_recommendations:
+            recommendations_data[rec['vaga_id']] = {
+                'score': rec['total_score'],
+                'explanation': rec['explanation'],
+                'strategies': rec['strategies']
+            }
         
-                # If no user or no cached recommendations, get regular vagas
-        if not recommended_vagas and not regular_vagas:
-            regular_vagas = base_query.options(
-                joinedload(Vagas.autor),
-                joinedload(Vagas.tipo),
-                joinedload(Vagas.department),
-                joinedload(Vagas.location),
-                joinedload(Vagas.interesses).joinedload(InteresseVaga.interesse)
-            ).order_by(Vagas.criado_em.desc()).offset(skip).limit(limit).all()
+        # Recommended vagas head the first page only; later pages continue the regular list
+        if cursor_values is None:
+            # Sort by recommendation score (from cache)
+            recommended_ids = sorted(cached_ids, key=lambda vaga_id: recommendations_data[vaga_id]['score'], reverse=True)
+    
+    # Shared page, with room for the user's recommended vagas, which are dropped from it below
+    sort_keys = [relevance, Vagas.id] if relevance is not None else [Vagas.criado_em, Vagas.id]
+    fetch_limit = limit + len(cached_ids)
+    page_key = ("page", filters_key, tuple(cursor_values) if cursor_values is not None else None,
+                0 if cursor_values is not None else skip, fetch_limit)
+    page_rows, has_more = _cached(page_key, version, lambda: _keyset_page(
+        base_query.with_entities(Vagas.id), sort_keys, cursor_values, skip, fetch_limit
+    ))
+    page_rows = [row for row in page_rows if row[0] not in recommendations_data]
     
-    # Combine recommended + regular vagas
-    all_vagas = recommended_vagas + regular_vagas
+    # Card fields of the whole page (recommended + regular) in a fixed number of queries
+    cards = _get_vaga_cards(db, recommended_ids + [vaga_id for vaga_id, _ in page_rows], version)
+    recommended_ids = [
+        vaga_id for vaga_id in recommended_ids
+        if vaga_id in cards and cards[vaga_id]["status"] == "em_andamento"
+    ]
+    
+    regular_rows = page_rows[:max(limit - len(recommended_ids), 0)]
+    regular_ids = [vaga_id for vaga_id, _ in regular_rows]
+    next_cursor = None
+    if has_more or len(page_rows) > len(regular_rows):
+        # An empty page (every slot taken by recommendations) continues from the current position
+        next_cursor = encode_cursor(list(regular_rows[-1][1]) if regular_rows else cursor_values or [])
     
     # Convert to dict format
     result = []
-    for i, vaga in enumerate(all_vagas):
+    for i, vaga_id in enumerate(recommended_ids + regular_ids):
+        vaga_dict = cards.get(vaga_id)
+        if vaga_dict is None:
+            continue
+        
         # Get cached recommendation data if available
         recommendation_score = 0.0
         recommendation_explanation = ""
         recommendation_strategies = []
-        is_recommended = i < len(recommended_vagas)  # First batch are recommended
+        is_recommended = i < len(recommended_ids)  # First batch are recommended
         
-        if vaga.id in recommendations_data:
-            recommendation_score = recommendations_data[vaga.id]['score']
-            recommendation_explanation = recommendations_data[vaga.id]['explanation']
+        if vaga_id in recommendations_data:
+            recommendation_score = recommendations_data[vaga_id]['score']
+            recommendation_explanation = recommendations_data[vaga_id]['explanation']
             
-            # Get detailed strategy explanations for this vaga
+            # Strategy descriptions come from the engine registry
             if user_id:
-                strategy_recommendations = db.query(Recomendacao).filter(
-                    Recomendacao.usuario_id == user_id,
-                    Recomendacao.vaga_id == vaga.id,
-                    Recomendacao.ativa == True,
-                    Recomendacao.estrategia != "combined"
-                ).all()
-                
-                for strategy_rec in strategy_recommendations:
-                    strategy_name = strategy_rec.estrategia
-                    strategy_description = "Baseado nos seus interesses"
-                    
-                    # Get proper strategy description
-                    if strategy_name == "common_interests":
-                        strategy_description = "Baseado nos seus interesses em comum"
-                    elif strategy_name == "popular":
-                        strategy_description = "Baseado na popularidade entre outros estudantes"
-                    
-                    recommendation_strategies.append({
-                        "name": strategy_name,
-                        "description": strategy_description,
-                        "score": strategy_rec.score,
-                        "explanation": strategy_rec.explicacao
-                    })
+                recommendation_strategies = service.describe_strategies(recommendations_data[vaga_id]['strategies'])
         
-        vaga_dict = {
-            "id": vaga.id,
-            "titulo": vaga.titulo,
-            "descricao": vaga.descricao,
-            "prazo": vaga.prazo.isoformat() if vaga.prazo else None,
-            "status": vaga.status,
-            "criado_em": vaga.criado_em.isoformat() if vaga.criado_em else None,
-            "remuneracao": vaga.remuneracao,
-            "horas_complementares": vaga.horas_complementares,
-            "desconto": vaga.desconto,
-            "link_vaga": vaga.link_vaga,
-            "professor": vaga.professor,
-            "autor": {
-                "id": vaga.autor.id,
-                "nome": vaga.autor.usuario,  # Use usuario field
-                "usuario": vaga.autor.usuario,
-                "email": vaga.autor.email,
-                "avatar": vaga.autor.avatar
-            } if vaga.autor else None,
-            "tipo": {
-                "id": vaga.tipo.id,
-                "nome": vaga.tipo.nome
-            } if vaga.tipo else None,
-            "department": {
-                "id": vaga.department.id,
-                "name": vaga.department.name,
-                "sigla": vaga.department.sigla
-            } if vaga.department else None,
-            "location": {
-                "id": vaga.location.id,
-                "name": vaga.location.name
-            } if vaga.location else None,
-            "interesses": [
-                {
-                    "interesse": {
-                        "id": iv.interesse.id,
-                        "nome": iv.interesse.nome
-                    }
-                } for iv in vaga.interesses
-            ],
+        result.append({
+            **vaga_dict,
             # SMART: Use cached recommendation data (FAST!)
             "isRecommended": is_recommended,
             "recommendationScore": recommendation_score,
             "recommendationExplanation": recommendation_explanation,
             "recommendationStrategies": recommendation_strategies
-        }
-        result.append(vaga_dict)
+        })
     
-    return {"vagas": result, "total": total, "recommended_count": len(recommended_vagas)}
+    return {"vagas": result, "total": total, "recommended_count": len(recommended_ids), "next_cursor": next_cursor}
 
 def update_vaga(db: Session, vaga_id: int, titulo: str, descricao: str, prazo: str, interesses: list[int] = None):
     vaga = db.query(Vagas).filter(Vagas.id == vaga_id).first()
@@ -273,6 +326,7 @@ def update_vaga(db: Session, vaga_id: int, titulo: str, descricao: str, prazo: s
         vaga.titulo = titulo
         vaga.descricao = descricao
         vaga.prazo = prazo
+        vaga.codigo_disciplina = parse_course_code(titulo)
         
         # Update interests if provided
         if interesses is not None:
@@ -284,6 +338,9 @@ def update_vaga(db: Session, vaga_id: int, titulo: str, descricao: str, prazo: s
                 interesse_vaga = InteresseVaga(interesse_id=interesse_id, vaga_id=vaga_id)
                 db.add(interesse_vaga)
         
+        index_vaga_terms(db, vaga_id, titulo, descricao)
+        record_recommendation_change(db, VAGA_UPDATED, vaga_id=vaga_id)
+        bump_catalog_version(db)
         db.commit()
         db.refresh(vaga)
     return vaga
@@ -292,6 +349,8 @@ def update_vaga_status(db: Session, vaga_id: int, status: str):
     vaga = db.query(Vagas).filter(Vagas.id == vaga_id).first()
     if vaga:
         vaga.status = status
+        record_recommendation_change(db, VAGA_STATUS_UPDATED, vaga_id=vaga_id)
+        bump_catalog_version(db)
         db.commit()
         db.refresh(vaga)
     return vaga
@@ -300,9 +359,30 @@ def delete_vaga(db: Session, vaga_id: int):
     vaga = db.query(Vagas).filter(Vagas.id == vaga_id).first()
     if vaga:
         db.delete(vaga)
+        remove_vaga_terms(db, vaga_id)
+        remove_similar_vaga(db, vaga_id)
+        bump_catalog_version(db)
         db.commit()
     return vaga
 
+def close_expired_vagas(db: Session, today: date = None) -> list[int]:
+    """
+    Close every active vaga whose prazo has passed and deactivate its recommendations,
+    with one UPDATE on (status, prazo) in a single transaction. Returns the closed vaga ids.
+    """
+    today = today or date.today()
+    closed_ids = [row.id for row in db.execute(
+        update(Vagas).where(
+            Vagas.status == "em_andamento",
+            Vagas.prazo < today
+        ).values(status="encerrada").returning(Vagas.id)
+    )]
+    if closed_ids:
+        get_recommendation_service().store.invalidate_vagas(db, closed_ids)
+        bump_catalog_version(db)
+    db.commit()
+    return closed_ids
+
 def get_tipos_vaga(db: Session):
     from models.tipo_vaga import Tipo
     return db.query(Tipo).all()
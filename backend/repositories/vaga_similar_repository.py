@@ -0,0 +1,73 @@
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import func, insert, or_
+from models.vaga_similar import VagaSimilar
+from models.vaga import Vagas
+from models.interesse_vaga import InteresseVaga
+from models.vaga_termo import VagaTermo
+
+def replace_similar_vagas(db: Session, vaga_ids: list[int], similar: dict[int, list[tuple[int, float]]]):
+    """Replace the lists of the given vagas (vagas without an entry in similar end up with no list); committed by the caller"""
+    if vaga_ids:
+        db.query(VagaSimilar).filter(VagaSimilar.vaga_id.in_(vaga_ids)).delete(synchronize_session=False)
+    rows = [
+        {"vaga_id": vaga_id, "similar_id": similar_id, "similaridade": score}
+        for vaga_id, entries in similar.items()
+        for similar_id, score in entries
+    ]
+    if rows:
+        db.execute(insert(VagaSimilar), rows)
+
+def clear_similar_vagas(db: Session):
+    db.query(VagaSimilar).delete(synchronize_session=False)
+
+def remove_similar_vaga(db: Session, vaga_id: int):
+    """Drop a deleted vaga's list and its entries in other lists (committed with the delete)"""
+    db.query(VagaSimilar).filter(
+        or_(VagaSimilar.vaga_id == vaga_id, VagaSimilar.similar_id == vaga_id)
+    ).delete(synchronize_session=False)
+
+def get_lists_containing(db: Session, similar_ids: list[int]) -> set[int]:
+    """Vagas whose list contains any of the given vagas"""
+    if not similar_ids:
+        return set()
+    rows = db.query(VagaSimilar.vaga_id).filter(VagaSimilar.similar_id.in_(similar_ids)).distinct().all()
+    return {row.vaga_id for row in rows}
+
+def get_list_floors(db: Session, vaga_ids: list[int]) -> dict[int, tuple[int, float]]:
+    """{vaga_id: (list size, lowest similarity in the list)} of the given vagas"""
+    if not vaga_ids:
+        return {}
+    rows = db.query(
+        VagaSimilar.vaga_id, func.count(VagaSimilar.similar_id), func.min(VagaSimilar.similaridade)
+    ).filter(VagaSimilar.vaga_id.in_(vaga_ids)).group_by(VagaSimilar.vaga_id).all()
+    return {vaga_id: (count, floor) for vaga_id, count, floor in rows}
+
+def get_related_vagas(db: Session, vaga_ids: list[int]) -> set[int]:
+    """Active vagas sharing a term or an interest with any of the given vagas (the only ones that can be similar)"""
+    if not vaga_ids:
+        return set()
+    terms = db.query(VagaTermo.termo).filter(VagaTermo.vaga_id.in_(vaga_ids))
+    interests = db.query(InteresseVaga.interesse_id).filter(InteresseVaga.vaga_id.in_(vaga_ids))
+    by_term = db.query(VagaTermo.vaga_id.label("vaga_id")).filter(VagaTermo.termo.in_(terms))
+    by_interest = db.query(InteresseVaga.vaga_id.label("vaga_id")).filter(InteresseVaga.interesse_id.in_(interests))
+    related = by_term.union(by_interest).subquery()
+    rows = db.query(Vagas.id).filter(Vagas.id.in_(db.query(related.c.vaga_id)), Vagas.status == "em_andamento").all()
+    return {row.id for row in rows}
+
+def get_similar_vagas(db: Session, vaga_id: int, limit: int = 10) -> list:
+    """(Vagas, similaridade) of the most similar active vagas, most similar first"""
+    return db.query(Vagas, VagaSimilar.similaridade).join(
+        VagaSimilar, VagaSimilar.similar_id == Vagas.id
+    ).options(
+        joinedload(Vagas.autor),
+        joinedload(Vagas.tipo),
+        joinedload(Vagas.department),
+        joinedload(Vagas.location),
+        # Collection in one batched query instead of one lazy load per result
+        selectinload(Vagas.interesses).joinedload(InteresseVaga.interesse),
+    ).filter(
+        VagaSimilar.vaga_id == vaga_id,
+        Vagas.status == "em_andamento"
+    ).order_by(
+        VagaSimilar.similaridade.desc(), Vagas.id
+    ).limit(limit).all()
@@ -0,0 +1,104 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, insert
+from collections import Counter
+from models.vaga_termo import VagaTermo, TermoDocumento
+from models.vaga import Vagas
+from repositories.backfill_concluido_repository import mark_backfill_done, is_backfill_done
+from utils.db_utils import dialect_insert
+from utils.text_utils import term_frequencies
+
+# Maximum number of terms per IN (...) when updating document frequencies
+TERM_CHUNK_SIZE = 500
+
+# Marker of the full index: vaga writes index their own terms, which says nothing about older vagas
+TERMS_BACKFILL = "vaga_termos"
+
+def vaga_term_frequencies(titulo: str, descricao: str) -> Counter:
+    """Terms of a vaga; the title counts twice since it is the best summary of the opportunity"""
+    return term_frequencies(titulo, titulo, descricao)
+
+def index_vaga_terms(db: Session, vaga_id: int, titulo: str, descricao: str):
+    """
+    Replace the indexed terms of a vaga and adjust the document frequency of the terms that changed.
+    Only added to the transaction, so it is committed together with the vaga write.
+    """
+    new_counts = vaga_term_frequencies(titulo, descricao)
+    old_counts = {
+        row.termo: row.frequencia
+        for row in db.query(VagaTermo.termo, VagaTermo.frequencia).filter(VagaTermo.vaga_id == vaga_id).all()
+    }
+    if old_counts == dict(new_counts):
+        return
+    
+    db.query(VagaTermo).filter(VagaTermo.vaga_id == vaga_id).delete(synchronize_session=False)
+    if new_counts:
+        db.execute(insert(VagaTermo), [
+            {"vaga_id": vaga_id, "termo": termo, "frequencia": frequencia} for termo, frequencia in new_counts.items()
+        ])
+    _adjust_document_frequencies(db, new_counts.keys() - old_counts.keys(), 1)
+    _adjust_document_frequencies(db, old_counts.keys() - new_counts.keys(), -1)
+
+def remove_vaga_terms(db: Session, vaga_id: int):
+    """Drop a deleted vaga from the index (committed with the delete)"""
+    old_terms = [row.termo for row in db.query(VagaTermo.termo).filter(VagaTermo.vaga_id == vaga_id).all()]
+    db.query(VagaTermo).filter(VagaTermo.vaga_id == vaga_id).delete(synchronize_session=False)
+    _adjust_document_frequencies(db, old_terms, -1)
+
+def _adjust_document_frequencies(db: Session, terms, delta: int):
+    terms = sorted(terms)
+    if not terms:
+        return
+    if delta > 0:
+        stmt = dialect_insert(db, TermoDocumento)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[TermoDocumento.termo],
+            set_={"documentos": TermoDocumento.documentos + stmt.excluded.documentos}
+        )
+        db.execute(stmt, [{"termo": termo, "documentos": delta} for termo in terms])
+        return
+    for start in range(0, len(terms), TERM_CHUNK_SIZE):
+        db.query(TermoDocumento).filter(TermoDocumento.termo.in_(terms[start:start + TERM_CHUNK_SIZE])).update(
+            {"documentos": TermoDocumento.documentos + delta}, synchronize_session=False
+        )
+
+def has_vaga_terms(db: Session) -> bool:
+    """Whether every vaga was indexed at least once (terms indexed by vaga writes alone do not count)"""
+    return is_backfill_done(db, TERMS_BACKFILL)
+
+def rebuild_vaga_terms(db: Session):
+    """Index every vaga from scratch (backfill)"""
+    db.query(VagaTermo).delete(synchronize_session=False)
+    db.query(TermoDocumento).delete(synchronize_session=False)
+    
+    document_frequencies = Counter()
+    rows = []
+    for vaga in db.query(Vagas.id, Vagas.titulo, Vagas.descricao).yield_per(1000):
+        counts = vaga_term_frequencies(vaga.titulo, vaga.descricao)
+        document_frequencies.update(counts.keys())
+        rows.extend({"vaga_id": vaga.id, "termo": termo, "frequencia": frequencia} for termo, frequencia in counts.items())
+    
+    if rows:
+        db.execute(insert(VagaTermo), rows)
+    if document_frequencies:
+        db.execute(insert(TermoDocumento), [
+            {"termo": termo, "documentos": documentos} for termo, documentos in document_frequencies.items()
+        ])
+    mark_backfill_done(db, TERMS_BACKFILL)
+    db.commit()
+
+def get_active_vaga_terms(db: Session, vaga_ids: list[int] = None) -> list:
+    """(vaga_id, termo, frequencia) rows of the active vagas"""
+    query = db.query(VagaTermo.vaga_id, VagaTermo.termo, VagaTermo.frequencia).join(
+        Vagas, Vagas.id == VagaTermo.vaga_id
+    ).filter(Vagas.status == "em_andamento")
+    if vaga_ids is not None:
+        query = query.filter(VagaTermo.vaga_id.in_(vaga_ids))
+    return query.all()
+
+def get_document_frequencies(db: Session) -> tuple[dict[str, int], int]:
+    """({termo: number of vagas containing it}, number of vagas)"""
+    frequencies = {
+        row.termo: row.documentos
+        for row in db.query(TermoDocumento.termo, TermoDocumento.documentos).filter(TermoDocumento.documentos > 0).all()
+    }
+    return frequencies, db.query(func.count(Vagas.id)).scalar()
@@ -0,0 +1,85 @@
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import insert
+import numpy as np
+from scipy.sparse import csr_matrix
+from models.vaga_vizinho import VagaVizinho
+from models.candidato_vaga import CandidatoVaga
+from models.vaga import Vagas
+from repositories.backfill_concluido_repository import mark_backfill_done, is_backfill_done
+
+# Neighbors kept per vaga, and co-applications needed for two vagas to be neighbors
+NEIGHBORS_PER_VAGA = 20
+MIN_COAPPLICATIONS = 2
+# Marker of the first build: on a young catalog no pair may qualify, so an empty table is a valid result
+NEIGHBORS_BACKFILL = "vaga_vizinhos"
+
+def rebuild_vaga_neighbors(db: Session, top_n: int = NEIGHBORS_PER_VAGA, min_coapplications: int = MIN_COAPPLICATIONS):
+    """
+    Recompute the co-application neighbors of every vaga from candidato_vaga.
+    One sparse product gives the co-application counts of every pair of vagas.
+    """
+    pairs = {(row.candidato_id, row.vaga_id) for row in db.query(CandidatoVaga.candidato_id, CandidatoVaga.vaga_id).all()}
+    
+    rows = []
+    if pairs:
+        user_index = {user_id: i for i, user_id in enumerate(sorted({user_id for user_id, _ in pairs}))}
+        vaga_ids = sorted({vaga_id for _, vaga_id in pairs})
+        vaga_index = {vaga_id: i for i, vaga_id in enumerate(vaga_ids)}
+        
+        applications = csr_matrix(
+            (np.ones(len(pairs)), ([user_index[u] for u, _ in pairs], [vaga_index[v] for _, v in pairs])),
+            shape=(len(user_index), len(vaga_ids))
+        )
+        # vagas × vagas co-application counts; the diagonal is the number of candidates of each vaga
+        coapplications = (applications.T @ applications).tocsr()
+        candidates = coapplications.diagonal()
+        
+        for row in range(len(vaga_ids)):
+            start, end = coapplications.indptr[row], coapplications.indptr[row + 1]
+            cols = coapplications.indices[start:end]
+            counts = coapplications.data[start:end]
+            keep = (cols != row) & (counts >= min_coapplications)
+            cols, counts = cols[keep], counts[keep]
+            if not len(cols):
+                continue
+            
+            similarities = counts / np.sqrt(candidates[row] * candidates[cols])
+            best = np.argsort(-similarities, kind="stable")[:top_n]
+            rows.extend(
+                {
+                    "vaga_id": vaga_ids[row],
+                    "vizinho_id": vaga_ids[cols[i]],
+                    "similaridade": float(similarities[i]),
+                    "coaplicacoes": int(counts[i]),
+                }
+                for i in best
+            )
+    
+    db.query(VagaVizinho).delete(synchronize_session=False)
+    if rows:
+        db.execute(insert(VagaVizinho), rows)
+    mark_backfill_done(db, NEIGHBORS_BACKFILL)
+    db.commit()
+
+def has_vaga_neighbors(db: Session) -> bool:
+    """Whether the neighbors were built at least once (possibly with no qualifying pair)"""
+    return is_backfill_done(db, NEIGHBORS_BACKFILL)
+
+def get_active_neighbors(db: Session, vaga_ids: list[int], neighbor_ids: list[int] = None) -> list:
+    """(vaga_id, vizinho_id, similaridade, coaplicacoes, titulo of vaga_id) for the active neighbors of the given vagas"""
+    if not vaga_ids:
+        return []
+    Vizinho = aliased(Vagas)
+    query = db.query(
+        VagaVizinho.vaga_id, VagaVizinho.vizinho_id, VagaVizinho.similaridade, VagaVizinho.coaplicacoes, Vagas.titulo
+    ).join(
+        Vagas, Vagas.id == VagaVizinho.vaga_id
+    ).join(
+        Vizinho, Vizinho.id == VagaVizinho.vizinho_id
+    ).filter(
+        VagaVizinho.vaga_id.in_(vaga_ids),
+        Vizinho.status == "em_andamento"
+    )
+    if neighbor_ids is not None:
+        query = query.filter(VagaVizinho.vizinho_id.in_(neighbor_ids))
+    return query.all()
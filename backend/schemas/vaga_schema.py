@@ -38,4 +38,8 @@ class VagaResponse(BaseModel):
     interesses: List[InteresseVagaResponse] = []  # Changed to use InteresseVagaResponse
 
     class Config:
-        orm_mode = True  # Allows mapping from ORM models
\ No newline at end of file
+        orm_mode = True  # Allows mapping from ORM models
+
+class SimilarVagaResponse(BaseModel):
+    vaga: VagaResponse
+    similaridade: float
@@ -5,8 +5,10 @@ Perfect for static data that rarely changes
 """
 
 from functools import lru_cache, wraps
+from collections import OrderedDict
+import threading
 import time
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Hashable, Optional
 from sqlalchemy.orm import Session
 from models.base import SessionLocal
 from models.tipo_vaga import Tipo
@@ -36,6 +38,37 @@ def ttl_cache(seconds: int = 3600):
         return wrapper
     return decorator
 
+class VersionedCache:
+    """
+    LRU cache whose entries are only valid for the version they were stored with
+    The version lives in the database, so a rewrite in another process (e.g. the worker)
+    invalidates the entries here as soon as the new version is read
+    """
+    
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable, version: int) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+    
+    def set(self, key: Hashable, version: int, value: Any):
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def cache_clear(self):
+        with self._lock:
+            self._entries.clear()
+
 class StaticDataCache:
     """Cache for static data that rarely changes"""
     
@@ -100,12 +133,23 @@ class StaticDataCache:
         finally:
             db.close()
     
+    @staticmethod
+    @ttl_cache(seconds=60 * 60)  # Cache for 1 hour
+    def get_interest_names() -> Dict[int, str]:
+        """Get {interest id: name} - used to render stored recommendation explanations"""
+        db = SessionLocal()
+        try:
+            return {interest.id: interest.nome for interest in db.query(Interesses.id, Interesses.nome).all()}
+        finally:
+            db.close()
+    
     @classmethod
     def clear_all_cache(cls):
         """Clear all cached data (for admin use)"""
         cls.get_opportunity_types.cache_clear()
         cls.get_departments.cache_clear()
         cls.get_interests.cache_clear()
+        cls.get_interest_names.cache_clear()
         print("✅ All static data cache cleared")
 
 # Global instance
@@ -0,0 +1,132 @@
+"""
+Sparse TF-IDF content similarity
+Vaga vectors come from the incrementally maintained term index (titulo + descricao); student
+vectors from sobre, interest names and historico course names. Every (student, vaga) pair is
+scored with one sparse product of L2-normalized TF-IDF matrices (cosine similarity)
+"""
+
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+import math
+import numpy as np
+from scipy.sparse import csr_matrix
+from sqlalchemy.orm import Session
+from models.user import User
+from models.interesse import Interesses
+from models.interesse_usuario import InteresseUsuario
+from models.historico import Historico
+from models.candidato_vaga import CandidatoVaga
+from repositories.vaga_termo_repository import get_active_vaga_terms, get_document_frequencies
+from utils.text_utils import term_frequencies
+
+# Pairs less similar than this are not recommended
+MIN_SIMILARITY = 0.05
+# Best matches kept per student (the combination keeps its own top K afterwards)
+MAX_MATCHES_PER_USER = 100
+# Terms shown in the explanation
+EXPLANATION_TERMS = 3
+
+
+def load_user_profiles(db: Session, user_ids: List[int]) -> Dict[int, Counter]:
+    """Term counts of each student's sobre, interest names and historico course names"""
+    profiles = {user_id: Counter() for user_id in user_ids}
+
+    for row in db.query(User.id, User.sobre).filter(User.id.in_(user_ids)).all():
+        profiles[row.id].update(term_frequencies(row.sobre))
+
+    for row in db.query(InteresseUsuario.usuario_id, Interesses.nome).join(
+        Interesses, Interesses.id == InteresseUsuario.interesse_id
+    ).filter(InteresseUsuario.usuario_id.in_(user_ids)).all():
+        profiles[row.usuario_id].update(term_frequencies(row.nome))
+
+    # Each course counts once, even if it was taken more than once
+    for row in db.query(Historico.user_id, Historico.nome_disciplina).filter(
+        Historico.user_id.in_(user_ids)
+    ).distinct().all():
+        profiles[row.user_id].update(term_frequencies(row.nome_disciplina))
+
+    return profiles
+
+
+class ContentIndex:
+    """TF-IDF matrix of the active vagas over the indexed vocabulary"""
+
+    def __init__(self, vaga_rows: List[Tuple[int, str, int]], document_frequencies: Dict[str, int], total_documents: int):
+        self.terms = sorted(document_frequencies)
+        self.term_index = {term: i for i, term in enumerate(self.terms)}
+        # Smoothed IDF, so terms present in every vaga still count a little
+        self.idf = np.array([
+            math.log((1 + total_documents) / (1 + document_frequencies[term])) + 1 for term in self.terms
+        ], dtype=np.float64)
+
+        self.vaga_ids = sorted({vaga_id for vaga_id, _, _ in vaga_rows})
+        vaga_index = {vaga_id: i for i, vaga_id in enumerate(self.vaga_ids)}
+        vaga_counts = [(vaga_index[vaga_id], termo, frequencia) for vaga_id, termo, frequencia in vaga_rows]
+        self.vagas = self._tfidf(vaga_counts, len(self.vaga_ids))
+
+    @classmethod
+    def load(cls, db: Session, vaga_ids: Optional[List[int]] = None) -> "ContentIndex":
+        document_frequencies, total_documents = get_document_frequencies(db)
+        vaga_rows = [(row.vaga_id, row.termo, row.frequencia) for row in get_active_vaga_terms(db, vaga_ids)]
+        return cls(vaga_rows, document_frequencies, total_documents)
+
+    def _tfidf(self, counts: List[Tuple[int, str, int]], n_rows: int) -> csr_matrix:
+        """L2-normalized TF-IDF rows with sublinear term frequency; terms outside the vocabulary are ignored"""
+        rows, cols, data = [], [], []
+        for row, term, count in counts:
+            col = self.term_index.get(term)
+            if col is None or count <= 0:
+                continue
+            rows.append(row)
+            cols.append(col)
+            data.append((1 + math.log(count)) * self.idf[col])
+
+        matrix = csr_matrix((data, (rows, cols)), shape=(n_rows, len(self.terms)), dtype=np.float64)
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return csr_matrix(matrix.multiply(1 / norms[:, None]))
+
+    def iter_matches(self, profiles: Dict[int, Counter], applied: Set[Tuple[int, int]]) -> Iterator[Tuple[int, int, float, List[str]]]:
+        """
+        Yield (user_id, vaga_id, similarity, top shared terms) for the best matches of each student,
+        skipping vagas the student already applied to
+        """
+        user_ids = sorted(profiles)
+        if not user_ids or not self.vaga_ids or not self.terms:
+            return
+
+        users = self._tfidf(
+            [(row, term, count) for row, user_id in enumerate(user_ids) for term, count in profiles[user_id].items()],
+            len(user_ids)
+        )
+        similarities = (users @ self.vagas.T).tocsr()
+
+        for row, user_id in enumerate(user_ids):
+            start, end = similarities.indptr[row], similarities.indptr[row + 1]
+            if start == end:
+                continue
+
+            cols = similarities.indices[start:end]
+            scores = similarities.data[start:end]
+            if len(scores) > MAX_MATCHES_PER_USER:
+                best = np.argpartition(-scores, MAX_MATCHES_PER_USER)[:MAX_MATCHES_PER_USER]
+                cols, scores = cols[best], scores[best]
+
+            for col, score in zip(cols, scores):
+                vaga_id = self.vaga_ids[col]
+                if score < MIN_SIMILARITY or (user_id, vaga_id) in applied:
+                    continue
+                yield user_id, vaga_id, float(score), self._shared_terms(users, row, col)
+
+    def _shared_terms(self, users: csr_matrix, row: int, col: int) -> List[str]:
+        """Terms that contribute most to the similarity of a pair"""
+        contribution = users.getrow(row).multiply(self.vagas.getrow(col)).tocoo()
+        best = np.argsort(-contribution.data)[:EXPLANATION_TERMS]
+        return [self.terms[contribution.col[i]] for i in best]
+
+
+def load_applied_pairs(db: Session, user_ids: List[int], vaga_ids: Optional[List[int]] = None) -> Set[Tuple[int, int]]:
+    query = db.query(CandidatoVaga.candidato_id, CandidatoVaga.vaga_id).filter(CandidatoVaga.candidato_id.in_(user_ids))
+    if vaga_ids is not None:
+        query = query.filter(CandidatoVaga.vaga_id.in_(vaga_ids))
+    return {(row.candidato_id, row.vaga_id) for row in query.all()}
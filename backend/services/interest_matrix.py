@@ -0,0 +1,165 @@
+"""
+Sparse interest-matrix scoring
+Loads the user×interest and vaga×interest incidence once into CSR matrices
+and scores every (user, vaga) pair with a single matrix product.
+score_common_interests_sql computes the same scores inside the database instead.
+"""
+
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+import numpy as np
+from scipy.sparse import csr_matrix
+from sqlalchemy import Float, cast, exists, and_, func, select
+from sqlalchemy.orm import Session
+from models.vaga import Vagas
+from models.interesse import Interesses
+from models.interesse_usuario import InteresseUsuario
+from models.interesse_vaga import InteresseVaga
+from models.candidato_vaga import CandidatoVaga
+from utils.db_utils import aggregate_ids
+
+
+class InterestMatrix:
+    """User×interest and vaga×interest incidence for the active opportunities"""
+
+    def __init__(self, user_rows: List[Tuple[int, int]], vaga_rows: List[Tuple[int, int]],
+                 applied: Set[Tuple[int, int]], interest_names: Dict[int, str]):
+        self.applied = applied
+        self.interest_names = interest_names
+
+        # Interest ids per row in load order, used to report the common interests of a match
+        self.user_interest_lists: Dict[int, List[int]] = {}
+        for usuario_id, interesse_id in user_rows:
+            self.user_interest_lists.setdefault(usuario_id, []).append(interesse_id)
+        self.vaga_interest_lists: Dict[int, List[int]] = {}
+        for vaga_id, interesse_id in vaga_rows:
+            self.vaga_interest_lists.setdefault(vaga_id, []).append(interesse_id)
+
+        self.user_ids = sorted({usuario_id for usuario_id, _ in user_rows})
+        self.vaga_ids = sorted({vaga_id for vaga_id, _ in vaga_rows})
+        self.interest_ids = sorted(
+            {interesse_id for _, interesse_id in user_rows} | {interesse_id for _, interesse_id in vaga_rows}
+        )
+
+        user_index = {user_id: i for i, user_id in enumerate(self.user_ids)}
+        vaga_index = {vaga_id: i for i, vaga_id in enumerate(self.vaga_ids)}
+        interest_index = {interest_id: i for i, interest_id in enumerate(self.interest_ids)}
+
+        # Score denominator keeps the original definition: number of interest rows of the vaga
+        self.vaga_interest_counts = np.bincount(
+            [vaga_index[vaga_id] for vaga_id, _ in vaga_rows], minlength=len(self.vaga_ids)
+        ).astype(np.float64)
+
+        self.users = self._incidence(user_rows, user_index, interest_index)
+        self.vagas = self._incidence(vaga_rows, vaga_index, interest_index)
+
+    @staticmethod
+    def _incidence(rows: List[Tuple[int, int]], row_index: Dict[int, int], interest_index: Dict[int, int]) -> csr_matrix:
+        """Build a binary CSR matrix (duplicated links count once)"""
+        pairs = {(row_index[row_id], interest_index[interest_id]) for row_id, interest_id in rows}
+        data = np.ones(len(pairs), dtype=np.float64)
+        row_ind = np.fromiter((r for r, _ in pairs), dtype=np.int64, count=len(pairs))
+        col_ind = np.fromiter((c for _, c in pairs), dtype=np.int64, count=len(pairs))
+        return csr_matrix((data, (row_ind, col_ind)), shape=(len(row_index), len(interest_index)))
+
+    @classmethod
+    def load(cls, db: Session, user_ids: Optional[List[int]] = None, vaga_ids: Optional[List[int]] = None) -> "InterestMatrix":
+        """Load the incidence for the given users (all when None) against the active vagas"""
+        vaga_query = db.query(InteresseVaga.vaga_id, InteresseVaga.interesse_id).join(
+            Vagas, Vagas.id == InteresseVaga.vaga_id
+        ).filter(Vagas.status == "em_andamento")
+        if vaga_ids is not None:
+            vaga_query = vaga_query.filter(InteresseVaga.vaga_id.in_(vaga_ids))
+        vaga_rows = [(row.vaga_id, row.interesse_id) for row in vaga_query.all()]
+
+        user_query = db.query(InteresseUsuario.usuario_id, InteresseUsuario.interesse_id)
+        if user_ids is not None:
+            user_query = user_query.filter(InteresseUsuario.usuario_id.in_(user_ids))
+        user_rows = [(row.usuario_id, row.interesse_id) for row in user_query.all()]
+
+        applied_query = db.query(CandidatoVaga.candidato_id, CandidatoVaga.vaga_id)
+        if user_ids is not None:
+            applied_query = applied_query.filter(CandidatoVaga.candidato_id.in_(user_ids))
+        if vaga_ids is not None:
+            applied_query = applied_query.filter(CandidatoVaga.vaga_id.in_(vaga_ids))
+        applied = {(row.candidato_id, row.vaga_id) for row in applied_query.all()}
+
+        interest_ids = {interesse_id for _, interesse_id in user_rows}
+        interest_names = {}
+        if interest_ids:
+            interest_names = {
+                row.id: row.nome
+                for row in db.query(Interesses.id, Interesses.nome).filter(Interesses.id.in_(interest_ids)).all()
+            }
+
+        return cls(user_rows, vaga_rows, applied, interest_names)
+
+    def iter_matches(self) -> Iterator[Tuple[int, int, float, List[int]]]:
+        """
+        Yield (user_id, vaga_id, score, common_interest_ids) for every pair sharing interests
+        score = |common| / |vaga interests|, skipping vagas the user already applied to
+        """
+        if not self.user_ids or not self.vaga_ids:
+            return
+
+        # One sparse product gives the number of common interests for every pair
+        common_counts = (self.users @ self.vagas.T).tocsr()
+        common_counts.sort_indices()
+
+        for row, user_id in enumerate(self.user_ids):
+            start, end = common_counts.indptr[row], common_counts.indptr[row + 1]
+            if start == end:
+                continue
+
+            user_interest_set = set(self.user_interest_lists[user_id])
+
+            for col, count in zip(common_counts.indices[start:end], common_counts.data[start:end]):
+                vaga_id = self.vaga_ids[col]
+                if (user_id, vaga_id) in self.applied:
+                    continue
+
+                # Sorted, so the explanation and details are stable across runs and scoring modes
+                common = sorted(user_interest_set.intersection(self.vaga_interest_lists[vaga_id]))
+                score = float(count / self.vaga_interest_counts[col])
+                yield user_id, vaga_id, score, common
+
+
+def score_common_interests_sql(db: Session, user_ids: Optional[List[int]] = None,
+                               vaga_ids: Optional[List[int]] = None) -> Iterator[Tuple[int, int, float, List[int]]]:
+    """
+    Same matches as InterestMatrix.iter_matches, computed by one grouped SQL statement:
+    interesse_usuario joined with interesse_vaga of the active vagas, grouped by (usuario_id, vaga_id),
+    anti-joined with candidato_vaga and divided by the vaga's interest count.
+    Only the scored pairs leave the database. All users when user_ids is None (full refresh).
+    """
+    vaga_counts = select(
+        InteresseVaga.vaga_id, func.count(InteresseVaga.id).label("total")
+    ).join(
+        Vagas, Vagas.id == InteresseVaga.vaga_id
+    ).where(Vagas.status == "em_andamento")
+    if vaga_ids is not None:
+        vaga_counts = vaga_counts.where(InteresseVaga.vaga_id.in_(vaga_ids))
+    vaga_counts = vaga_counts.group_by(InteresseVaga.vaga_id).subquery()
+
+    already_applied = exists().where(and_(
+        CandidatoVaga.candidato_id == InteresseUsuario.usuario_id,
+        CandidatoVaga.vaga_id == InteresseVaga.vaga_id
+    ))
+    common = func.count(func.distinct(InteresseUsuario.interesse_id))
+    query = db.query(
+        InteresseUsuario.usuario_id,
+        InteresseVaga.vaga_id,
+        (cast(common, Float) / vaga_counts.c.total).label("score"),
+        aggregate_ids(db, InteresseUsuario.interesse_id).label("interesse_ids")
+    ).join(
+        InteresseVaga, InteresseVaga.interesse_id == InteresseUsuario.interesse_id
+    ).join(
+        vaga_counts, vaga_counts.c.vaga_id == InteresseVaga.vaga_id
+    ).filter(~already_applied)
+    if user_ids is not None:
+        query = query.filter(InteresseUsuario.usuario_id.in_(user_ids))
+    query = query.group_by(InteresseUsuario.usuario_id, InteresseVaga.vaga_id, vaga_counts.c.total)
+
+    for row in query.yield_per(5000):
+        # The aggregate has no order: sort like the matrix mode
+        common_interest_ids = sorted({int(interesse_id) for interesse_id in row.interesse_ids.split(",")})
+        yield row.usuario_id, row.vaga_id, float(row.score), common_interest_ids
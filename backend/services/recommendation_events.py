@@ -0,0 +1,86 @@
+"""
+Incremental recommendation updates
+Consumes the recommendation change log and rewrites only the affected
+(user, vaga) pairs instead of recomputing every user
+"""
+
+from typing import Dict, List
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from repositories.recomendacao_evento_repository import (
+    get_pending_events,
+    mark_events_processed,
+    USER_EVENTS,
+    VAGA_EVENTS,
+)
+from services.recommendation_service import RecommendationService
+from services.similar_vagas import refresh_similar_vagas
+
+# Changes for the same user or vaga within this window are handled once
+DEBOUNCE_SECONDS = 60
+
+class RecommendationChangeConsumer:
+    """Apply pending change events to the stored recommendations"""
+
+    def __init__(self, service: RecommendationService, debounce_seconds: int = DEBOUNCE_SECONDS):
+        self.service = service
+        self.debounce_seconds = debounce_seconds
+
+    def process_pending(self, db: Session) -> Dict[str, int]:
+        """Process the pending events that are outside the debounce window
+
+        - user events (interests, candidaturas): the user is recomputed once, in a single batch
+        - vaga events (created, edited, status): only that vaga is scored against all users,
+          and the similar-vagas lists it affects are recomputed
+        """
+        stats = {"events": 0, "users": 0, "vagas": 0}
+
+        events = get_pending_events(db)
+        if not events:
+            return stats
+
+        # Latest change per user / vaga, so bursts of changes are debounced
+        last_user_change = {}
+        last_vaga_change = {}
+        for event in events:
+            if event.tipo in USER_EVENTS and event.usuario_id is not None:
+                last_user_change[event.usuario_id] = max(last_user_change.get(event.usuario_id, event.criado_em), event.criado_em)
+            elif event.tipo in VAGA_EVENTS and event.vaga_id is not None:
+                last_vaga_change[event.vaga_id] = max(last_vaga_change.get(event.vaga_id, event.criado_em), event.criado_em)
+
+        cutoff = datetime.now() - timedelta(seconds=self.debounce_seconds)
+        user_ids = sorted(user_id for user_id, changed_at in last_user_change.items() if changed_at <= cutoff)
+        vaga_ids = sorted(vaga_id for vaga_id, changed_at in last_vaga_change.items() if changed_at <= cutoff)
+
+        if user_ids and not self.service.calculate_and_store_recommendations_batch(db, user_ids):
+            user_ids = []
+        if vaga_ids and not self.service.rescore_vagas(db, vaga_ids):
+            vaga_ids = []
+        if vaga_ids:
+            # The "similar opportunities" lists follow the same vaga changes
+            try:
+                refresh_similar_vagas(db, vaga_ids)
+            except Exception as e:
+                print(f"Error refreshing similar vagas of {vaga_ids}: {e}")
+                db.rollback()
+
+        # Events still inside the window (or that failed) stay pending for the next run
+        handled_users = set(user_ids)
+        handled_vagas = set(vaga_ids)
+        processed_ids: List[int] = []
+        for event in events:
+            if event.tipo in USER_EVENTS:
+                if event.usuario_id is None or event.usuario_id in handled_users:
+                    processed_ids.append(event.id)
+            elif event.tipo in VAGA_EVENTS:
+                if event.vaga_id is None or event.vaga_id in handled_vagas:
+                    processed_ids.append(event.id)
+            else:
+                processed_ids.append(event.id)
+
+        mark_events_processed(db, processed_ids)
+
+        stats["events"] = len(processed_ids)
+        stats["users"] = len(user_ids)
+        stats["vagas"] = len(vaga_ids)
+        return stats
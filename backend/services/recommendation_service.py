@@ -1,16 +1,55 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Callable
 from sqlalchemy.orm import Session
 from models.user import User
-from models.vaga import Vagas
-from models.recomendacao import Recomendacao
+from models.interesse_usuario import InteresseUsuario
+from models.candidato_vaga import CandidatoVaga
+from models.interesse_vaga import InteresseVaga
+from models.recomendacao_inicial import GLOBAL_LIST
 from services.recommendation_strategies import RecommendationEngine
+from services.interest_matrix import InterestMatrix
+from services.recommendation_store import create_recommendation_store
+from services.cache_service import VersionedCache
+from repositories.recomendacao_versao_repository import get_recommendation_version
+from repositories.recomendacao_estrategia_stats_repository import get_strategy_stats
+from repositories.recomendacao_inicial_repository import get_cold_start_entries
+from repositories.recomendacao_stats_repository import (
+    get_recommendation_counters,
+    has_recommendation_stats,
+    set_recommendation_stat,
+    ACTIVE,
+    USERS,
+    STRATEGY_PREFIX,
+    DAY_PREFIX,
+    FULL_REFRESH_SECONDS,
+)
 from datetime import datetime, timedelta
+from functools import lru_cache
+import heapq
+import os
+
+# Number of students scored and written together by the bulk recompute
+BATCH_SIZE = 500
+
+# Recommendations kept per user (RECOMMENDATION_TOP_K), storage grows with users × K
+DEFAULT_TOP_K = 50
+
+# Age buckets (days since a recommendation was last written) of the stats endpoint
+AGE_BUCKETS = [(1, "up_to_1_day"), (7, "up_to_7_days"), (30, "up_to_30_days")]
+
+# Shown for strategies that are no longer registered (e.g. stored before a strategy was removed)
+DEFAULT_STRATEGY_DESCRIPTION = "Estratégia personalizada"
 
 class RecommendationService:
     """Service to manage pre-calculated recommendations"""
     
-    def __init__(self):
+    def __init__(self, storage_mode: Optional[str] = None, layout: Optional[str] = None, top_k: Optional[int] = None):
         self.engine = RecommendationEngine()
+        self.top_k = top_k or int(os.getenv("RECOMMENDATION_TOP_K", DEFAULT_TOP_K))
+        # storage_mode "upsert" writes only changed rows, "replace" deletes and reinserts;
+        # layout "per_strategy" keeps one row per strategy, "compact" one row per (user, vaga)
+        self.store = create_recommendation_store(self.engine, layout, storage_mode)
+        # Serialized reads per (user, limit), valid while the user's recommendation version is unchanged
+        self.read_cache = VersionedCache()
     
     def calculate_and_store_recommendations(self, db: Session, user_id: int, strategies: Optional[List[str]] = None) -> bool:
         """Calculate and store recommendations for a specific user
@@ -25,61 +64,20 @@ class RecommendationService:
             if not user:
                 return False
             
-        
-                # Full refresh - clear all existing recommendations
             print(f"Full recommendation refresh for user {user_id}")
-            db.query(Recomendacao).filter(Recomendacao.usuario_id == user_id).delete()
             strategies_to_calculate = [strategy.get_name() for strategy in self.engine.get_all_strategies()]
             print(f"strategies_to_calculate: {strategies_to_calculate}")
 
             
             # Get recommendations from specified strategies
-            strategy_results = {}
-            for strategy_name in strategies_to_calculate:
-                strategy = self._get_strategy_by_name(strategy_name)
-                if strategy:
-                    strategy_recommendations = strategy.get_recommendations(db, user)
-                    strategy_results[strategy_name] = strategy_recommendations
+            strategy_results = self.engine.get_recommendations(db, user, strategies_to_calculate)
             
             # Combine results from all calculated strategies
             combined_recommendations = self._combine_strategy_results(strategy_results)
             
-            # Store each recommendation
-            for rec_data in combined_recommendations:
-                vaga_id = rec_data['vaga_id']
-                total_score = rec_data['total_score']
-                strategies_data = rec_data['strategies']
-                
-                # Create explanation combining all strategies
-                explanations = []
-                for strategy in strategies_data:
-                    explanations.append(f"• {strategy['explanation']}")
-                
-                combined_explanation = "\n".join(explanations)
-                
-                # Store recommendation for each strategy (for detailed analysis)
-                for strategy in strategies_data:
-                    recommendation = Recomendacao(
-                        usuario_id=user_id,
-                        vaga_id=vaga_id,
-                        estrategia=strategy['name'],
-                        score=strategy['score'],
-                        explicacao=strategy['explanation'],
-                        ativa=True
-                    )
-                    db.add(recommendation)
-                
-                # Store combined recommendation
-                combined_recommendation = Recomendacao(
-                    usuario_id=user_id,
-                    vaga_id=vaga_id,
-                    estrategia="combined",
-                    score=total_score,
-                    explicacao=combined_explanation,
-                    ativa=True
-                )
-                db.add(combined_recommendation)
+            self.store.save(db, {user_id: combined_recommendations})
             
+            self.engine.flush_stats(db)
             db.commit()
             print(f"Successfully calculated and stored {len(combined_recommendations)} recommendations for user {user_id}")
             return True
@@ -89,6 +87,77 @@ class RecommendationService:
             db.rollback()
             return False
     
+    def calculate_and_store_recommendations_batch(self, db: Session, user_ids: List[int],
+                                                  precomputed: Optional[Dict[str, Dict[int, List[Dict]]]] = None) -> bool:
+        """Calculate and store recommendations for a batch of users in one pass
+        
+        Every strategy scores the whole batch at once (or is read from precomputed, see
+        calculate_recommendations_for_all_users) and the rows of the whole batch are written
+        together by the store.
+        """
+        try:
+            users = db.query(User).filter(User.id.in_(user_ids)).all()
+            if not users:
+                return True  # Nothing left to calculate (e.g. users were deleted)
+            
+            recommendations = self._calculate_batch(db, users, precomputed=precomputed)
+            self.store.save(db, recommendations)
+            
+            self.engine.flush_stats(db)
+            db.commit()
+            total = sum(len(user_recommendations) for user_recommendations in recommendations.values())
+            print(f"Successfully calculated and stored {total} recommendations for {len(users)} users")
+            return True
+            
+        except Exception as e:
+            print(f"Error calculating recommendations for batch of {len(user_ids)} users: {e}")
+            db.rollback()
+            return False
+    
+    def rescore_vagas(self, db: Session, vaga_ids: List[int], batch_size: int = BATCH_SIZE) -> bool:
+        """Score only the given opportunities against every student
+        
+        Used for incremental updates: only the (user, vaga) pairs of these opportunities are
+        rewritten, every other stored recommendation is left untouched. Opportunities that are
+        no longer active simply lose their recommendations; the vaga that would take their place
+        in a user's top K is only picked up by the next full refresh.
+        """
+        try:
+            # Same students as the worker's full refresh, so it does not delete what this writes
+            user_ids = self.get_student_ids(db, verified_only=True)
+            
+            # The vagas' own fields may have changed even where the scores did not
+            self.store.bump_vaga_versions(db, vaga_ids)
+            db.commit()
+            
+            for start in range(0, len(user_ids), batch_size):
+                batch = user_ids[start:start + batch_size]
+                users = db.query(User).filter(User.id.in_(batch)).all()
+                self.store.save(db, self._calculate_batch(db, users, vaga_ids), vaga_ids)
+                # Rescored vagas may push other recommendations out of the user's top K
+                self.store.keep_top_k(db, batch, self.top_k)
+                self.engine.flush_stats(db)
+                db.commit()
+            
+            print(f"Rescored vagas {vaga_ids} against {len(user_ids)} users")
+            return True
+            
+        except Exception as e:
+            print(f"Error rescoring vagas {vaga_ids}: {e}")
+            db.rollback()
+            return False
+    
+    def _calculate_batch(self, db: Session, users: List[User], vaga_ids: Optional[List[int]] = None,
+                         precomputed: Optional[Dict[str, Dict[int, List[Dict]]]] = None) -> Dict[int, List[Dict]]:
+        """Run every strategy once for the whole batch and combine the results per user"""
+        # {user_id: {strategy_name: [recommendations]}}, failed or skipped strategies contribute nothing
+        strategy_results = {user.id: {} for user in users}
+        for strategy_name, batch in self.engine.get_batch_recommendations(db, users, vaga_ids, precomputed).items():
+            for user in users:
+                strategy_results[user.id][strategy_name] = batch.get(user.id, [])
+        
+        return {user.id: self._combine_strategy_results(strategy_results[user.id]) for user in users}
+    
     def calculate_strategy_recommendations(self, db: Session, user_id: int, strategy_name: str) -> bool:
         """Calculate and store recommendations for a specific strategy only"""
         return self.calculate_and_store_recommendations(db, user_id, [strategy_name])
@@ -101,7 +170,7 @@ class RecommendationService:
         return None
     
     def _combine_strategy_results(self, strategy_results: Dict[str, List]) -> List[Dict]:
-        """Combine results from multiple strategies"""
+        """Combine results from multiple strategies, keeping only the top K by total score"""
         # Group recommendations by vaga_id
         vaga_recommendations = {}
         
@@ -124,152 +193,198 @@ class RecommendationService:
                     'name': strategy_name,
                     'score': rec['score'],
                     'explanation': rec['explanation'],
+                    'details': rec.get('details') or {'texto': rec['explanation']},
                     'weight': weight
                 })
                 
                 # Add to total score (weighted)
                 vaga_recommendations[vaga_id]['total_score'] += rec['score'] * weight
         
-        # Convert to list and sort by total score
-        result = list(vaga_recommendations.values())
-        result.sort(key=lambda x: x['total_score'], reverse=True)
-        
-        return result
+        # Bounded heap selection of the best K, sorted by total score
+        return heapq.nlargest(self.top_k, vaga_recommendations.values(), key=lambda x: x['total_score'])
     
-    def calculate_recommendations_for_all_users(self, db: Session) -> Dict[str, int]:
-        """Calculate recommendations for all users"""
-        stats = {"success": 0, "failed": 0}
+    def get_student_ids(self, db: Session, verified_only: bool = False, shard: int = 0, num_shards: int = 1) -> List[int]:
+        """Ids of the users who are students (ehaluno=True), optionally only one shard of them"""
+        query = db.query(User.id).filter(User.ehaluno == True)
+        if verified_only:
+            query = query.filter(User.email_verified == True)
+        if num_shards > 1:
+            query = query.filter(User.id % num_shards == shard)
+        return [row.id for row in query.order_by(User.id).all()]
+    
+    def calculate_recommendations_for_all_users(self, db: Session, batch_size: int = BATCH_SIZE, verified_only: bool = False,
+                                                progress_callback: Optional[Callable[[int, int], None]] = None,
+                                                shard: int = 0, num_shards: int = 1) -> Dict[str, int]:
+        """Calculate recommendations for all users, one batch of students at a time
         
-        # Get all users who are students (ehaluno=True)
-        users = db.query(User).filter(User.ehaluno == True).all()
+        With num_shards > 1 only the students with user_id % num_shards == shard are processed,
+        so several processes can share a full refresh without touching the same rows.
+        Strategies that score every user in one set-based pass (scores_all_users) run once up
+        front, and their results for all the students are kept in memory for the batches.
+        """
+        stats = {"success": 0, "failed": 0}
+        user_ids = self.get_student_ids(db, verified_only, shard, num_shards)
+        precomputed = self.engine.get_all_users_recommendations(db, user_ids) if user_ids else {}
         
-        for user in users:
-            if self.calculate_and_store_recommendations(db, user.id):
-                stats["success"] += 1
+        for start in range(0, len(user_ids), batch_size):
+            batch = user_ids[start:start + batch_size]
+            if self.calculate_and_store_recommendations_batch(db, batch, precomputed):
+                stats["success"] += len(batch)
             else:
-                stats["failed"] += 1
+                stats["failed"] += len(batch)
+            
+            if progress_callback:
+                progress_callback(start + len(batch), len(user_ids))
         
         return stats
     
     def get_user_recommendations(self, db: Session, user_id: int, limit: int = 10) -> List[Dict]:
-        """Get stored recommendations for a user"""
-        recommendations = db.query(Recomendacao).filter(
-            Recomendacao.usuario_id == user_id,
-            Recomendacao.estrategia == "combined",  # Get combined recommendations
-            Recomendacao.ativa == True
-        ).order_by(Recomendacao.score.desc()).limit(limit).all()
+        """Get stored recommendations for a user
+        
+        Recommendations, their active opportunities and the opportunity details are read together
+        by the store; the serialized result is cached until the user's recommendations are rewritten.
+        """
+        # Read the version first: a rewrite committed after this point is seen as a newer version
+        version = get_recommendation_version(db, user_id)
+        cached = self.read_cache.get((user_id, limit), version)
+        if cached is not None:
+            return cached
+        
+        recommendations = self.store.get_user_recommendations(db, user_id, limit, with_vagas=True)
+        
+        result = [
+            {
+                "vaga_id": rec['vaga_id'],
+                "vaga": self._serialize_vaga(rec['vaga']),
+                "total_score": rec['total_score'],
+                "strategies": self.describe_strategies(rec['strategies']),
+                "updated_at": rec['updated_at'].isoformat() if rec['updated_at'] else None
+            }
+            for rec in recommendations
+        ]
+        
+        self.read_cache.set((user_id, limit), version, result)
+        return result
+    
+    def get_cold_start_recommendations(self, db: Session, user_id: int, limit: int = 10) -> List[Dict]:
+        """Instant recommendations for a user without stored ones, merged from the precomputed lists
+        
+        Each vaga of the lists of the user's interests (or of the global list) is scored like the combined
+        interest + popularity strategies would, so the scores rank against the stored recommendations:
+        common interests over the vaga's interest count, and its popularity.
+        """
+        interest_ids = [row.interesse_id for row in db.query(InteresseUsuario.interesse_id).filter(
+            InteresseUsuario.usuario_id == user_id
+        ).all()]
+        applied = {row.vaga_id for row in db.query(CandidatoVaga.vaga_id).filter(CandidatoVaga.candidato_id == user_id).all()}
+        
+        candidates = {}
+        for entry, vaga in get_cold_start_entries(db, interest_ids):
+            if vaga.id in applied:
+                continue
+            candidate = candidates.setdefault(vaga.id, {"vaga": vaga, "entry": entry, "interesse_ids": []})
+            if entry.interesse_id != GLOBAL_LIST:
+                candidate["interesse_ids"].append(entry.interesse_id)
+        
+        strategies = {strategy.get_name(): strategy for strategy in self.engine.get_all_strategies()}
+        interests, popular = strategies.get("common_interests"), strategies.get("popular")
+        
+        # Interest scores of the common_interests strategy, over the full interest list of each candidate
+        matched_ids = [vaga_id for vaga_id, candidate in candidates.items() if candidate["interesse_ids"]]
+        interest_matches = {}
+        if interests and matched_ids:
+            vaga_rows = [(row.vaga_id, row.interesse_id) for row in db.query(
+                InteresseVaga.vaga_id, InteresseVaga.interesse_id
+            ).filter(InteresseVaga.vaga_id.in_(matched_ids)).all()]
+            matrix = InterestMatrix([(user_id, interesse_id) for interesse_id in interest_ids], vaga_rows, set(), {})
+            interest_matches = {vaga_id: (score, common) for _, vaga_id, score, common in matrix.iter_matches()}
         
         result = []
-        for rec in recommendations:
-            # Get opportunity details with relationships
-            vaga = db.query(Vagas).filter(Vagas.id == rec.vaga_id).first()
-            if vaga and vaga.status == "em_andamento":  # Only active opportunities
-                
-                # Get individual strategy explanations
-                strategy_recs = db.query(Recomendacao).filter(
-                    Recomendacao.usuario_id == user_id,
-                    Recomendacao.vaga_id == rec.vaga_id,
-                    Recomendacao.estrategia != "combined",
-                    Recomendacao.ativa == True
-                ).all()
-                
-                strategies = []
-                for strategy_rec in strategy_recs:
-                    strategy_name = strategy_rec.estrategia
-                    strategy_description = self._get_strategy_description(strategy_name)
-                    
-                    strategies.append({
-                        "name": strategy_name,
-                        "description": strategy_description,
-                        "score": strategy_rec.score,
-                        "explanation": strategy_rec.explicacao
-                    })
-                
-                result.append({
-                    "vaga_id": rec.vaga_id,
-                    "vaga": {
-                        "id": vaga.id,
-                        "titulo": vaga.titulo,
-                        "descricao": vaga.descricao,
-                        "prazo": vaga.prazo.isoformat() if vaga.prazo else None,
-                        "status": vaga.status,
-                        "autor": {
-                            "id": vaga.autor.id,
-                            "nome": vaga.autor.nome,
-                            "avatar": vaga.autor.avatar_url if hasattr(vaga.autor, 'avatar_url') else None
-                        } if vaga.autor else None,
-                        "tipo": {
-                            "id": vaga.tipo.id,
-                            "nome": vaga.tipo.nome
-                        } if vaga.tipo else None,
-                        "department": {
-                            "id": vaga.department.id,
-                            "name": vaga.department.name
-                        } if vaga.department else None,
-                        "location": {
-                            "id": vaga.location.id,
-                            "name": vaga.location.name
-                        } if vaga.location else None
-                    },
-                    "total_score": rec.score,
-                    "strategies": strategies,
-                    "updated_at": rec.atualizado_em.isoformat() if rec.atualizado_em else None
+        for vaga_id, candidate in candidates.items():
+            entry = candidate["entry"]
+            entries = []
+            if vaga_id in interest_matches:
+                score, common = interest_matches[vaga_id]
+                details = {'interesse_ids': common}
+                entries.append({
+                    "name": interests.get_name(),
+                    "score": score,
+                    "explanation": interests.explain(details)
+                })
+            if popular and entry.candidatos:
+                entries.append({
+                    "name": popular.get_name(),
+                    "score": entry.score,
+                    "explanation": popular.explain({'candidatos': entry.candidatos})
                 })
+            result.append({
+                "vaga_id": vaga_id,
+                "vaga": self._serialize_vaga(candidate["vaga"]),
+                "total_score": sum(strategies[item["name"]].get_weight() * item["score"] for item in entries),
+                "strategies": self.describe_strategies(entries),
+                "updated_at": None
+            })
         
-        return result
+        return heapq.nlargest(limit, result, key=lambda rec: (rec["total_score"], rec["vaga_id"]))
+    
+    def _serialize_vaga(self, vaga) -> Dict:
+        return {
+            "id": vaga.id,
+            "titulo": vaga.titulo,
+            "descricao": vaga.descricao,
+            "prazo": vaga.prazo.isoformat() if vaga.prazo else None,
+            "status": vaga.status,
+            "autor": {
+                "id": vaga.autor.id,
+                "nome": vaga.autor.usuario,
+                "avatar": vaga.autor.avatar
+            } if vaga.autor else None,
+            "tipo": {
+                "id": vaga.tipo.id,
+                "nome": vaga.tipo.nome
+            } if vaga.tipo else None,
+            "department": {
+                "id": vaga.department.id,
+                "name": vaga.department.name
+            } if vaga.department else None,
+            "location": {
+                "id": vaga.location.id,
+                "name": vaga.location.name
+            } if vaga.location else None
+        }
     
     def get_recommendation_explanation(self, db: Session, user_id: int, vaga_id: int) -> Optional[Dict]:
         """Get detailed explanation for a specific recommendation"""
-        # Get all strategy recommendations for this user-vaga pair
-        recommendations = db.query(Recomendacao).filter(
-            Recomendacao.usuario_id == user_id,
-            Recomendacao.vaga_id == vaga_id,
-            Recomendacao.ativa == True
-        ).all()
+        recommendation = self.store.get_recommendation(db, user_id, vaga_id)
         
-        if not recommendations:
+        if not recommendation:
             return None
         
-        strategies = []
-        total_score = 0
-        
-        for rec in recommendations:
-            if rec.estrategia == "combined":
-                total_score = rec.score
-            else:
-                strategy_description = self._get_strategy_description(rec.estrategia)
-                strategies.append({
-                    "name": rec.estrategia,
-                    "description": strategy_description,
-                    "score": rec.score,
-                    "explanation": rec.explicacao
-                })
-        
         return {
             "vaga_id": vaga_id,
             "user_id": user_id,
-            "total_score": total_score,
-            "strategies": strategies
+            "total_score": recommendation['total_score'],
+            "strategies": self.describe_strategies(recommendation['strategies'])
         }
     
-    def _get_strategy_description(self, strategy_name: str) -> str:
-        """Get description for a strategy"""
-        for strategy in self.engine.get_all_strategies():
-            if strategy.get_name() == strategy_name:
-                return strategy.get_description()
-        return "Estratégia personalizada"
+    def describe_strategies(self, strategies: List[Dict]) -> List[Dict]:
+        """Add the strategy description to each strategy entry"""
+        descriptions = self.engine.get_strategy_descriptions()
+        return [
+            {
+                "name": strategy['name'],
+                "description": descriptions.get(strategy['name'], DEFAULT_STRATEGY_DESCRIPTION),
+                "score": strategy['score'],
+                "explanation": strategy['explanation']
+            }
+            for strategy in strategies
+        ]
     
     def should_refresh_recommendations(self, db: Session, user_id: int, max_age_hours: int = 48) -> bool:
         """Check if recommendations should be refreshed based on age"""
         cutoff_time = datetime.now() - timedelta(hours=max_age_hours)
         
-        recent_rec = db.query(Recomendacao).filter(
-            Recomendacao.usuario_id == user_id,
-            Recomendacao.atualizado_em >= cutoff_time,
-            Recomendacao.ativa == True
-        ).first()
-        
-        return recent_rec is None  # True if recommendations are old or don't exist
+        return not self.store.has_recent(db, user_id, cutoff_time)  # True if recommendations are old or don't exist
     
     def refresh_recommendations_if_needed(self, db: Session, user_id: int, max_age_hours: int = 48) -> bool:
         """Refresh recommendations if they are older than max_age_hours"""
@@ -281,9 +396,7 @@ class RecommendationService:
     def invalidate_recommendations_for_vaga(self, db: Session, vaga_id: int):
         """Invalidate all recommendations for a specific opportunity (e.g., when it's closed)"""
         try:
-            updated_count = db.query(Recomendacao).filter(
-                Recomendacao.vaga_id == vaga_id
-            ).update({"ativa": False})
+            updated_count = self.store.invalidate_vaga(db, vaga_id)
             
             db.commit()
             print(f"Invalidated {updated_count} recommendations for vaga {vaga_id}")
@@ -295,9 +408,7 @@ class RecommendationService:
     def invalidate_recommendations_for_user(self, db: Session, user_id: int):
         """Invalidate all recommendations for a specific user"""
         try:
-            updated_count = db.query(Recomendacao).filter(
-                Recomendacao.usuario_id == user_id
-            ).update({"ativa": False})
+            updated_count = self.store.invalidate_user(db, user_id)
             
             db.commit()
             print(f"Invalidated {updated_count} recommendations for user {user_id}")
@@ -306,28 +417,64 @@ class RecommendationService:
             print(f"Error invalidating recommendations for user {user_id}: {e}")
             db.rollback()
 
+    def rebuild_recommendation_stats(self, db: Session):
+        """Recount the statistics from the stored recommendations (backfill)"""
+        self.store.rebuild_stats(db)
+        db.commit()
+    
+    def ensure_recommendation_stats(self, db: Session):
+        if not has_recommendation_stats(db):
+            self.rebuild_recommendation_stats(db)
+    
+    def record_full_refresh(self, db: Session, duration_seconds: float):
+        set_recommendation_stat(db, FULL_REFRESH_SECONDS, duration_seconds)
+        db.commit()
+    
     def get_recommendation_stats(self, db: Session) -> Dict:
-        """Get recommendation system statistics"""
+        """Get recommendation system statistics from the incrementally maintained counters (no table scan)"""
         try:
-            # Total active recommendations
-            total_active = db.query(Recomendacao).filter(
-                Recomendacao.ativa == True,
-                Recomendacao.estrategia == "combined"
-            ).count()
+            counters = {row.chave: row for row in get_recommendation_counters(db)}
+            value = lambda key: int(counters[key].valor) if key in counters else 0
             
-            # Users with recommendations
-            users_with_recs = db.query(Recomendacao.usuario_id).filter(
-                Recomendacao.ativa == True,
-                Recomendacao.estrategia == "combined"
-            ).distinct().count()
+            # Total active recommendations and users with recommendations
+            total_active = value(ACTIVE)
+            users_with_recs = value(USERS)
             
             # Average recommendations per user
             avg_recs_per_user = total_active / users_with_recs if users_with_recs > 0 else 0
             
+            coverage = [
+                {
+                    "name": key[len(STRATEGY_PREFIX):],
+                    "recommendations": value(key),
+                    "share": round(value(key) / total_active, 4) if total_active else 0.0
+                }
+                for key in sorted(counters) if key.startswith(STRATEGY_PREFIX)
+            ]
+            
+            age_distribution = {label: 0 for _, label in AGE_BUCKETS}
+            age_distribution["older"] = 0
+            today = datetime.now().date()
+            for key in counters:
+                if not key.startswith(DAY_PREFIX):
+                    continue
+                age = (today - datetime.strptime(key[len(DAY_PREFIX):], "%Y-%m-%d").date()).days
+                label = next((label for max_age, label in AGE_BUCKETS if age <= max_age), "older")
+                age_distribution[label] += value(key)
+            
+            full_refresh = counters.get(FULL_REFRESH_SECONDS)
+            
             return {
                 "total_active_recommendations": total_active,
                 "users_with_recommendations": users_with_recs,
-                "average_recommendations_per_user": round(avg_recs_per_user, 2)
+                "average_recommendations_per_user": round(avg_recs_per_user, 2),
+                "strategies": self._get_strategy_run_stats(db),
+                "strategy_coverage": coverage,
+                "age_distribution": age_distribution,
+                "last_full_refresh": {
+                    "duration_seconds": round(full_refresh.valor, 1),
+                    "finished_at": full_refresh.atualizado_em.isoformat() if full_refresh.atualizado_em else None
+                } if full_refresh else None
             }
             
         except Exception as e:
@@ -335,5 +482,35 @@ class RecommendationService:
             return {
                 "total_active_recommendations": 0,
                 "users_with_recommendations": 0,
-                "average_recommendations_per_user": 0.0
-            } 
\ No newline at end of file
+                "average_recommendations_per_user": 0.0,
+                "strategies": [],
+                "strategy_coverage": [],
+                "age_distribution": {},
+                "last_full_refresh": None
+            }
+    
+    def _get_strategy_run_stats(self, db: Session) -> List[Dict]:
+        """Timing, query counts, failures and breaker state of each strategy (gathered by the worker)"""
+        return [
+            {
+                "name": stats.estrategia,
+                "runs": stats.execucoes,
+                "errors": stats.erros,
+                "timeouts": stats.timeouts,
+                "skipped": stats.ignoradas,
+                "average_ms": round(stats.tempo_total / stats.execucoes * 1000, 2) if stats.execucoes else 0.0,
+                "max_ms": round(stats.tempo_maximo * 1000, 2),
+                "average_queries": round(stats.consultas / stats.execucoes, 2) if stats.execucoes else 0.0,
+                "breaker": stats.estado,
+                "open_until": stats.aberto_ate.isoformat() if stats.aberto_ate else None,
+                "last_error": stats.ultimo_erro,
+                "updated_at": stats.atualizado_em.isoformat() if stats.atualizado_em else None
+            }
+            for stats in get_strategy_stats(db)
+        ]
+
+
+@lru_cache(maxsize=1)
+def get_recommendation_service() -> RecommendationService:
+    """Shared service instance for modules that read recommendations"""
+    return RecommendationService()
@@ -0,0 +1,511 @@
+"""
+Storage layouts for calculated recommendations
+- per_strategy: one row per (user, vaga, strategy) plus a 'combined' row, in recomendacoes
+- compact: one row per (user, vaga) with the per-strategy scores and explanation inputs, in recomendacoes_compactas
+"""
+
+from abc import ABC, abstractmethod
+from typing import List, Dict, Optional, Set, Tuple
+from datetime import datetime
+import os
+from sqlalchemy import insert, func
+from sqlalchemy.orm import Session, joinedload
+from models.recomendacao import Recomendacao
+from models.recomendacao_compacta import RecomendacaoCompacta
+from models.vaga import Vagas
+from repositories.recomendacao_versao_repository import bump_recommendation_versions
+from repositories.recomendacao_stats_repository import (
+    apply_user_stats,
+    clear_recommendation_stats,
+    set_recommendation_stat,
+    mark_recommendation_stats_complete,
+    ACTIVE,
+    USERS,
+)
+from utils.db_utils import dialect_insert
+
+# Storage modes for calculated recommendations
+STORAGE_UPSERT = "upsert"
+STORAGE_REPLACE = "replace"
+
+# Layouts
+LAYOUT_PER_STRATEGY = "per_strategy"
+LAYOUT_COMPACT = "compact"
+
+# Score differences below this are not considered a change
+SCORE_TOLERANCE = 1e-9
+
+# Maximum number of ids per IN (...) when updating rows in bulk
+ID_CHUNK_SIZE = 500
+
+class RecommendationStore(ABC):
+    """Base class for recommendation storage layouts
+
+    Reads return recommendations as
+    {'vaga_id', 'total_score', 'explanation', 'strategies': [{'name', 'score', 'explanation'}], 'updated_at'}
+    (plus 'vaga' when read with_vagas). Writes never commit: the caller commits once per batch.
+    Every user whose recommendations changed has its version bumped and its statistics recounted.
+    """
+
+    model = None
+
+    def __init__(self, storage_mode: str = STORAGE_UPSERT):
+        if storage_mode not in (STORAGE_UPSERT, STORAGE_REPLACE):
+            raise ValueError(f"Invalid recommendation storage mode: {storage_mode}")
+        self.storage_mode = storage_mode
+
+    @abstractmethod
+    def get_layout(self) -> str:
+        """Return the layout name"""
+        pass
+
+    @abstractmethod
+    def save(self, db: Session, recommendations: Dict[int, List[Dict]], vaga_ids: Optional[List[int]] = None):
+        """
+        Replace the stored recommendations of the given users (restricted to vaga_ids if given)
+        recommendations: {user_id: combined recommendations}, users with an empty list lose theirs
+        """
+        pass
+
+    @abstractmethod
+    def get_user_recommendations(self, db: Session, user_id: int, limit: int = 10, with_vagas: bool = False) -> List[Dict]:
+        """Best active recommendations of a user, by combined score
+
+        with_vagas: only active vagas, loaded in the same query with autor, tipo, department and location
+        """
+        pass
+
+    @abstractmethod
+    def get_recommendation(self, db: Session, user_id: int, vaga_id: int) -> Optional[Dict]:
+        """Active recommendation of a vaga for a user"""
+        pass
+
+    @abstractmethod
+    def _active_filter(self):
+        """Filter selecting the active rows that represent one recommendation each"""
+        pass
+
+    @abstractmethod
+    def _count_strategies(self, db: Session, user_ids: List[int]) -> Dict[int, Dict[str, int]]:
+        """{user_id: {strategy: active recommendations it contributed to}}"""
+        pass
+
+    def _count_active_by_user(self, db: Session, user_ids: List[int]) -> Dict[int, Dict]:
+        """Active recommendations of each user, per strategy and per day they were last written"""
+        counts = {user_id: {"ativas": 0, "estrategias": {}, "dias": {}} for user_id in user_ids}
+        day = func.date(self.model.atualizado_em)
+        for user_id, written_on, count in db.query(self.model.usuario_id, day, func.count(self.model.id)).filter(
+            self.model.usuario_id.in_(user_ids),
+            self._active_filter()
+        ).group_by(self.model.usuario_id, day).all():
+            counts[user_id]["ativas"] += count
+            counts[user_id]["dias"][str(written_on)] = count
+        for user_id, strategies in self._count_strategies(db, user_ids).items():
+            counts[user_id]["estrategias"] = strategies
+        return counts
+
+    def _changed(self, db: Session, user_ids):
+        """The recommendations of these users were rewritten: bump their versions and recount their statistics"""
+        user_ids = sorted(set(user_ids))
+        bump_recommendation_versions(db, user_ids)
+        for start in range(0, len(user_ids), ID_CHUNK_SIZE):
+            apply_user_stats(db, self._count_active_by_user(db, user_ids[start:start + ID_CHUNK_SIZE]))
+
+    def rebuild_stats(self, db: Session):
+        """Recount the statistics of every user from scratch (backfill, or after switching layouts)"""
+        clear_recommendation_stats(db)
+        set_recommendation_stat(db, ACTIVE, 0)
+        set_recommendation_stat(db, USERS, 0)
+        user_ids = [row.usuario_id for row in db.query(self.model.usuario_id).filter(
+            self._active_filter()
+        ).distinct().order_by(self.model.usuario_id).all()]
+        # Marked first, so the recount below is applied
+        mark_recommendation_stats_complete(db)
+        for start in range(0, len(user_ids), ID_CHUNK_SIZE):
+            apply_user_stats(db, self._count_active_by_user(db, user_ids[start:start + ID_CHUNK_SIZE]))
+
+    def _recommendations_query(self, db: Session, with_vagas: bool):
+        """Query the model, optionally joined with its active vaga and the vaga dimensions"""
+        if not with_vagas:
+            return db.query(self.model)
+        return db.query(self.model, Vagas).join(Vagas, Vagas.id == self.model.vaga_id).filter(
+            Vagas.status == "em_andamento"
+        ).options(
+            joinedload(Vagas.autor),
+            joinedload(Vagas.tipo),
+            joinedload(Vagas.department),
+            joinedload(Vagas.location)
+        )
+
+    def _users_recommended(self, db: Session, vaga_ids: List[int]) -> List[int]:
+        return [row.usuario_id for row in db.query(self.model.usuario_id).filter(
+            self.model.vaga_id.in_(vaga_ids),
+            self.model.ativa == True
+        ).distinct().all()]
+
+    def bump_vaga_versions(self, db: Session, vaga_ids: List[int]):
+        """Bump the version of every user recommended one of these vagas (e.g. the vaga was edited)"""
+        bump_recommendation_versions(db, self._users_recommended(db, vaga_ids))
+
+    def invalidate_vaga(self, db: Session, vaga_id: int) -> int:
+        return self.invalidate_vagas(db, [vaga_id])
+
+    def invalidate_vagas(self, db: Session, vaga_ids: List[int]) -> int:
+        """Deactivate every recommendation of these vagas, one UPDATE per chunk of ids"""
+        updated = 0
+        for start in range(0, len(vaga_ids), ID_CHUNK_SIZE):
+            chunk = vaga_ids[start:start + ID_CHUNK_SIZE]
+            user_ids = self._users_recommended(db, chunk)
+            updated += db.query(self.model).filter(
+                self.model.vaga_id.in_(chunk),
+                self.model.ativa == True
+            ).update({"ativa": False, "atualizado_em": datetime.now()}, synchronize_session=False)
+            self._changed(db, user_ids)
+        return updated
+
+    def invalidate_user(self, db: Session, user_id: int) -> int:
+        updated = db.query(self.model).filter(self.model.usuario_id == user_id).update(
+            {"ativa": False}, synchronize_session=False
+        )
+        self._changed(db, [user_id])
+        return updated
+
+    def has_recent(self, db: Session, user_id: int, since: datetime) -> bool:
+        return db.query(self.model.id).filter(
+            self.model.usuario_id == user_id,
+            self.model.atualizado_em >= since,
+            self.model.ativa == True
+        ).first() is not None
+
+    def count_active(self, db: Session) -> Tuple[int, int]:
+        """Return (active recommendations, users with recommendations)"""
+        total, users = db.query(
+            func.count(self.model.id),
+            func.count(func.distinct(self.model.usuario_id))
+        ).filter(self._active_filter()).one()
+        return total, users
+
+    def keep_top_k(self, db: Session, user_ids: List[int], k: int) -> int:
+        """Deactivate the active recommendations ranked below the top k of each user"""
+        ranked = db.query(self.model.usuario_id, self.model.vaga_id).filter(
+            self.model.usuario_id.in_(user_ids),
+            self._active_filter()
+        ).order_by(self.model.usuario_id, self.model.score.desc(), self.model.id).all()
+
+        overflow = {}
+        kept = {}
+        for rec in ranked:
+            kept[rec.usuario_id] = kept.get(rec.usuario_id, 0) + 1
+            if kept[rec.usuario_id] > k:
+                overflow.setdefault(rec.usuario_id, []).append(rec.vaga_id)
+
+        deactivated = 0
+        for user_id, vaga_ids in overflow.items():
+            for start in range(0, len(vaga_ids), ID_CHUNK_SIZE):
+                deactivated += db.query(self.model).filter(
+                    self.model.usuario_id == user_id,
+                    self.model.vaga_id.in_(vaga_ids[start:start + ID_CHUNK_SIZE]),
+                    self.model.ativa == True
+                ).update({"ativa": False, "atualizado_em": datetime.now()}, synchronize_session=False)
+        self._changed(db, overflow.keys())
+        return deactivated
+
+    def delete_inactive(self, db: Session, older_than: datetime) -> int:
+        return db.query(self.model).filter(
+            self.model.ativa == False,
+            self.model.atualizado_em < older_than
+        ).delete(synchronize_session=False)
+
+    def _write(self, db: Session, rows: List[Dict], user_ids: List[int], vaga_ids: Optional[List[int]],
+               key_columns: List[str], compare: Dict[str, callable]):
+        """Write rows for the scope (users, optionally vagas) according to the storage mode
+
+        compare: {column: function(stored value, new value) -> True when equal}
+        Every user with a changed row goes through _changed.
+        """
+        scope = db.query(self.model).filter(self.model.usuario_id.in_(user_ids))
+        if vaga_ids is not None:
+            scope = scope.filter(self.model.vaga_id.in_(vaga_ids))
+
+        if self.storage_mode == STORAGE_REPLACE:
+            scope.delete(synchronize_session=False)
+            if rows:
+                db.execute(insert(self.model), rows)
+            self._changed(db, user_ids)
+            return
+
+        # Diff against the stored rows so unchanged recommendations are not written at all
+        columns = [getattr(self.model, name) for name in ["id", "ativa", *key_columns, *compare]]
+        existing = {
+            tuple(getattr(rec, name) for name in key_columns): rec
+            for rec in scope.with_entities(*columns).all()
+        }
+
+        changed_rows = []
+        for row in rows:
+            current = existing.pop(tuple(row[name] for name in key_columns), None)
+            if current is None or not current.ativa or not all(
+                equal(getattr(current, name), row[name]) for name, equal in compare.items()
+            ):
+                changed_rows.append(row)
+
+        if changed_rows:
+            stmt = dialect_insert(db, self.model)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[getattr(self.model, name) for name in key_columns],
+                set_={
+                    **{name: getattr(stmt.excluded, name) for name in compare},
+                    "ativa": True,
+                    "atualizado_em": stmt.excluded.atualizado_em
+                }
+            )
+            db.execute(stmt, changed_rows)
+
+        # Whatever is left dropped out of the recommendations
+        dropped = [rec for rec in existing.values() if rec.ativa]
+        dropped_ids = [rec.id for rec in dropped]
+        for start in range(0, len(dropped_ids), ID_CHUNK_SIZE):
+            db.query(self.model).filter(
+                self.model.id.in_(dropped_ids[start:start + ID_CHUNK_SIZE])
+            ).update({"ativa": False, "atualizado_em": datetime.now()}, synchronize_session=False)
+        self._changed(db, [row['usuario_id'] for row in changed_rows] + [rec.usuario_id for rec in dropped])
+
+
+def _same_score(stored: float, new: float) -> bool:
+    return abs(stored - new) <= SCORE_TOLERANCE
+
+def _same_value(stored, new) -> bool:
+    return stored == new
+
+
+class PerStrategyRecommendationStore(RecommendationStore):
+    """One row per strategy plus a 'combined' row for every recommended vaga"""
+
+    model = Recomendacao
+
+    def get_layout(self) -> str:
+        return LAYOUT_PER_STRATEGY
+
+    def _active_filter(self):
+        return (Recomendacao.ativa == True) & (Recomendacao.estrategia == "combined")
+
+    def _count_strategies(self, db: Session, user_ids: List[int]) -> Dict[int, Dict[str, int]]:
+        counts = {}
+        for user_id, strategy, count in db.query(
+            Recomendacao.usuario_id, Recomendacao.estrategia, func.count(Recomendacao.id)
+        ).filter(
+            Recomendacao.usuario_id.in_(user_ids),
+            Recomendacao.estrategia != "combined",
+            Recomendacao.ativa == True
+        ).group_by(Recomendacao.usuario_id, Recomendacao.estrategia).all():
+            counts.setdefault(user_id, {})[strategy] = count
+        return counts
+
+    def save(self, db: Session, recommendations: Dict[int, List[Dict]], vaga_ids: Optional[List[int]] = None):
+        now = datetime.now()
+        rows = []
+
+        for user_id, combined_recommendations in recommendations.items():
+            for rec_data in combined_recommendations:
+                vaga_id = rec_data['vaga_id']
+                strategies_data = rec_data['strategies']
+
+                # Store recommendation for each strategy (for detailed analysis)
+                for strategy in strategies_data:
+                    rows.append({
+                        'usuario_id': user_id,
+                        'vaga_id': vaga_id,
+                        'estrategia': strategy['name'],
+                        'score': strategy['score'],
+                        'explicacao': strategy['explanation'],
+                        'ativa': True,
+                        'criado_em': now,
+                        'atualizado_em': now
+                    })
+
+                # Store combined recommendation, explanation combining all strategies
+                rows.append({
+                    'usuario_id': user_id,
+                    'vaga_id': vaga_id,
+                    'estrategia': "combined",
+                    'score': rec_data['total_score'],
+                    'explicacao': "\n".join(f"• {strategy['explanation']}" for strategy in strategies_data),
+                    'ativa': True,
+                    'criado_em': now,
+                    'atualizado_em': now
+                })
+
+        self._write(
+            db, rows, list(recommendations.keys()), vaga_ids,
+            key_columns=["usuario_id", "vaga_id", "estrategia"],
+            compare={"score": _same_score, "explicacao": _same_value}
+        )
+
+    def get_user_recommendations(self, db: Session, user_id: int, limit: int = 10, with_vagas: bool = False) -> List[Dict]:
+        rows = self._recommendations_query(db, with_vagas).filter(
+            Recomendacao.usuario_id == user_id,
+            Recomendacao.estrategia == "combined",
+            Recomendacao.ativa == True
+        ).order_by(Recomendacao.score.desc()).limit(limit).all()
+
+        if not rows:
+            return []
+        combined = [row[0] for row in rows] if with_vagas else rows
+
+        # Strategy rows of all these vagas in a single query
+        strategies_by_vaga = {}
+        strategy_recs = db.query(Recomendacao).filter(
+            Recomendacao.usuario_id == user_id,
+            Recomendacao.vaga_id.in_([rec.vaga_id for rec in combined]),
+            Recomendacao.estrategia != "combined",
+            Recomendacao.ativa == True
+        ).order_by(Recomendacao.id).all()
+        for strategy_rec in strategy_recs:
+            strategies_by_vaga.setdefault(strategy_rec.vaga_id, []).append({
+                "name": strategy_rec.estrategia,
+                "score": strategy_rec.score,
+                "explanation": strategy_rec.explicacao
+            })
+
+        result = [
+            {
+                "vaga_id": rec.vaga_id,
+                "total_score": rec.score,
+                "explanation": rec.explicacao,
+                "strategies": strategies_by_vaga.get(rec.vaga_id, []),
+                "updated_at": rec.atualizado_em
+            }
+            for rec in combined
+        ]
+        if with_vagas:
+            for rec, (_, vaga) in zip(result, rows):
+                rec["vaga"] = vaga
+        return result
+
+    def get_recommendation(self, db: Session, user_id: int, vaga_id: int) -> Optional[Dict]:
+        recommendations = db.query(Recomendacao).filter(
+            Recomendacao.usuario_id == user_id,
+            Recomendacao.vaga_id == vaga_id,
+            Recomendacao.ativa == True
+        ).order_by(Recomendacao.id).all()
+
+        if not recommendations:
+            return None
+
+        result = {"vaga_id": vaga_id, "total_score": 0, "explanation": "", "strategies": [], "updated_at": None}
+        for rec in recommendations:
+            if rec.estrategia == "combined":
+                result["total_score"] = rec.score
+                result["explanation"] = rec.explicacao
+                result["updated_at"] = rec.atualizado_em
+            else:
+                result["strategies"].append({
+                    "name": rec.estrategia,
+                    "score": rec.score,
+                    "explanation": rec.explicacao
+                })
+        return result
+
+
+class CompactRecommendationStore(RecommendationStore):
+    """A single row per recommended vaga; explanations are rendered from the stored inputs on read"""
+
+    model = RecomendacaoCompacta
+
+    def __init__(self, engine, storage_mode: str = STORAGE_UPSERT):
+        super().__init__(storage_mode)
+        self.engine = engine
+
+    def get_layout(self) -> str:
+        return LAYOUT_COMPACT
+
+    def _active_filter(self):
+        return RecomendacaoCompacta.ativa == True
+
+    def _count_strategies(self, db: Session, user_ids: List[int]) -> Dict[int, Dict[str, int]]:
+        counts = {}
+        for user_id, scores in db.query(RecomendacaoCompacta.usuario_id, RecomendacaoCompacta.scores).filter(
+            RecomendacaoCompacta.usuario_id.in_(user_ids),
+            RecomendacaoCompacta.ativa == True
+        ).all():
+            user_counts = counts.setdefault(user_id, {})
+            for strategy in scores:
+                user_counts[strategy] = user_counts.get(strategy, 0) + 1
+        return counts
+
+    def save(self, db: Session, recommendations: Dict[int, List[Dict]], vaga_ids: Optional[List[int]] = None):
+        now = datetime.now()
+        rows = []
+
+        for user_id, combined_recommendations in recommendations.items():
+            for rec_data in combined_recommendations:
+                rows.append({
+                    'usuario_id': user_id,
+                    'vaga_id': rec_data['vaga_id'],
+                    'score': rec_data['total_score'],
+                    'scores': {strategy['name']: strategy['score'] for strategy in rec_data['strategies']},
+                    'detalhes': {strategy['name']: strategy['details'] for strategy in rec_data['strategies']},
+                    'ativa': True,
+                    'criado_em': now,
+                    'atualizado_em': now
+                })
+
+        self._write(
+            db, rows, list(recommendations.keys()), vaga_ids,
+            key_columns=["usuario_id", "vaga_id"],
+            compare={"score": _same_score, "scores": _same_value, "detalhes": _same_value}
+        )
+
+    def get_user_recommendations(self, db: Session, user_id: int, limit: int = 10, with_vagas: bool = False) -> List[Dict]:
+        rows = self._recommendations_query(db, with_vagas).filter(
+            RecomendacaoCompacta.usuario_id == user_id,
+            RecomendacaoCompacta.ativa == True
+        ).order_by(RecomendacaoCompacta.score.desc()).limit(limit).all()
+
+        if not with_vagas:
+            return [self._to_dict(rec) for rec in rows]
+        return [{**self._to_dict(rec), "vaga": vaga} for rec, vaga in rows]
+
+    def get_recommendation(self, db: Session, user_id: int, vaga_id: int) -> Optional[Dict]:
+        rec = db.query(RecomendacaoCompacta).filter(
+            RecomendacaoCompacta.usuario_id == user_id,
+            RecomendacaoCompacta.vaga_id == vaga_id,
+            RecomendacaoCompacta.ativa == True
+        ).first()
+
+        return self._to_dict(rec) if rec else None
+
+    def _to_dict(self, rec: RecomendacaoCompacta) -> Dict:
+        strategies = []
+        for name, score in rec.scores.items():
+            strategies.append({
+                "name": name,
+                "score": score,
+                "explanation": self._explain(name, rec.detalhes.get(name) or {})
+            })
+
+        return {
+            "vaga_id": rec.vaga_id,
+            "total_score": rec.score,
+            "explanation": "\n".join(f"• {strategy['explanation']}" for strategy in strategies),
+            "strategies": strategies,
+            "updated_at": rec.atualizado_em
+        }
+
+    def _explain(self, strategy_name: str, details: Dict) -> str:
+        for strategy in self.engine.get_all_strategies():
+            if strategy.get_name() == strategy_name:
+                return strategy.explain(details)
+        return details.get('texto', "")
+
+
+def create_recommendation_store(engine, layout: Optional[str] = None, storage_mode: Optional[str] = None) -> RecommendationStore:
+    """Create the store configured by RECOMMENDATION_LAYOUT and RECOMMENDATION_STORAGE_MODE"""
+    layout = layout or os.getenv("RECOMMENDATION_LAYOUT", LAYOUT_PER_STRATEGY)
+    storage_mode = storage_mode or os.getenv("RECOMMENDATION_STORAGE_MODE", STORAGE_UPSERT)
+
+    if layout == LAYOUT_PER_STRATEGY:
+        return PerStrategyRecommendationStore(storage_mode)
+    if layout == LAYOUT_COMPACT:
+        return CompactRecommendationStore(engine, storage_mode)
+    raise ValueError(f"Invalid recommendation layout: {layout}")
@@ -1,12 +1,26 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Tuple
+import heapq
+import os
+from typing import List, Dict, Tuple, Optional
 from sqlalchemy.orm import Session
 from models.user import User
-from models.vaga import Vagas
-from models.interesse_usuario import InteresseUsuario
-from models.interesse_vaga import InteresseVaga
-from models.candidato_vaga import CandidatoVaga
-from sqlalchemy import func, and_
+from services.interest_matrix import InterestMatrix, score_common_interests_sql
+from services.content_index import ContentIndex, load_user_profiles, load_applied_pairs
+from repositories.vaga_popularidade_repository import (
+    get_active_vaga_popularity,
+    has_vaga_popularity,
+    rebuild_vaga_popularity,
+)
+from repositories.vaga_termo_repository import has_vaga_terms, rebuild_vaga_terms
+from repositories.historico_repository import get_monitoria_matches
+from repositories.vaga_vizinho_repository import get_active_neighbors, has_vaga_neighbors, rebuild_vaga_neighbors
+from repositories.recomendacao_estrategia_stats_repository import add_strategy_stats
+from services.cache_service import static_cache
+from services.strategy_runner import StrategyRunner
+
+# Scoring modes of CommonInterestsStrategy
+SCORING_MATRIX = "matrix"
+SCORING_SQL = "sql"
 
 class RecommendationStrategy(ABC):
     """Base class for all recommendation strategies"""
@@ -20,7 +34,8 @@ class RecommendationStrategy(ABC):
     def calculate_recommendations(self, db: Session, user: User) -> List[Tuple[int, float, str]]:
         """
         Calculate recommendations for a user
-        Returns: List of (vaga_id, score, explanation)
+        Returns: List of (vaga_id, score, explanation) or (vaga_id, score, explanation, details),
+        where details holds the structured inputs of the explanation (see explain)
         """
         pass
     
@@ -34,24 +49,79 @@ class RecommendationStrategy(ABC):
         """Return the weight for this strategy in combined recommendations"""
         pass
     
+    def explain(self, details: Dict) -> str:
+        """Rebuild the explanation of a recommendation from its stored details"""
+        return details.get('texto', "")
+    
     def get_recommendations(self, db: Session, user: User) -> List[Dict]:
         """
         Get recommendations in the format expected by the service
-        Returns: List of {'vaga_id': int, 'score': float, 'explanation': str}
+        Returns: List of {'vaga_id': int, 'score': float, 'explanation': str, 'details': dict}
         """
-        recommendations = self.calculate_recommendations(db, user)
+        return self._to_dicts(self.calculate_recommendations(db, user))
+    
+    def _to_dicts(self, recommendations: List[Tuple]) -> List[Dict]:
         return [
             {
                 'vaga_id': vaga_id,
                 'score': score,
-                'explanation': explanation
+                'explanation': explanation,
+                'details': details[0] if details else {'texto': explanation}
             }
-            for vaga_id, score, explanation in recommendations
+            for vaga_id, score, explanation, *details in recommendations
         ]
+    
+    def calculate_batch_recommendations(self, db: Session, users: List[User],
+                                        vaga_ids: Optional[List[int]] = None) -> Dict[int, List[Tuple[int, float, str]]]:
+        """
+        Calculate recommendations for several users at once, optionally only for some opportunities
+        Returns: {user_id: List of (vaga_id, score, explanation)}
+        Strategies that can share work between users should override this
+        """
+        wanted = set(vaga_ids) if vaga_ids is not None else None
+        batch = {}
+        for user in users:
+            recommendations = self.calculate_recommendations(db, user)
+            if wanted is not None:
+                recommendations = [rec for rec in recommendations if rec[0] in wanted]
+            batch[user.id] = recommendations
+        return batch
+    
+    def get_batch_recommendations(self, db: Session, users: List[User], vaga_ids: Optional[List[int]] = None) -> Dict[int, List[Dict]]:
+        """Batch version of get_recommendations, keyed by user id"""
+        batch = self.calculate_batch_recommendations(db, users, vaga_ids)
+        return {user_id: self._to_dicts(recommendations) for user_id, recommendations in batch.items()}
+    
+    def scores_all_users(self) -> bool:
+        """Whether the full refresh should call calculate_all_users_recommendations instead of scoring batch by batch"""
+        return False
+    
+    def calculate_all_users_recommendations(self, db: Session, user_ids: List[int]) -> Dict[int, List[Tuple[int, float, str]]]:
+        """
+        Recommendations of every given user in one set-based pass (full refresh)
+        Returns: {user_id: List of (vaga_id, score, explanation)}
+        Only called when scores_all_users() is True
+        """
+        raise NotImplementedError
+    
+    def get_all_users_recommendations(self, db: Session, user_ids: List[int]) -> Dict[int, List[Dict]]:
+        """calculate_all_users_recommendations in the service format, keyed by user id"""
+        batch = self.calculate_all_users_recommendations(db, user_ids)
+        return {user_id: self._to_dicts(recommendations) for user_id, recommendations in batch.items()}
 
 
 class CommonInterestsStrategy(RecommendationStrategy):
-    """Recommend opportunities based on common interests between user and opportunities"""
+    """Recommend opportunities based on common interests between user and opportunities
+    
+    scoring_mode (COMMON_INTERESTS_SCORING): "matrix" loads the incidence and scores in Python with a
+    sparse product, batch by batch; "sql" scores in the database with one grouped statement for all
+    the students of a full refresh, for a worker on a small box next to a bigger database
+    """
+    
+    def __init__(self, scoring_mode: Optional[str] = None):
+        self.scoring_mode = scoring_mode or os.getenv("COMMON_INTERESTS_SCORING", SCORING_MATRIX)
+        if self.scoring_mode not in (SCORING_MATRIX, SCORING_SQL):
+            raise ValueError(f"Invalid common interests scoring mode: {self.scoring_mode}")
     
     def get_name(self) -> str:
         return "common_interests"
@@ -63,64 +133,69 @@ class CommonInterestsStrategy(RecommendationStrategy):
         return 0.7  # Higher weight for interest-based recommendations
     
     def calculate_recommendations(self, db: Session, user: User) -> List[Tuple[int, float, str]]:
-        recommendations = []
+        if self.scoring_mode == SCORING_SQL:
+            return self.calculate_batch_recommendations(db, [user])[user.id]
         
-        # Get user interests
-        user_interests = db.query(InteresseUsuario).filter(
-            InteresseUsuario.usuario_id == user.id
-        ).all()
+        # Load the incidence once and score every active opportunity in one sparse product
+        matrix = InterestMatrix.load(db, user_ids=[user.id])
         
-        if not user_interests:
-            return recommendations
+        return [
+            self._build_recommendation(matrix, vaga_id, score, common_interest_ids)
+            for _, vaga_id, score, common_interest_ids in matrix.iter_matches()
+        ]
+    
+    def calculate_batch_recommendations(self, db: Session, users: List[User],
+                                        vaga_ids: Optional[List[int]] = None) -> Dict[int, List[Tuple[int, float, str]]]:
+        if self.scoring_mode == SCORING_SQL:
+            user_ids = [user.id for user in users]
+            return self._collect_sql_matches(user_ids, score_common_interests_sql(db, user_ids, vaga_ids))
         
-        user_interest_ids = [ui.interesse_id for ui in user_interests]
+        # Same sparse product, with one row per user of the batch
+        matrix = InterestMatrix.load(db, user_ids=[user.id for user in users], vaga_ids=vaga_ids)
         
-        # Get all active opportunities
-        vagas = db.query(Vagas).filter(Vagas.status == "em_andamento").all()
+        batch = {user.id: [] for user in users}
+        for user_id, vaga_id, score, common_interest_ids in matrix.iter_matches():
+            batch[user_id].append(self._build_recommendation(matrix, vaga_id, score, common_interest_ids))
         
-        for vaga in vagas:
-            # Skip if user already applied
-            already_applied = db.query(CandidatoVaga).filter(
-                and_(CandidatoVaga.vaga_id == vaga.id, CandidatoVaga.candidato_id == user.id)
-            ).first()
-            
-            if already_applied:
-                continue
-            
-            # Get opportunity interests
-            vaga_interests = db.query(InteresseVaga).filter(
-                InteresseVaga.vaga_id == vaga.id
-            ).all()
-            
-            if not vaga_interests:
-                continue
-            
-            vaga_interest_ids = [vi.interesse_id for vi in vaga_interests]
-            
-            # Calculate common interests
-            common_interests = set(user_interest_ids).intersection(set(vaga_interest_ids))
-            
-            if common_interests:
-                # Calculate score based on percentage of common interests
-                score = len(common_interests) / len(vaga_interest_ids)
-                
-                # Get interest names for explanation
-                common_interest_names = []
-                for interest_id in common_interests:
-                    interest = db.query(InteresseUsuario).filter(
-                        InteresseUsuario.interesse_id == interest_id,
-                        InteresseUsuario.usuario_id == user.id
-                    ).first()
-                    if interest and interest.interesse:
-                        common_interest_names.append(interest.interesse.nome)
-                
-                explanation = f"Você tem {len(common_interests)} interesse(s) em comum: {', '.join(common_interest_names[:3])}"
-                if len(common_interest_names) > 3:
-                    explanation += f" e mais {len(common_interest_names) - 3}"
-                
-                recommendations.append((vaga.id, score, explanation))
+        return batch
+    
+    def scores_all_users(self) -> bool:
+        return self.scoring_mode == SCORING_SQL
+    
+    def calculate_all_users_recommendations(self, db: Session, user_ids: List[int]) -> Dict[int, List[Tuple[int, float, str]]]:
+        # One statement for every user; the rows of users outside this refresh (e.g. other shards) are dropped
+        return self._collect_sql_matches(user_ids, score_common_interests_sql(db))
+    
+    def explain(self, details: Dict) -> str:
+        return self._build_explanation(details.get('interesse_ids', []), static_cache.get_interest_names())
+    
+    def _collect_sql_matches(self, user_ids: List[int], matches) -> Dict[int, List[Tuple]]:
+        interest_names = static_cache.get_interest_names()
+        batch = {user_id: [] for user_id in user_ids}
+        for user_id, vaga_id, score, common_interest_ids in matches:
+            if user_id in batch:
+                batch[user_id].append((
+                    vaga_id, score, self._build_explanation(common_interest_ids, interest_names),
+                    {'interesse_ids': common_interest_ids}
+                ))
+        return batch
+    
+    def _build_recommendation(self, matrix: InterestMatrix, vaga_id: int, score: float, common_interest_ids: List[int]) -> Tuple:
+        explanation = self._build_explanation(common_interest_ids, matrix.interest_names)
+        return (vaga_id, score, explanation, {'interesse_ids': common_interest_ids})
+    
+    def _build_explanation(self, common_interest_ids: List[int], interest_names: Dict[int, str]) -> str:
+        """Explain a match by the names of the common interests"""
+        common_interest_names = [
+            name for name in (interest_names.get(interest_id) for interest_id in common_interest_ids)
+            if name
+        ]
         
-        return recommendations
+        explanation = f"Você tem {len(common_interest_ids)} interesse(s) em comum: {', '.join(common_interest_names[:3])}"
+        if len(common_interest_names) > 3:
+            explanation += f" e mais {len(common_interest_names) - 3}"
+        
+        return explanation
 
 
 class PopularOpportunitiesStrategy(RecommendationStrategy):
@@ -136,48 +211,195 @@ class PopularOpportunitiesStrategy(RecommendationStrategy):
         return 0.3  # Lower weight for popularity-based recommendations
     
     def calculate_recommendations(self, db: Session, user: User) -> List[Tuple[int, float, str]]:
+        return self._calculate_popularity(db)
+    
+    def calculate_batch_recommendations(self, db: Session, users: List[User],
+                                        vaga_ids: Optional[List[int]] = None) -> Dict[int, List[Tuple[int, float, str]]]:
+        # Popularity does not depend on the user: compute it once for the whole batch
+        recommendations = self._calculate_popularity(db)
+        if vaga_ids is not None:
+            wanted = set(vaga_ids)
+            recommendations = [rec for rec in recommendations if rec[0] in wanted]
+        return {user.id: list(recommendations) for user in users}
+    
+    def explain(self, details: Dict) -> str:
+        return f"Esta oportunidade já atraiu {details.get('candidatos', 0)} candidato(s)"
+    
+    def _calculate_popularity(self, db: Session) -> List[Tuple[int, float, str]]:
         recommendations = []
         
-        # Get opportunities with candidate count
-        vaga_popularity = db.query(
-            Vagas.id,
-            Vagas.titulo,
-            func.count(CandidatoVaga.id).label('candidate_count')
-        ).outerjoin(CandidatoVaga).filter(
-            Vagas.status == "em_andamento"
-        ).group_by(Vagas.id, Vagas.titulo).all()
+        # Read the incrementally maintained candidate counts (backfilled on first use)
+        if not has_vaga_popularity(db):
+            rebuild_vaga_popularity(db)
+        vaga_popularity = get_active_vaga_popularity(db)
         
         if not vaga_popularity:
             return recommendations
         
         # Calculate max candidates for normalization
-        max_candidates = max([vp.candidate_count for vp in vaga_popularity])
+        max_candidates = max(vaga_popularity.values())
         
-        for vaga_pop in vaga_popularity:
-
+        for vaga_id, candidate_count in vaga_popularity.items():
             
             # Calculate score based on popularity
-            if max_candidates > 0:
-                score = vaga_pop.candidate_count / max_candidates
-            else:
-                score = 0.0
+            score = candidate_count / max_candidates
             
-            # Only recommend if there are at least some candidates
-            if vaga_pop.candidate_count > 0:
-                explanation = f"Esta oportunidade já atraiu {vaga_pop.candidate_count} candidato(s)"
-                recommendations.append((vaga_pop.id, score, explanation))
+            details = {'candidatos': candidate_count}
+            recommendations.append((vaga_id, score, self.explain(details), details))
         
         return recommendations
 
 
+class ContentSimilarityStrategy(RecommendationStrategy):
+    """Recommend opportunities whose text (titulo + descricao) is similar to the student's profile"""
+    
+    def get_name(self) -> str:
+        return "content_similarity"
+    
+    def get_description(self) -> str:
+        return "Baseado no conteúdo das vagas e no seu perfil"
+    
+    def get_weight(self) -> float:
+        return 0.5  # Matches vagas that have no tagged interests
+    
+    def calculate_recommendations(self, db: Session, user: User) -> List[Tuple[int, float, str]]:
+        return self.calculate_batch_recommendations(db, [user])[user.id]
+    
+    def calculate_batch_recommendations(self, db: Session, users: List[User],
+                                        vaga_ids: Optional[List[int]] = None) -> Dict[int, List[Tuple[int, float, str]]]:
+        # The term index is maintained on every vaga write (backfilled on first use)
+        if not has_vaga_terms(db):
+            rebuild_vaga_terms(db)
+        index = ContentIndex.load(db, vaga_ids)
+        
+        user_ids = [user.id for user in users]
+        profiles = load_user_profiles(db, user_ids)
+        applied = load_applied_pairs(db, user_ids, vaga_ids)
+        
+        batch = {user_id: [] for user_id in user_ids}
+        for user_id, vaga_id, score, terms in index.iter_matches(profiles, applied):
+            details = {'termos': terms}
+            batch[user_id].append((vaga_id, score, self.explain(details), details))
+        
+        return batch
+    
+    def explain(self, details: Dict) -> str:
+        return f"O conteúdo desta vaga combina com o seu perfil: {', '.join(details.get('termos', []))}"
+
+
+class CoApplicationStrategy(RecommendationStrategy):
+    """Recommend opportunities that students who applied to the same vagas also applied to (item-item CF)"""
+    
+    def get_name(self) -> str:
+        return "co_application"
+    
+    def get_description(self) -> str:
+        return "Baseado nas vagas às quais você se candidatou"
+    
+    def get_weight(self) -> float:
+        return 0.4
+    
+    def calculate_recommendations(self, db: Session, user: User) -> List[Tuple[int, float, str]]:
+        return self.calculate_batch_recommendations(db, [user])[user.id]
+    
+    def calculate_batch_recommendations(self, db: Session, users: List[User],
+                                        vaga_ids: Optional[List[int]] = None) -> Dict[int, List[Tuple[int, float, str]]]:
+        # The neighbor lists are rebuilt on every full refresh (backfilled on first use)
+        if not has_vaga_neighbors(db):
+            rebuild_vaga_neighbors(db)
+        
+        user_ids = [user.id for user in users]
+        applied = load_applied_pairs(db, user_ids)
+        neighbors = {}
+        for row in get_active_neighbors(db, list({vaga_id for _, vaga_id in applied}), vaga_ids):
+            neighbors.setdefault(row.vaga_id, []).append(row)
+        
+        batch = {user_id: [] for user_id in user_ids}
+        candidates = {}
+        for user_id, applied_vaga_id in sorted(applied):
+            for row in neighbors.get(applied_vaga_id, []):
+                if (user_id, row.vizinho_id) not in applied:
+                    candidates.setdefault((user_id, row.vizinho_id), []).append(row)
+        
+        for (user_id, vaga_id), rows in candidates.items():
+            # Each applied vaga is independent evidence: 1 - Π(1 - similarity) stays within [0, 1]
+            remaining = 1.0
+            for row in rows:
+                remaining *= 1.0 - row.similaridade
+            strongest = max(rows, key=lambda row: row.similaridade)
+            
+            details = {'vaga_origem': strongest.titulo, 'coaplicacoes': strongest.coaplicacoes}
+            batch[user_id].append((vaga_id, 1.0 - remaining, self.explain(details), details))
+        
+        return batch
+    
+    def explain(self, details: Dict) -> str:
+        return (
+            f"{details.get('coaplicacoes', 0)} estudante(s) que se candidataram a "
+            f"\"{details.get('vaga_origem', '')}\" também se candidataram a esta vaga"
+        )
+
+
+class HistoricoMonitoriaStrategy(RecommendationStrategy):
+    """Recommend monitorias of courses the student passed with a high grade (from the uploaded historico)"""
+    
+    # Minimum grade (0-10 scale) to be a good monitor of a course
+    MIN_GRADE = 8.0
+    
+    def get_name(self) -> str:
+        return "historico_monitoria"
+    
+    def get_description(self) -> str:
+        return "Baseado nas disciplinas em que você se destacou"
+    
+    def get_weight(self) -> float:
+        return 0.6
+    
+    def calculate_recommendations(self, db: Session, user: User) -> List[Tuple[int, float, str]]:
+        return self.calculate_batch_recommendations(db, [user])[user.id]
+    
+    def calculate_batch_recommendations(self, db: Session, users: List[User],
+                                        vaga_ids: Optional[List[int]] = None) -> Dict[int, List[Tuple[int, float, str]]]:
+        user_ids = [user.id for user in users]
+        return self._collect_matches(user_ids, get_monitoria_matches(db, self.MIN_GRADE, user_ids, vaga_ids))
+    
+    def scores_all_users(self) -> bool:
+        return True
+    
+    def calculate_all_users_recommendations(self, db: Session, user_ids: List[int]) -> Dict[int, List[Tuple[int, float, str]]]:
+        # One join for every student; matches of students outside this refresh are dropped
+        return self._collect_matches(user_ids, get_monitoria_matches(db, self.MIN_GRADE))
+    
+    def _collect_matches(self, user_ids: List[int], matches) -> Dict[int, List[Tuple]]:
+        batch = {user_id: [] for user_id in user_ids}
+        for row in matches:
+            if row.user_id not in batch:
+                continue
+            grade = float(row.grau)
+            # MIN_GRADE scores 0.5, a perfect grade 1.0
+            score = 0.5 + 0.5 * (grade - self.MIN_GRADE) / (10.0 - self.MIN_GRADE)
+            details = {'disciplina': row.codigo_disciplina, 'grau': grade}
+            batch[row.user_id].append((row.vaga_id, min(score, 1.0), self.explain(details), details))
+        return batch
+    
+    def explain(self, details: Dict) -> str:
+        return f"Você foi aprovado(a) em {details.get('disciplina')} com grau {details.get('grau', 0):.1f}"
+
+
 class RecommendationEngine:
     """Main recommendation engine that orchestrates all strategies"""
     
-    def __init__(self):
+    def __init__(self, runner: Optional[StrategyRunner] = None):
         self.strategies = [
             CommonInterestsStrategy(),
             PopularOpportunitiesStrategy(),
+            ContentSimilarityStrategy(),
+            CoApplicationStrategy(),
+            HistoricoMonitoriaStrategy(),
         ]
+        # Times every strategy run, enforces the deadline and skips failing strategies
+        self.runner = runner or StrategyRunner()
+        self._descriptions: Optional[Dict[str, str]] = None
     
     def get_all_strategies(self) -> List[RecommendationStrategy]:
         """Get all available strategies"""
@@ -186,20 +408,61 @@ class RecommendationEngine:
     def add_strategy(self, strategy: RecommendationStrategy):
         """Add a new strategy to the engine"""
         self.strategies.append(strategy)
+        self._descriptions = None
+    
+    def get_strategy_descriptions(self) -> Dict[str, str]:
+        """{strategy name: description} of the registered strategies, built once"""
+        if self._descriptions is None:
+            self._descriptions = {strategy.get_name(): strategy.get_description() for strategy in self.strategies}
+        return self._descriptions
     
     def calculate_all_recommendations(self, db: Session, user: User) -> Dict[str, List[Tuple[int, float, str]]]:
         """Calculate recommendations using all strategies"""
-        all_recommendations = {}
-        
-        for strategy in self.strategies:
-            try:
-                recommendations = strategy.calculate_recommendations(db, user)
-                all_recommendations[strategy.get_name()] = recommendations
-            except Exception as e:
-                print(f"Error in strategy {strategy.get_name()}: {e}")
-                all_recommendations[strategy.get_name()] = []
-        
-        return all_recommendations
+        return self.runner.run(db, {
+            strategy.get_name(): lambda strategy_db, strategy=strategy: strategy.calculate_recommendations(strategy_db, user)
+            for strategy in self.strategies
+        }, default=list)
+    
+    def get_recommendations(self, db: Session, user: User, strategy_names: Optional[List[str]] = None) -> Dict[str, List[Dict]]:
+        """Recommendations of each strategy (all when strategy_names is None) for one user, in the service format"""
+        return self.runner.run(db, {
+            strategy.get_name(): lambda strategy_db, strategy=strategy: strategy.get_recommendations(strategy_db, user)
+            for strategy in self.strategies
+            if strategy_names is None or strategy.get_name() in strategy_names
+        }, default=list)
+    
+    def get_batch_recommendations(self, db: Session, users: List[User], vaga_ids: Optional[List[int]] = None,
+                                  precomputed: Optional[Dict[str, Dict[int, List[Dict]]]] = None) -> Dict[str, Dict[int, List[Dict]]]:
+        """
+        Recommendations of every strategy for a batch of users: {strategy_name: {user_id: recommendations}}
+        Strategies in precomputed (from get_all_users_recommendations) are read from it instead of run
+        """
+        precomputed = precomputed or {}
+        results = self.runner.run(db, {
+            strategy.get_name(): lambda strategy_db, strategy=strategy: strategy.get_batch_recommendations(strategy_db, users, vaga_ids)
+            for strategy in self.strategies
+            if strategy.get_name() not in precomputed
+        }, default=dict)
+        for strategy_name, all_users in precomputed.items():
+            results[strategy_name] = {user.id: all_users.get(user.id, []) for user in users}
+        return results
+    
+    def get_all_users_recommendations(self, db: Session, user_ids: List[int]) -> Dict[str, Dict[int, List[Dict]]]:
+        """
+        One set-based pass of the strategies that score every user at once (see scores_all_users), for the full refresh:
+        {strategy_name: {user_id: recommendations}}. A pass that fails or misses the deadline is left out, so that
+        strategy is run batch by batch instead
+        """
+        results = self.runner.run(db, {
+            strategy.get_name(): lambda strategy_db, strategy=strategy: strategy.get_all_users_recommendations(strategy_db, user_ids)
+            for strategy in self.strategies
+            if strategy.scores_all_users()
+        }, default=lambda: None)
+        return {name: result for name, result in results.items() if result is not None}
+    
+    def flush_stats(self, db: Session):
+        """Add the strategy run statistics gathered since the last flush to the database (committed by the caller)"""
+        add_strategy_stats(db, self.runner.take_stats())
     
     def get_combined_recommendations(self, db: Session, user: User, limit: int = 10) -> List[Dict]:
         """Get combined recommendations from all strategies with weights"""
@@ -215,7 +478,7 @@ class RecommendationEngine:
         for strategy_name, recommendations in all_recommendations.items():
             weight = strategy_weights.get(strategy_name, 0.5)
             
-            for vaga_id, score, explanation in recommendations:
+            for vaga_id, score, explanation, *_ in recommendations:
                 if vaga_id not in combined_scores:
                     combined_scores[vaga_id] = {
                         'total_score': 0.0,
@@ -231,15 +494,15 @@ class RecommendationEngine:
                     'weight': weight
                 })
         
-        # Sort by total score and return top recommendations
-        sorted_recommendations = sorted(
+        # Bounded heap selection of the top recommendations
+        top_recommendations = heapq.nlargest(
+            limit,
             combined_scores.items(),
-            key=lambda x: x[1]['total_score'],
-            reverse=True
+            key=lambda x: x[1]['total_score']
         )
         
         result = []
-        for vaga_id, data in sorted_recommendations[:limit]:
+        for vaga_id, data in top_recommendations:
             result.append({
                 'vaga_id': vaga_id,
                 'total_score': data['total_score'],
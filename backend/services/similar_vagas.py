@@ -0,0 +1,128 @@
+"""
+Precomputed "similar opportunities"
+Each active vaga keeps its most similar active vagas in vaga_similares, so the endpoint is one
+indexed lookup. Similarity is a weighted sum of the TF-IDF text cosine and the cosine of the
+interest sets; the lists are rebuilt on every full refresh and, in between, only the lists
+affected by the vagas that changed are recomputed
+"""
+
+from typing import Dict, List, Optional, Tuple
+import math
+import numpy as np
+from scipy.sparse import csr_matrix, hstack
+from sqlalchemy.orm import Session
+from models.interesse_vaga import InteresseVaga
+from models.vaga import Vagas
+from services.content_index import ContentIndex
+from repositories.vaga_similar_repository import (
+    clear_similar_vagas,
+    get_list_floors,
+    get_lists_containing,
+    get_related_vagas,
+    replace_similar_vagas,
+)
+
+TEXT_WEIGHT = 0.6
+INTEREST_WEIGHT = 0.4
+# Similar vagas kept per vaga, and the least similarity worth showing
+SIMILAR_PER_VAGA = 20
+MIN_SIMILARITY = 0.05
+
+
+class VagaVectors:
+    """Active vagas as rows whose dot product is TEXT_WEIGHT × text cosine + INTEREST_WEIGHT × interest cosine"""
+
+    def __init__(self, content: ContentIndex, interest_rows: List[Tuple[int, int]]):
+        self.vaga_ids = content.vaga_ids
+        self.vaga_index = {vaga_id: i for i, vaga_id in enumerate(self.vaga_ids)}
+
+        interest_ids = sorted({interesse_id for _, interesse_id in interest_rows})
+        interest_index = {interesse_id: i for i, interesse_id in enumerate(interest_ids)}
+        pairs = [(self.vaga_index[vaga_id], interest_index[interesse_id])
+                 for vaga_id, interesse_id in interest_rows if vaga_id in self.vaga_index]
+        counts = np.bincount([row for row, _ in pairs], minlength=len(self.vaga_ids)).astype(np.float64)
+        interests = csr_matrix(
+            ([1 / math.sqrt(counts[row]) for row, _ in pairs], ([row for row, _ in pairs], [col for _, col in pairs])),
+            shape=(len(self.vaga_ids), len(interest_ids))
+        )
+
+        self.matrix = hstack([
+            content.vagas * math.sqrt(TEXT_WEIGHT),
+            interests * math.sqrt(INTEREST_WEIGHT),
+        ]).tocsr()
+
+    @classmethod
+    def load(cls, db: Session, vaga_ids: Optional[List[int]] = None) -> "VagaVectors":
+        """Vectors of the active vagas, or only of the given ones (IDF still over the whole catalog)"""
+        query = db.query(InteresseVaga.vaga_id, InteresseVaga.interesse_id).join(
+            Vagas, Vagas.id == InteresseVaga.vaga_id
+        ).filter(Vagas.status == "em_andamento")
+        if vaga_ids is not None:
+            query = query.filter(InteresseVaga.vaga_id.in_(vaga_ids))
+        interest_rows = query.distinct().all()
+        return cls(ContentIndex.load(db, vaga_ids), [(row.vaga_id, row.interesse_id) for row in interest_rows])
+
+    def similarities(self, vaga_ids: List[int]) -> csr_matrix:
+        """Similarity of the given (active) vagas to every active vaga, one row each"""
+        if not vaga_ids:
+            return csr_matrix((0, len(self.vaga_ids)))
+        rows = [self.vaga_index[vaga_id] for vaga_id in vaga_ids]
+        return (self.matrix[rows] @ self.matrix.T).tocsr()
+
+    def top_similar(self, vaga_ids: List[int]) -> Dict[int, List[Tuple[int, float]]]:
+        """{vaga_id: [(similar_id, similarity)]}, most similar first"""
+        result = {}
+        similarities = self.similarities(vaga_ids)
+        for row, vaga_id in enumerate(vaga_ids):
+            entries = [
+                (self.vaga_ids[col], float(score))
+                for col, score in self._row(similarities, row)
+                if self.vaga_ids[col] != vaga_id and score >= MIN_SIMILARITY
+            ]
+            entries.sort(key=lambda entry: (-entry[1], entry[0]))
+            result[vaga_id] = entries[:SIMILAR_PER_VAGA]
+        return result
+
+    @staticmethod
+    def _row(matrix: csr_matrix, row: int):
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        return zip(matrix.indices[start:end], matrix.data[start:end])
+
+
+def rebuild_similar_vagas(db: Session):
+    """Recompute every list (also picks up the IDF drift of incremental updates)"""
+    vectors = VagaVectors.load(db)
+    clear_similar_vagas(db)
+    for start in range(0, len(vectors.vaga_ids), 1000):
+        chunk = vectors.vaga_ids[start:start + 1000]
+        replace_similar_vagas(db, [], vectors.top_similar(chunk))
+    db.commit()
+
+
+def refresh_similar_vagas(db: Session, vaga_ids: List[int]):
+    """
+    Update the lists after the given vagas were created, edited or closed: their own lists, the
+    lists that contained them, and the lists they now enter (more similar than the list's last entry)
+    Only the vagas sharing a term or an interest with the changed vagas are loaded to find the
+    affected lists, then only those sharing one with the affected lists to recompute them. A changed
+    vaga made of common words still relates to most of the catalog, costing about a full rebuild.
+    """
+    related = get_related_vagas(db, vaga_ids)
+    vectors = VagaVectors.load(db, sorted(related | set(vaga_ids)))
+    active = [vaga_id for vaga_id in vaga_ids if vaga_id in vectors.vaga_index]
+
+    affected = set(vaga_ids) | get_lists_containing(db, vaga_ids)
+    if active:
+        floors = get_list_floors(db, sorted(related))
+        similarities = vectors.similarities(active)
+        for row in range(len(active)):
+            for col, score in VagaVectors._row(similarities, row):
+                other_id = vectors.vaga_ids[col]
+                size, floor = floors.get(other_id, (0, 0.0))
+                if score >= MIN_SIMILARITY and (size < SIMILAR_PER_VAGA or score > floor):
+                    affected.add(other_id)
+
+    affected = sorted(affected)
+    vectors = VagaVectors.load(db, sorted(get_related_vagas(db, affected) | set(affected)))
+    replace_similar_vagas(db, affected, vectors.top_similar([vaga_id for vaga_id in affected if vaga_id in vectors.vaga_index]))
+    db.commit()
@@ -0,0 +1,214 @@
+"""
+Guarded execution of recommendation strategies
+Every run is timed and its queries counted; a run that misses the deadline is abandoned, and a
+strategy that keeps failing is skipped for a while (circuit breaker) so the others still run
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime, timedelta
+import os
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Per-strategy deadline in seconds (RECOMMENDATION_STRATEGY_TIMEOUT, 0 disables it)
+DEFAULT_STRATEGY_TIMEOUT = 60
+# Consecutive errors/timeouts that open the breaker, and how long it stays open
+DEFAULT_BREAKER_FAILURES = 3
+DEFAULT_BREAKER_COOLDOWN = 5 * 60
+
+BREAKER_CLOSED = "fechado"
+BREAKER_OPEN = "aberto"
+
+# Statements executed by the current thread, counted by a listener on each engine in use
+_thread_queries = threading.local()
+_counted_binds = set()
+_counted_binds_lock = threading.Lock()
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    _thread_queries.count = getattr(_thread_queries, "count", 0) + 1
+
+def _ensure_query_counter(bind):
+    with _counted_binds_lock:
+        if bind not in _counted_binds:
+            event.listen(bind, "before_cursor_execute", _count_query)
+            _counted_binds.add(bind)
+
+
+class StrategyCircuitBreaker:
+    """Opens after consecutive failures; after the cooldown a single run is let through again"""
+
+    def __init__(self, failure_threshold: int, cooldown_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.consecutive_failures = 0
+        self.open_until: Optional[datetime] = None
+
+    @property
+    def state(self) -> str:
+        return BREAKER_OPEN if self.open_until and datetime.now() < self.open_until else BREAKER_CLOSED
+
+    def allow(self) -> bool:
+        return self.state == BREAKER_CLOSED
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self.open_until = None
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= self.failure_threshold:
+            self.open_until = datetime.now() + timedelta(seconds=self.cooldown_seconds)
+
+
+class StrategyRunner:
+    """Run strategies with timing, query counting, a deadline and a circuit breaker per strategy"""
+
+    def __init__(self, timeout_seconds: Optional[float] = None, failure_threshold: Optional[int] = None,
+                 cooldown_seconds: Optional[float] = None):
+        self.timeout_seconds = timeout_seconds if timeout_seconds is not None else float(
+            os.getenv("RECOMMENDATION_STRATEGY_TIMEOUT", DEFAULT_STRATEGY_TIMEOUT)
+        )
+        self.failure_threshold = failure_threshold or int(os.getenv("RECOMMENDATION_BREAKER_FAILURES", DEFAULT_BREAKER_FAILURES))
+        self.cooldown_seconds = cooldown_seconds or float(os.getenv("RECOMMENDATION_BREAKER_COOLDOWN", DEFAULT_BREAKER_COOLDOWN))
+        self.breakers: Dict[str, StrategyCircuitBreaker] = {}
+        self._pending_stats: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_size = 0
+        # Strategies whose call missed the deadline and is still executing (it keeps its thread and session)
+        self._abandoned: set = set()
+
+    def _breaker(self, name: str) -> StrategyCircuitBreaker:
+        if name not in self.breakers:
+            self.breakers[name] = StrategyCircuitBreaker(self.failure_threshold, self.cooldown_seconds)
+        return self.breakers[name]
+
+    def _get_executor(self, size: int) -> ThreadPoolExecutor:
+        # Created lazily so forked worker processes start their own threads; grown so that no call
+        # waits in the queue, which would eat into its deadline
+        if self._executor is None or self._executor_size < size:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="strategy")
+            self._executor_size = size
+        return self._executor
+
+    def run(self, db: Session, calls: Dict[str, Callable[[Session], Any]], default: Callable[[], Any]) -> Dict[str, Any]:
+        """
+        Run one call per strategy name and return {name: result}
+        With a deadline, the calls run concurrently, each in its own session; a call that fails,
+        misses the deadline or whose breaker is open returns default() instead.
+        """
+        results = {}
+        runnable = {}
+        for name, call in calls.items():
+            # A call abandoned after the deadline is not started again until it ends, so a slow
+            # strategy holds at most one thread and one session
+            if self._breaker(name).allow() and name not in self._abandoned:
+                runnable[name] = call
+            else:
+                self._record(name, skipped=True)
+                results[name] = default()
+
+        if not runnable:
+            return results
+
+        if not self.timeout_seconds:
+            for name, call in runnable.items():
+                results[name] = self._finish(name, lambda call=call: self._timed(call, db), default)
+            return {name: results[name] for name in calls}
+
+        bind = db.get_bind()
+        with self._lock:
+            executor = self._get_executor(len(runnable) + len(self._abandoned))
+        started_at = time.perf_counter()
+        futures = {name: executor.submit(self._timed_in_session, call, bind) for name, call in runnable.items()}
+        for name, future in futures.items():
+            remaining = max(0.0, self.timeout_seconds - (time.perf_counter() - started_at))
+            results[name] = self._finish(name, lambda future=future: future.result(timeout=remaining), default)
+            if not future.done():
+                self._abandon(name, future)
+        return {name: results[name] for name in calls}
+    
+    def _abandon(self, name: str, future):
+        with self._lock:
+            self._abandoned.add(name)
+        # Runs right away if the call ended in the meantime
+        future.add_done_callback(lambda _, name=name: self._release(name))
+    
+    def _release(self, name: str):
+        with self._lock:
+            self._abandoned.discard(name)
+
+    def _finish(self, name: str, get_result: Callable[[], Tuple[Any, float, int]], default: Callable[[], Any]) -> Any:
+        breaker = self._breaker(name)
+        try:
+            result, elapsed, queries = get_result()
+        except FutureTimeoutError:
+            # The abandoned run keeps its own session, so it cannot interfere with the caller's
+            print(f"Strategy {name} exceeded the {self.timeout_seconds}s deadline")
+            breaker.record_failure()
+            self._record(name, timeout=True, elapsed=self.timeout_seconds, error="Tempo limite excedido")
+            return default()
+        except Exception as e:
+            print(f"Error in strategy {name}: {e}")
+            breaker.record_failure()
+            self._record(name, error=str(e)[:500])
+            return default()
+
+        breaker.record_success()
+        self._record(name, elapsed=elapsed, queries=queries)
+        return result
+
+    def _timed(self, call: Callable[[Session], Any], db: Session) -> Tuple[Any, float, int]:
+        _ensure_query_counter(db.get_bind())
+        queries_before = getattr(_thread_queries, "count", 0)
+        started_at = time.perf_counter()
+        result = call(db)
+        return result, time.perf_counter() - started_at, getattr(_thread_queries, "count", 0) - queries_before
+
+    def _timed_in_session(self, call: Callable[[Session], Any], bind) -> Tuple[Any, float, int]:
+        strategy_db = Session(bind=bind, autoflush=False)
+        try:
+            return self._timed(call, strategy_db)
+        finally:
+            strategy_db.close()
+
+    def _record(self, name: str, elapsed: float = 0.0, queries: int = 0, timeout: bool = False,
+                skipped: bool = False, error: Optional[str] = None):
+        with self._lock:
+            stats = self._pending_stats.setdefault(name, {
+                "execucoes": 0, "erros": 0, "timeouts": 0, "ignoradas": 0,
+                "tempo_total": 0.0, "tempo_maximo": 0.0, "consultas": 0, "ultimo_erro": None
+            })
+            if skipped:
+                stats["ignoradas"] += 1
+                return
+            stats["execucoes"] += 1
+            stats["tempo_total"] += elapsed
+            stats["tempo_maximo"] = max(stats["tempo_maximo"], elapsed)
+            stats["consultas"] += queries
+            if timeout:
+                stats["timeouts"] += 1
+            elif error:
+                stats["erros"] += 1
+            if error:
+                stats["ultimo_erro"] = error
+
+    def take_stats(self) -> List[Dict]:
+        """Counters accumulated since the last call, with the current breaker state of each strategy"""
+        with self._lock:
+            pending, self._pending_stats = self._pending_stats, {}
+
+        return [
+            {
+                "estrategia": name,
+                **stats,
+                "estado": self._breaker(name).state,
+                "aberto_ate": self._breaker(name).open_until if self._breaker(name).state == BREAKER_OPEN else None,
+            }
+            for name, stats in pending.items()
+        ]
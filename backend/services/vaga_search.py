@@ -0,0 +1,94 @@
+"""
+Full-text search over vaga titulo + descricao
+- PostgreSQL: generated tsvector column (Portuguese stemming, title weighted above the description) with a GIN index,
+  created by migrations/add_vagas_search_vector.py
+- SQLite (local runs): external-content FTS5 table kept in sync by triggers, accent-insensitive prefix matching,
+  created at startup by ensure_search_index
+Both are maintained by the database on every vaga write.
+"""
+
+from typing import Optional, Tuple
+import re
+from sqlalchemy import Float, Integer, func, literal_column, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Query, Session
+from models.vaga import Vagas
+from utils.text_utils import normalize_text
+
+# Must match the configuration of the busca_vetor column (migrations/add_vagas_search_vector.py)
+TEXT_SEARCH_CONFIG = "portuguese"
+
+_SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS vagas_fts USING fts5(
+        titulo, descricao, content='vagas', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS vagas_fts_insert AFTER INSERT ON vagas BEGIN
+        INSERT INTO vagas_fts(rowid, titulo, descricao) VALUES (new.id, new.titulo, new.descricao);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS vagas_fts_delete AFTER DELETE ON vagas BEGIN
+        INSERT INTO vagas_fts(vagas_fts, rowid, titulo, descricao) VALUES ('delete', old.id, old.titulo, old.descricao);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS vagas_fts_update AFTER UPDATE OF titulo, descricao ON vagas BEGIN
+        INSERT INTO vagas_fts(vagas_fts, rowid, titulo, descricao) VALUES ('delete', old.id, old.titulo, old.descricao);
+        INSERT INTO vagas_fts(rowid, titulo, descricao) VALUES (new.id, new.titulo, new.descricao);
+    END
+    """,
+]
+
+# Title matches weigh twice as much as description matches in the SQLite ranking (bm25 column weights)
+_SQLITE_RANK = "bm25(vagas_fts, 2.0, 1.0)"
+
+
+def ensure_search_index(engine: Engine):
+    """Create the FTS5 table and triggers if they are missing (SQLite only; PostgreSQL uses the migration)"""
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as connection:
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'vagas_fts'")
+        ).first()
+        for statement in _SQLITE_DDL:
+            connection.execute(text(statement))
+        if not exists:
+            # Index the vagas written before the table existed
+            connection.execute(text("INSERT INTO vagas_fts(vagas_fts) VALUES ('rebuild')"))
+
+
+def _fts5_query(busca: str) -> Optional[str]:
+    """Every word of the search must match, as a prefix; None when there is no word to search"""
+    tokens = re.findall(r"[a-z0-9]+", normalize_text(busca))
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in dict.fromkeys(tokens))
+
+
+def apply_search(db: Session, query: Query, busca: str) -> Tuple[Query, Optional[object]]:
+    """
+    Restrict a Vagas query to the vagas matching busca
+    Returns (query, relevance expression to order by, higher is better), or no expression
+    when falling back to substring matching (no full-text support, or nothing to search in SQLite).
+    """
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        search_query = func.websearch_to_tsquery(TEXT_SEARCH_CONFIG, busca)
+        vector = literal_column("vagas.busca_vetor")
+        return query.filter(vector.op("@@")(search_query)), func.ts_rank_cd(vector, search_query)
+
+    match = _fts5_query(busca) if dialect == "sqlite" else None
+    if match is not None:
+        hits = text(
+            f"SELECT rowid AS vaga_id, {_SQLITE_RANK} AS rank FROM vagas_fts WHERE vagas_fts MATCH :match"
+        ).bindparams(match=match).columns(vaga_id=Integer, rank=Float).subquery()
+        # bm25 is lower for better matches
+        return query.join(hits, hits.c.vaga_id == Vagas.id), -hits.c.rank
+
+    search_term = f"%{busca.lower()}%"
+    return query.filter(Vagas.titulo.ilike(search_term) | Vagas.descricao.ilike(search_term)), None
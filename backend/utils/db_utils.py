@@ -0,0 +1,22 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, String, cast, literal
+
+def dialect_insert(db: Session, model):
+    """
+    Return an INSERT for the session's database that supports ON CONFLICT (upserts).
+    Both PostgreSQL (production) and SQLite (local runs) are supported.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upserts are not supported for the {dialect} dialect")
+    return insert(model)
+
+def aggregate_ids(db: Session, column):
+    """Comma-separated aggregate of an integer column (GROUP BY), for PostgreSQL and SQLite"""
+    if db.get_bind().dialect.name == "postgresql":
+        return func.string_agg(cast(column, String), literal(","))
+    return func.group_concat(column, ",")
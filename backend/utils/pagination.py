@@ -0,0 +1,24 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+
+def encode_cursor(values: list) -> str:
+    """Opaque cursor with the sort key values of the last row of a page"""
+    payload = [{"t": value.isoformat()} if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> list:
+    """Sort key values of a cursor made by encode_cursor; raises ValueError when it is malformed"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+    if not isinstance(payload, list):
+        raise ValueError("Invalid cursor")
+    try:
+        return [datetime.fromisoformat(value["t"]) if isinstance(value, dict) else value for value in payload]
+    except (KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
@@ -0,0 +1,48 @@
+import re
+import unicodedata
+from collections import Counter
+
+# Words too common to say anything about an opportunity or a student (accents already removed)
+STOPWORDS = {
+    "a", "ao", "aos", "as", "com", "como", "da", "das", "de", "do", "dos", "e", "ela", "ele", "em", "entre",
+    "era", "essa", "esse", "esta", "este", "eu", "foi", "ha", "isso", "ja", "la", "mais", "mas", "me", "mesmo",
+    "meu", "minha", "muito", "na", "nas", "nao", "no", "nos", "o", "os", "ou", "para", "pela", "pelas", "pelo",
+    "pelos", "por", "qual", "que", "se", "sem", "ser", "seu", "sua", "suas", "seus", "sao", "sobre", "tambem",
+    "tem", "ter", "um", "uma", "umas", "uns", "voce", "voces", "sera", "serao", "sob", "ate", "apos", "cada",
+    "and", "the", "of", "to", "in", "for", "on", "with", "is", "are",
+    "http", "https", "www", "com", "br", "puc", "rio",
+}
+
+MIN_TOKEN_LENGTH = 3
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+# Course code in monitoria titles, e.g. "Monitoria em INF1010 - Estruturas de Dados"
+_MONITORIA_COURSE_RE = re.compile(r"^\s*monitoria\s+em\s+([a-z]{3})\s?(\d{4})\b", re.IGNORECASE)
+
+def normalize_text(text: str) -> str:
+    """Lowercase and strip accents"""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+def tokenize(text: str) -> list[str]:
+    """Split text into normalized words, without stopwords, short words and numbers"""
+    return [
+        token for token in _TOKEN_RE.findall(normalize_text(text))
+        if len(token) >= MIN_TOKEN_LENGTH and token not in STOPWORDS and not token.isdigit()
+    ]
+
+def term_frequencies(*texts: str) -> Counter:
+    """Count the terms of several texts together"""
+    counts = Counter()
+    for text in texts:
+        counts.update(tokenize(text))
+    return counts
+
+def parse_course_code(titulo: str):
+    """Course code of a monitoria vaga ("Monitoria em INF1010 - ..." -> "INF1010"), None for other vagas"""
+    match = _MONITORIA_COURSE_RE.match(titulo or "")
+    if not match:
+        return None
+    return f"{match.group(1).upper()}{match.group(2)}"